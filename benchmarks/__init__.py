@@ -0,0 +1 @@
+"""Benchmarks da API de tarefas (`python -m benchmarks`)."""
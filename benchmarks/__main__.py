@@ -0,0 +1,141 @@
+"""
+Suíte de benchmarks da API de tarefas.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks                         # suíte completa
+    python -m benchmarks --quick                 # só 1k tarefas, menos repetições
+    python -m benchmarks --only service,api --sizes 1000,100000
+    python -m benchmarks --only memory --backends memory,compact
+    python -m benchmarks --only durability --sizes 1000000 --backends memory
+    python -m benchmarks --output results.json --save-baseline benchmarks/baseline.json
+    python -m benchmarks --baseline benchmarks/baseline.json --threshold 0.15 \\
+        --threshold-for startup=0.3
+
+Com `--baseline`, os resultados são comparados pela mediana do tempo por
+operação e o processo termina com código 1 se algum ficar mais lento que o
+limite (`--threshold`, ou o prefixo mais longo de `--threshold-for`).
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+from typing import Dict, List
+
+# A suíte monta seus próprios backends; a aplicação importada não deve
+# criar nem abrir o banco configurado no ambiente.
+os.environ.setdefault("DATABASE_URL", "memory://")
+os.environ.setdefault("METRICS_DIR", "")
+
+from .harness import Runner, compare, format_value, load, save, to_json  # noqa: E402
+
+SUITES = {
+    "service": "benchmarks.bench_service",
+    "serialization": "benchmarks.bench_serialization",
+    "api": "benchmarks.bench_api",
+    "memory": "benchmarks.bench_memory",
+    "durability": "benchmarks.bench_durability",
+    "compression": "benchmarks.bench_compression",
+    "startup": "benchmarks.bench_startup",
+    "clock": "benchmarks.bench_clock",
+}
+DEFAULT_SIZES = "1000,100000,1000000"
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _threshold(value: str) -> tuple:
+    prefix, sep, limit = value.rpartition("=")
+    if not sep or not prefix:
+        raise argparse.ArgumentTypeError("use PREFIXO=LIMITE, ex.: service.search=0.5")
+    return prefix, float(limit)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Benchmarks da API de tarefas."
+    )
+    parser.add_argument("--only", type=_csv, default=list(SUITES),
+                        help=f"suítes separadas por vírgula ({', '.join(SUITES)})")
+    parser.add_argument("--sizes", type=_csv, default=_csv(DEFAULT_SIZES),
+                        help="tamanhos da coleção no benchmark do serviço")
+    parser.add_argument("--backends", type=_csv, default=["memory", "compact", "sqlite"],
+                        help="backends de armazenamento (memory, compact, sqlite)")
+    parser.add_argument("--repeat", type=int, default=5, help="amostras por medição")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="duração mínima de cada amostra, em segundos")
+    parser.add_argument("--quick", action="store_true",
+                        help="só 1000 tarefas, 3 amostras de 0.05 s (para CI)")
+    parser.add_argument("--output", help="grava os resultados em JSON neste arquivo")
+    parser.add_argument("--json", action="store_true",
+                        help="imprime os resultados em JSON na saída padrão")
+    parser.add_argument("--baseline", help="resultados anteriores para comparação")
+    parser.add_argument("--save-baseline", metavar="PATH",
+                        help="grava os resultados (e os limites) como nova baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="piora relativa tolerada (0.2 = 20%% mais lento)")
+    parser.add_argument("--threshold-for", type=_threshold, action="append", default=[],
+                        metavar="PREFIXO=LIMITE", help="limite específico por prefixo de chave")
+    args = parser.parse_args(argv)
+    unknown = set(args.only) - set(SUITES)
+    if unknown:
+        parser.error(f"suítes desconhecidas: {', '.join(sorted(unknown))}")
+    if args.quick:
+        args.sizes, args.repeat, args.min_time = ["1000"], 3, 0.05
+    args.sizes = [int(size) for size in args.sizes]
+    return args
+
+
+async def run_suites(runner: Runner, names: List[str]) -> None:
+    for name in names:
+        module = importlib.import_module(SUITES[name])
+        await module.run(runner)
+
+
+def print_comparison(comparisons) -> None:
+    print(f"{'benchmark':<60}{'baseline':>12}{'atual':>12}{'variação':>10}  status")
+    for item in comparisons:
+        print(
+            f"{item.key:<60}{format_value(item.baseline, item.unit):>12}"
+            f"{format_value(item.current, item.unit):>12}"
+            f"{item.change:>+10.1%}  {item.status}"
+        )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    runner = Runner(args.sizes, args.backends, repeat=args.repeat, min_time=args.min_time)
+    asyncio.run(run_suites(runner, [name for name in SUITES if name in args.only]))
+
+    config = {
+        "suites": args.only,
+        "sizes": args.sizes,
+        "backends": args.backends,
+        "repeat": args.repeat,
+        "min_time": args.min_time,
+    }
+    data = to_json(runner.results, config)
+    if args.output:
+        save(args.output, data)
+    if args.json:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
+    overrides: Dict[str, float] = dict(args.threshold_for)
+    if args.save_baseline:
+        save(args.save_baseline, dict(data, thresholds=overrides))
+
+    if not args.baseline:
+        return 0
+    comparisons = compare(load(args.baseline), data, args.threshold, overrides)
+    print_comparison(comparisons)
+    regressions = [item for item in comparisons if item.status == "regressão"]
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) acima do limite", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Vazão dos endpoints pela aplicação completa, em processo.
+
+As requisições passam por toda a pilha ASGI (middlewares, roteamento,
+validação e serialização) via `httpx.ASGITransport`, sem rede nem servidor.
+Cada chamada dispara `CONCURRENCY` requisições simultâneas; o tempo por
+operação é o tempo por requisição, e `ops/s` a vazão de um único processo.
+"""
+import asyncio
+import random
+
+import httpx
+
+from boilerplate.core.cache import MemoryCache
+from boilerplate.main import app
+from boilerplate.services.todo import set_cache, set_storage
+
+from .bench_service import make_backend, prefill
+from .harness import Runner
+
+SIZE = 10_000
+CONCURRENCY = 16
+
+
+async def run(runner: Runner) -> None:
+    rng = random.Random(42)
+    for backend in runner.backends:
+        storage = make_backend(backend)
+        previous_storage = set_storage(storage)
+        previous_cache = set_cache(MemoryCache(ttl=0))
+        try:
+            runner.log(f"api: {backend}, {SIZE} tarefas")
+            await prefill(storage, SIZE)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                await _run_backend(runner, client, rng, backend)
+        finally:
+            set_cache(previous_cache)
+            set_storage(previous_storage)
+            storage.close()
+
+
+async def _run_backend(
+    runner: Runner, client: httpx.AsyncClient, rng: random.Random, backend: str
+) -> None:
+    params = {"backend": backend, "concurrency": CONCURRENCY}
+
+    def concurrent(request):
+        async def call():
+            responses = await asyncio.gather(*(request() for _ in range(CONCURRENCY)))
+            for response in responses:
+                response.raise_for_status()
+        return call
+
+    async def measure(name, request, **extra_params):
+        result = await runner.measure(
+            name, concurrent(request), dict(params, **extra_params), ops=CONCURRENCY
+        )
+        result.extra["requests_per_second"] = round(1 / result.per_op, 1)
+
+    await measure("api.health", lambda: client.get("/health"))
+    await measure("api.list", lambda: client.get("/api/v1/todos/", params={"limit": 50}))
+    await measure(
+        "api.get", lambda: client.get(f"/api/v1/todos/{rng.randint(1, SIZE)}")
+    )
+    await measure(
+        "api.create",
+        lambda: client.post("/api/v1/todos/", json={"title": "Nova tarefa", "description": "x"}),
+    )
+    await measure(
+        "api.update",
+        lambda: client.put(f"/api/v1/todos/{rng.randint(1, SIZE)}", json={"completed": True}),
+    )
+    # Com o cache de respostas ativo, as leituras repetidas são acertos
+    set_cache(MemoryCache(ttl=300))
+    await measure(
+        "api.list", lambda: client.get("/api/v1/todos/", params={"limit": 50}), cache=True
+    )
+    await measure(
+        "api.get", lambda: client.get(f"/api/v1/todos/{rng.randint(1, 100)}"), cache=True
+    )
@@ -0,0 +1,86 @@
+"""
+Micro-benchmark do relógio da aplicação (`boilerplate.core.clock`).
+
+Compara a busca `pytz.timezone(settings.TIMEZONE)` a cada chamada, usada
+antes pelo serviço e pelos modelos, com o timezone resolvido uma única vez.
+
+Uso:
+    python benchmarks/bench_clock.py [--number 20000] [--batch 1000]
+
+Também roda como parte da suíte (`python -m benchmarks --only clock`).
+"""
+import argparse
+import timeit
+from datetime import datetime, timezone
+
+import pytz
+
+from boilerplate.config import settings
+from boilerplate.core.clock import get_clock
+
+
+def _legacy_now() -> datetime:
+    return datetime.now(pytz.timezone(settings.TIMEZONE))
+
+
+def _legacy_localize(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=pytz.timezone(settings.TIMEZONE))
+    return value.astimezone(pytz.timezone(settings.TIMEZONE))
+
+
+def _measure(func, number: int) -> float:
+    """Melhor tempo por chamada, em microssegundos."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+async def run(runner) -> None:
+    """Casos do relógio na suíte de benchmarks (`benchmarks/harness.py`)."""
+    runner.log("clock")
+    clock = get_clock()
+    value = datetime.now(timezone.utc)
+    batch = [datetime.now(timezone.utc) for _ in range(1000)]
+    await runner.measure("clock.now", clock.now)
+    await runner.measure("clock.localize", lambda: clock.localize(value))
+    await runner.measure(
+        "clock.localize_many", lambda: clock.localize_many(batch), {"size": len(batch)},
+        ops=len(batch),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="chamadas por medição")
+    parser.add_argument("--batch", type=int, default=1000, help="datas por lote")
+    args = parser.parse_args()
+
+    clock = get_clock()
+    value = datetime.now(timezone.utc)
+    batch = [datetime.now(timezone.utc) for _ in range(args.batch)]
+
+    cases = [
+        ("now()", _legacy_now, clock.now),
+        ("localize()", lambda: _legacy_localize(value), lambda: clock.localize(value)),
+    ]
+    print(f"timezone: {settings.TIMEZONE}")
+    print(f"{'operação':<24}{'pytz (µs)':>12}{'clock (µs)':>12}{'ganho':>8}")
+    legacy_request = clock_request = 0.0
+    for name, legacy, current in cases:
+        before, after = _measure(legacy, args.number), _measure(current, args.number)
+        print(f"{name:<24}{before:>12.2f}{after:>12.2f}{before / after:>7.1f}x")
+        # Uma escrita gera um `now()` e a resposta converte duas datas
+        weight = 1 if name == "now()" else 2
+        legacy_request += weight * before
+        clock_request += weight * after
+
+    number = max(1, args.number // args.batch)
+    before = _measure(lambda: [_legacy_localize(v) for v in batch], number)
+    after = _measure(lambda: clock.localize_many(batch), number)
+    name = f"lote de {args.batch}"
+    print(f"{name:<24}{before:>12.2f}{after:>12.2f}{before / after:>7.1f}x")
+    print(f"{'por requisição':<24}{legacy_request:>12.2f}{clock_request:>12.2f}"
+          f"{legacy_request / clock_request:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
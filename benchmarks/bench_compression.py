@@ -0,0 +1,34 @@
+"""
+Custo e ganho da compressão das respostas (`COMPRESSION_*`).
+
+- `compression.<codificação>`: tempo de CPU para comprimir uma página da
+  listagem (JSON), por codificação e nível; a razão de compressão fica em
+  `extra.ratio` e o tamanho comprimido em `extra.bytes`
+
+brotli e zstd só são medidos com o extra `compression` instalado.
+"""
+from boilerplate.core import serialization
+from boilerplate.core.compression import available_encodings, compress
+
+from .bench_serialization import make_todos
+from .harness import Runner
+
+# Tamanhos de página da listagem (o padrão e o máximo de `limit`)
+PAGE_SIZES = (20, 100, 1000)
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 11), "zstd": (1, 3, 19)}
+
+
+async def run(runner: Runner) -> None:
+    encodings = available_encodings(tuple(LEVELS))
+    for size in PAGE_SIZES:
+        body = serialization.encode_todos(make_todos(size))
+        runner.log(f"compression: {size} tarefas ({len(body)} bytes, {', '.join(encodings)})")
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                data = compress(encoding, body, level)
+                await runner.measure(
+                    f"compression.{encoding}",
+                    lambda: compress(encoding, body, level),
+                    {"size": size, "level": level},
+                    extra={"bytes": len(data), "ratio": round(len(data) / len(body), 4)},
+                )
@@ -0,0 +1,72 @@
+"""
+Custo da durabilidade dos backends em memória (`WAL_DIR`).
+
+- `durability.create`: `create` com o WAL em cada modo de `WAL_SYNC`
+  (`always` inclui um fsync por escrita sequencial)
+- `durability.snapshot`: gravação de um snapshot com `size` tarefas
+- `durability.recover`: recuperação do snapshot e do WAL ao iniciar, por
+  tarefa (o total fica em `extra.total_seconds`)
+"""
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from boilerplate.core.storage.durable import SYNC_MODES, DurableBackend
+
+from .bench_service import make_backend, prefill
+from .harness import Runner
+
+MEMORY_BACKENDS = ("memory", "compact")
+
+
+async def _create_latency(runner: Runner, backend: str) -> None:
+    now = datetime.now(timezone.utc)
+    for sync in SYNC_MODES:
+        directory = tempfile.mkdtemp(prefix="bench-wal-")
+        storage = DurableBackend(make_backend(backend), directory, sync=sync)
+        try:
+            async def create():
+                await storage.create({"title": "Nova tarefa", "completed": False}, now)
+
+            await runner.measure("durability.create", create, {"backend": backend, "sync": sync})
+        finally:
+            storage.close()
+            shutil.rmtree(directory)
+
+
+async def _snapshot_and_recover(runner: Runner, backend: str, size: int) -> None:
+    directory = tempfile.mkdtemp(prefix="bench-wal-")
+    try:
+        storage = DurableBackend(make_backend(backend), directory, sync="off")
+        await prefill(storage, size)
+        start = time.perf_counter()
+        await storage.snapshot()
+        runner.add("durability.snapshot", [time.perf_counter() - start],
+                   {"backend": backend, "size": size})
+        storage.close()
+
+        timings = []
+        for _ in range(min(runner.repeat, 3)):
+            start = time.perf_counter()
+            DurableBackend(make_backend(backend), directory).close()
+            timings.append(time.perf_counter() - start)
+        runner.add(
+            "durability.recover",
+            [t / size for t in timings],
+            {"backend": backend, "size": size},
+            extra={"total_seconds": min(timings)},
+        )
+    finally:
+        shutil.rmtree(directory)
+
+
+async def run(runner: Runner) -> None:
+    for backend in runner.backends:
+        if backend not in MEMORY_BACKENDS:
+            continue
+        runner.log(f"durability: {backend}")
+        await _create_latency(runner, backend)
+        for size in runner.sizes:
+            runner.log(f"durability: {backend}, {size} tarefas")
+            await _snapshot_and_recover(runner, backend, size)
@@ -0,0 +1,45 @@
+"""
+Memória ocupada pelas tarefas nos backends em memória.
+
+Mede com `tracemalloc` os bytes alocados pelo backend depois de preenchido
+com `size` tarefas (dados, índices e folga das estruturas), e registra o
+valor por tarefa (`memory.bytes_per_todo`, unidade "B"). O SQLite guarda as
+tarefas fora do heap do Python e não é medido.
+"""
+import gc
+import tracemalloc
+
+from .bench_service import make_backend, prefill
+from .harness import Runner
+
+MEMORY_BACKENDS = ("memory", "compact")
+
+
+async def _allocated(backend: str, size: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        storage = make_backend(backend)
+        await prefill(storage, size)
+        gc.collect()
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    storage.close()
+    return allocated
+
+
+async def run(runner: Runner) -> None:
+    for backend in runner.backends:
+        if backend not in MEMORY_BACKENDS:
+            continue
+        for size in runner.sizes:
+            runner.log(f"memory: {backend}, {size} tarefas")
+            allocated = await _allocated(backend, size)
+            runner.add(
+                "memory.bytes_per_todo",
+                [allocated / size],
+                {"backend": backend, "size": size},
+                extra={"total_bytes": allocated},
+                unit="B",
+            )
@@ -0,0 +1,61 @@
+"""
+Serialização de listas grandes de tarefas.
+
+Compara a codificação direta de `core/serialization.py` (JSON, NDJSON e CSV)
+com a revalidação por `TypeAdapter(List[TodoInDB])`, usada antes pelas rotas.
+"""
+from datetime import timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from boilerplate.core import serialization
+from boilerplate.core.clock import get_clock
+from boilerplate.models.todo import TodoInDB
+
+from .harness import Runner
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def make_todos(size: int) -> List[dict]:
+    now = get_clock().now()
+    return [
+        {
+            "id": i,
+            "title": f"Tarefa {i}",
+            "description": f"Descrição da tarefa {i} com acentuação e \"aspas\"",
+            "completed": i % 3 == 0,
+            "version": 1 + i % 4,
+            "created_at": now - timedelta(seconds=i),
+            "updated_at": now,
+        }
+        for i in range(1, size + 1)
+    ]
+
+
+async def run(runner: Runner) -> None:
+    adapter = TypeAdapter(List[TodoInDB])
+    backend = "orjson" if serialization.orjson is not None else "json"
+    for size in SIZES:
+        runner.log(f"serialization: {size} tarefas ({backend})")
+        todos = make_todos(size)
+        params = {"size": size}
+        extra = {"backend": backend}
+        # Uma "operação" é uma tarefa serializada
+        await runner.measure(
+            "serialization.pydantic", lambda: adapter.dump_json(adapter.validate_python(todos)),
+            params, ops=size,
+        )
+        await runner.measure(
+            "serialization.json", lambda: serialization.encode_todos(todos),
+            params, ops=size, extra=extra,
+        )
+        await runner.measure(
+            "serialization.ndjson", lambda: serialization.encode_ndjson(todos),
+            params, ops=size, extra=extra,
+        )
+        await runner.measure(
+            "serialization.csv", lambda: serialization.encode_csv(todos),
+            params, ops=size,
+        )
@@ -0,0 +1,100 @@
+"""
+CRUD do `TodoService` sobre coleções de tamanhos diferentes.
+
+Cada combinação de backend e tamanho parte de um backend novo, preenchido
+em lotes com `create_many`. O cache de respostas fica desativado (TTL 0)
+para medir o serviço e o armazenamento, não o cache.
+"""
+import random
+from datetime import datetime, timezone
+from typing import List
+
+from boilerplate.core.cache import MemoryCache
+from boilerplate.core.storage import StorageBackend, create_backend
+from boilerplate.services.todo import TodoService, set_cache, set_storage
+
+from .harness import Runner
+
+BACKEND_URLS = {
+    "memory": "memory://",
+    "compact": "memory+compact://",
+    "sqlite": "sqlite:///:memory:",
+}
+PREFILL_BATCH = 50_000
+# Operações de remoção consomem IDs existentes: no máximo esta fração da coleção
+DELETE_FRACTION = 0.1
+
+
+def make_backend(name: str) -> StorageBackend:
+    return create_backend(BACKEND_URLS[name])
+
+
+async def prefill(storage: StorageBackend, size: int) -> None:
+    now = datetime.now(timezone.utc)
+    for start in range(0, size, PREFILL_BATCH):
+        items = [
+            {
+                "title": f"Tarefa {i}",
+                "description": f"Descrição da tarefa {i} gerada para o benchmark",
+                "completed": i % 3 == 0,
+            }
+            for i in range(start, min(size, start + PREFILL_BATCH))
+        ]
+        await storage.create_many(items, now)
+
+
+async def run(runner: Runner) -> None:
+    rng = random.Random(42)
+    previous_cache = set_cache(MemoryCache(ttl=0))
+    try:
+        for backend in runner.backends:
+            for size in runner.sizes:
+                storage = make_backend(backend)
+                previous = set_storage(storage)
+                try:
+                    runner.log(f"service: {backend}, {size} tarefas")
+                    await prefill(storage, size)
+                    await _run_size(runner, rng, backend, size)
+                finally:
+                    set_storage(previous)
+                    storage.close()
+    finally:
+        set_cache(previous_cache)
+
+
+async def _run_size(runner: Runner, rng: random.Random, backend: str, size: int) -> None:
+    params = {"backend": backend, "size": size}
+    # IDs do prefill são contíguos a partir de 1
+    ids: List[int] = list(range(1, size + 1))
+
+    async def get_todo():
+        await TodoService.get_todo(rng.choice(ids))
+
+    async def update_todo():
+        await TodoService.update_todo(rng.choice(ids), {"completed": rng.random() < 0.5})
+
+    async def create_todo():
+        await TodoService.create_todo({"title": "Nova tarefa", "description": "benchmark"})
+
+    async def list_page():
+        await TodoService.get_todos_page(100, after_id=rng.randrange(size))
+
+    async def list_completed():
+        await TodoService.get_todos_page(100, after_id=rng.randrange(size), completed=True)
+
+    async def search():
+        await TodoService.get_todos_page(20, search=f"tarefa {rng.randrange(size)}")
+
+    # Remove IDs do fim da coleção para não afetar as demais operações
+    victims = ids[-max(1, int(size * DELETE_FRACTION)):]
+
+    async def delete_todo():
+        await TodoService.delete_todo(victims.pop())
+
+    await runner.measure("service.get_todo", get_todo, params)
+    await runner.measure("service.update_todo", update_todo, params)
+    await runner.measure("service.list_page", list_page, params)
+    await runner.measure("service.list_page_completed", list_completed, params)
+    await runner.measure("service.search", search, params)
+    await runner.measure("service.create_todo", create_todo, params)
+    await runner.measure("service.delete_todo", delete_todo, params, max_calls=len(victims))
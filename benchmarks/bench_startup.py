@@ -0,0 +1,44 @@
+"""
+Tempo de inicialização a frio, medido em processos novos.
+
+- `startup.interpreter`: só o interpretador (referência para as demais)
+- `startup.import`: `import boilerplate.main` (configuração, rotas e middlewares)
+- `startup.first_request`: importação e a primeira resposta de `/health`
+"""
+import os
+import subprocess
+import sys
+import time
+
+from .harness import Runner
+
+SCRIPTS = {
+    "startup.interpreter": "pass",
+    "startup.import": "import boilerplate.main",
+    "startup.first_request": (
+        "import asyncio, httpx\n"
+        "from boilerplate.main import app\n"
+        "async def main():\n"
+        "    transport = httpx.ASGITransport(app=app)\n"
+        "    async with httpx.AsyncClient(transport=transport, base_url='http://b') as client:\n"
+        "        (await client.get('/health')).raise_for_status()\n"
+        "asyncio.run(main())\n"
+    ),
+}
+
+
+def _spawn(code: str) -> float:
+    # Banco em memória: a inicialização não deve depender de arquivos locais
+    env = dict(os.environ, DATABASE_URL="memory://")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+    return time.perf_counter() - start
+
+
+async def run(runner: Runner) -> None:
+    runner.log("startup")
+    repeat = max(runner.repeat, 5)
+    for name, code in SCRIPTS.items():
+        # Primeira execução descartada: preenche o cache de bytecode e do SO
+        _spawn(code)
+        runner.add(name, [_spawn(code) for _ in range(repeat)])
@@ -0,0 +1,252 @@
+"""
+Infraestrutura comum dos benchmarks: medição, resultados e comparação.
+
+Cada medição calibra quantas chamadas cabem em `min_time` segundos e repete
+a amostra `repeat` vezes. O valor comparado entre execuções é a mediana do
+tempo por operação (`per_op`, em segundos): menor é melhor, inclusive para
+os benchmarks de vazão, cujo "ops/s" é apenas o inverso. Resultados com
+outra unidade (`unit`, ex.: bytes por tarefa) seguem a mesma regra.
+"""
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+Operation = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+@dataclass
+class Result:
+    """Resultado de uma medição."""
+
+    name: str
+    params: Dict[str, Any]
+    per_op: float  # mediana, em segundos por operação
+    best: float
+    mean: float
+    stdev: float
+    calls: int  # chamadas por amostra
+    ops: int  # operações por chamada
+    repeat: int
+    extra: Dict[str, Any] = field(default_factory=dict)
+    unit: str = "s"  # "s" (segundos por operação) ou "B" (bytes)
+
+    @property
+    def key(self) -> str:
+        """Identificador estável usado na comparação com a baseline."""
+        if not self.params:
+            return self.name
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.name}[{params}]"
+
+
+class Runner:
+    """Executa as medições e acumula os resultados."""
+
+    def __init__(
+        self,
+        sizes: List[int],
+        backends: List[str],
+        repeat: int = 5,
+        min_time: float = 0.2,
+        verbose: bool = True,
+    ):
+        self.sizes = sizes
+        self.backends = backends
+        self.repeat = repeat
+        self.min_time = min_time
+        self.verbose = verbose
+        self.results: List[Result] = []
+
+    def log(self, message: str) -> None:
+        if self.verbose:
+            print(message, file=sys.stderr, flush=True)
+
+    async def measure(
+        self,
+        name: str,
+        func: Operation,
+        params: Optional[Dict[str, Any]] = None,
+        ops: int = 1,
+        max_calls: Optional[int] = None,
+        repeat: Optional[int] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> Result:
+        """
+        Mede `func` (síncrona ou assíncrona), que executa `ops` operações.
+
+        `max_calls` limita o total de chamadas, para operações que consomem
+        um recurso finito (ex.: remover IDs existentes).
+        """
+        is_async = inspect.iscoroutinefunction(func)
+        repeat = repeat or self.repeat
+
+        async def sample(calls: int) -> float:
+            start = time.perf_counter()
+            if is_async:
+                for _ in range(calls):
+                    await func()
+            else:
+                for _ in range(calls):
+                    func()
+            return time.perf_counter() - start
+
+        # Calibração: a primeira chamada também aquece caches e conexões
+        first = await sample(1)
+        calls = max(1, int(self.min_time / first)) if first > 0 else 1000
+        if max_calls is not None:
+            calls = max(1, min(calls, (max_calls - 1) // repeat))
+        timings = [await sample(calls) / (calls * ops) for _ in range(repeat)]
+        return self.add(name, timings, params, calls=calls, ops=ops, extra=extra)
+
+    def add(
+        self,
+        name: str,
+        timings: List[float],
+        params: Optional[Dict[str, Any]] = None,
+        calls: int = 1,
+        ops: int = 1,
+        extra: Optional[Dict[str, Any]] = None,
+        unit: str = "s",
+    ) -> Result:
+        """Registra as amostras (tempo por operação, ou `unit`) de uma medição."""
+        result = Result(
+            name=name,
+            params=dict(params or {}),
+            per_op=statistics.median(timings),
+            best=min(timings),
+            mean=statistics.fmean(timings),
+            stdev=statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            calls=calls,
+            ops=ops,
+            repeat=len(timings),
+            extra=dict(extra or {}),
+            unit=unit,
+        )
+        self.results.append(result)
+        self.log(f"  {result.key:<56}{format_value(result.per_op, unit):>12}")
+        return result
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def format_value(value: float, unit: str = "s") -> str:
+    """Formata um resultado na sua unidade (tempo ou bytes)."""
+    if unit != "B":
+        return format_time(value)
+    for suffix, scale in (("GB", 1 << 30), ("MB", 1 << 20), ("KB", 1 << 10)):
+        if value >= scale:
+            return f"{value / scale:.2f} {suffix}"
+    return f"{value:.0f} B"
+
+
+def environment() -> Dict[str, Any]:
+    """Metadados da execução, para saber se duas execuções são comparáveis."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def to_json(results: List[Result], config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "environment": environment(),
+        "config": config,
+        "results": [dict(asdict(result), key=result.key) for result in results],
+    }
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as file:
+        return json.load(file)
+
+
+def save(path: str, data: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(data, file, indent=2, ensure_ascii=False)
+        file.write("\n")
+
+
+@dataclass
+class Comparison:
+    key: str
+    baseline: float
+    current: float
+    threshold: float
+    unit: str = "s"
+
+    @property
+    def change(self) -> float:
+        """Variação relativa do resultado (positiva = mais lento, ou maior)."""
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+    @property
+    def status(self) -> str:
+        if self.change > self.threshold:
+            return "regressão"
+        if self.change < -self.threshold:
+            return "melhora"
+        return "ok"
+
+
+def threshold_for(key: str, default: float, overrides: Dict[str, float]) -> float:
+    """
+    Limite de regressão de um resultado.
+
+    As chaves de `overrides` são prefixos: `service` vale para todos os
+    benchmarks do serviço e `service.get_todo[backend=sqlite` só para uma
+    combinação. O prefixo mais longo vence.
+    """
+    matches = [prefix for prefix in overrides if key.startswith(prefix)]
+    return overrides[max(matches, key=len)] if matches else default
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float,
+    overrides: Optional[Dict[str, float]] = None,
+) -> List[Comparison]:
+    """Compara os resultados presentes nas duas execuções."""
+    # Limites gravados junto da baseline valem se não forem sobrescritos
+    limits = dict(baseline.get("thresholds", {}))
+    limits.update(overrides or {})
+    previous = {item["key"]: item["per_op"] for item in baseline.get("results", [])}
+    return [
+        Comparison(
+            key=item["key"],
+            baseline=previous[item["key"]],
+            current=item["per_op"],
+            threshold=threshold_for(item["key"], threshold, limits),
+            unit=item.get("unit", "s"),
+        )
+        for item in current["results"]
+        if item["key"] in previous
+    ]
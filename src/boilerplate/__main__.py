@@ -0,0 +1,11 @@
+"""
+Execução como módulo: `python -m boilerplate [comando]`.
+
+Sem argumentos, inicia o servidor de produção (`serve`), como no Dockerfile.
+"""
+import sys
+
+from .cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:] or ["serve"]))
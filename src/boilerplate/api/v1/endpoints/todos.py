@@ -1,22 +1,264 @@
 """
 Endpoints para gerenciamento de Tarefas (To-Do).
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, List, Literal, Mapping, Optional, Sequence
+import asyncio
+import logging
+import zlib
 
-from boilerplate.models.todo import TodoCreate, TodoUpdate, TodoInDB
-from boilerplate.services.todo import TodoService
+from boilerplate.config import settings
+from boilerplate.core.cache import pack_response, unpack_response
+from boilerplate.core.changes import ChangeFeed
+from boilerplate.core.serialization import (
+    FastJSONResponse,
+    bulk_payload,
+    dumps,
+    encode_csv,
+    encode_ndjson,
+    encode_todo,
+    encode_todos,
+    todo_payload,
+)
+from boilerplate.core.storage import VersionConflictError
+from boilerplate.models.todo import (
+    TodoBulkDelete,
+    TodoBulkResult,
+    TodoBulkUpdate,
+    TodoCreate,
+    TodoImportError,
+    TodoImportResult,
+    TodoInDB,
+    TodoUpdate,
+)
+from boilerplate.services.todo import (
+    TodoService,
+    get_cache,
+    get_changes,
+    get_storage,
+    item_cache_key,
+)
+from boilerplate.utils.http import (
+    etag_matches,
+    http_date,
+    identity_etag,
+    not_modified_since,
+)
+from boilerplate.utils.pagination import decode_cursor, encode_cursor
+from boilerplate.utils.streaming import gunzip_stream, gzip_stream, iter_lines
 
 router = APIRouter(prefix="/todos", tags=["todos"])
 
-@router.get("/", response_model=List[TodoInDB], summary="Listar tarefas")
-async def read_todos():
+logger = logging.getLogger(__name__)
+
+# As tarefas vêm do serviço já no formato de `TodoInDB`; as respostas são
+# serializadas diretamente (`core.serialization`), sem revalidação. O
+# `response_model` das rotas continua documentando o schema no OpenAPI.
+
+# As respostas podem ser reaproveitadas, mas sempre revalidadas via ETag
+_REVALIDATE = {"Cache-Control": "no-cache"}
+
+
+def _json_response(body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Resposta JSON a partir de bytes já serializados."""
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _not_modified(headers: Dict[str, str]) -> Response:
+    """Resposta 304 com os validadores da representação atual."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+_CONFLICT = "A tarefa foi alterada por outra requisição"
+
+
+def _item_etag_prefix(todo_id: int) -> str:
+    """
+    Início do ETag de uma tarefa: época do armazenamento (se houver) e ID.
+
+    Nos backends em memória, IDs e versões recomeçam a cada reinício; a
+    época evita que outra tarefa receba um ETag já emitido.
+    """
+    epoch = get_storage().epoch
+    return f'"{epoch}.{todo_id}.' if epoch else f'"{todo_id}.'
+
+
+def _item_etag(todo: dict) -> str:
+    """ETag forte de uma tarefa: época, ID e versão (`"[<época>.]<id>.<versão>"`)."""
+    return f'{_item_etag_prefix(todo["id"])}{todo.get("version", 1)}"'
+
+
+def _version_from_if_match(if_match: Optional[str], todo_id: int) -> Optional[int]:
+    """
+    Extrai a versão esperada de um cabeçalho `If-Match`.
+
+    Retorna None se o cabeçalho estiver ausente ou for `*`. ETags que não
+    correspondem a esta tarefa, inclusive os de outra época do armazenamento
+    (de antes de um reinício), resultam em uma versão impossível (0), o que
+    leva ao 412 exigido pela RFC 9110. O ETag de uma resposta comprimida
+    identifica a mesma versão.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    prefix = _item_etag_prefix(todo_id)
+    for candidate in if_match.split(","):
+        candidate = identity_etag(candidate.strip())
+        if candidate.startswith(prefix) and candidate.endswith('"'):
+            version = candidate[len(prefix):-1]
+            if version.isdigit():
+                return int(version)
+    return 0
+
+
+def _item_validators(todo: dict) -> Dict[str, str]:
+    """ETag forte (da versão) e Last-Modified (de `updated_at`) de uma tarefa."""
+    return {
+        "ETag": _item_etag(todo),
+        "Last-Modified": http_date(todo["updated_at"]),
+        **_REVALIDATE,
+    }
+
+
+def _is_fresh(request: Request, headers: Dict[str, str], last_modified: Optional[datetime] = None) -> bool:
+    """Avalia If-None-Match (prioritário) e If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, headers["ETag"])
+    if last_modified is None and "Last-Modified" in headers:
+        last_modified = parsedate_to_datetime(headers["Last-Modified"])
+    if last_modified is not None:
+        return not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    return False
+
+
+def _list_query_key(limit: int, cursor: Optional[str], status_filter: str, search: Optional[str]) -> str:
+    return f"{limit}:{cursor or ''}:{status_filter}:{search or ''}"
+
+
+def _list_etag(version: str, query_key: str) -> str:
+    """ETag de uma listagem: versão da coleção e hash dos parâmetros."""
+    return f'"v{version}.{zlib.crc32(query_key.encode()):08x}"'
+
+
+async def first_page_bootstrap(limit: int) -> bytes:
+    """
+    Primeira página da listagem, sem filtros, para embutir na página `/todos`.
+
+    Retorna o JSON `{"items", "next_cursor", "etag"}`, com o mesmo ETag que
+    `GET /api/v1/todos` informaria: o navegador exibe as tarefas sem outra
+    requisição e revalida a listagem depois sem baixá-la de novo. O JSON vem
+    pronto para um `<script>` (`<`, `>` e `&` escapados) e fica no cache de
+    respostas enquanto a versão da coleção não mudar.
     """
-    Lista todas as tarefas cadastradas.
+    cache = get_cache()
+    generation = await cache.generation()
+    version = await TodoService.get_version()
+    cache_key = f"todos:bootstrap:{version}:{limit}"
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    items, next_id = await TodoService.get_todos_page(limit, None)
+    next_cursor = encode_cursor(next_id) if next_id is not None else None
+    body = b"".join((
+        b'{"items":', encode_todos(items),
+        b',"next_cursor":', dumps(next_cursor),
+        b',"etag":', dumps(_list_etag(version, _list_query_key(limit, None, "all", None))),
+        b"}",
+    ))
+    # Esses caracteres só aparecem dentro de strings JSON
+    body = body.replace(b"<", b"\\u003c").replace(b">", b"\\u003e").replace(b"&", b"\\u0026")
+    await cache.set(cache_key, body, generation)
+    return body
+
+
+@router.get(
+    "/",
+    response_model=List[TodoInDB],
+    responses={
+        304: {"description": "Listagem não modificada desde o ETag informado"}
+    },
+    summary="Listar tarefas"
+)
+async def read_todos(
+    request: Request,
+    limit: int = Query(
+        settings.DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=settings.MAX_PAGE_SIZE,
+        description="Quantidade máxima de tarefas na página",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor opaco retornado pela página anterior"
+    ),
+    search: Optional[str] = Query(
+        None, max_length=200, description="Termos buscados no título e na descrição"
+    ),
+    status_filter: Literal["all", "completed", "pending"] = Query(
+        "all", alias="filter", description="Filtra pelo status de conclusão"
+    ),
+):
+    """
+    Lista as tarefas cadastradas, paginadas por cursor.
+    
+    - **limit**: Tamanho da página
+    - **cursor**: Valor de `X-Next-Cursor` (ou do link `rel="next"`) da página anterior
+    - **search**: Busca por prefixo em título e descrição (todos os termos)
+    - **filter**: `all`, `completed` ou `pending`
+    
+    Quando houver mais tarefas, a resposta inclui os cabeçalhos `Link`
+    (`rel="next"`) e `X-Next-Cursor`.
     
-    Retorna uma lista com todas as tarefas existentes no sistema.
+    A resposta traz um `ETag` derivado da versão da coleção; enviando-o em
+    `If-None-Match`, o cliente recebe `304 Not Modified` enquanto nada mudar.
     """
-    return await TodoService.get_todos()
+    try:
+        after_id = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+    # O ETag depende só da versão da coleção e dos parâmetros da consulta,
+    # então o 304 é respondido sem consultar as tarefas nem serializar nada.
+    query_key = _list_query_key(limit, cursor, status_filter, search)
+    version = await TodoService.get_version()
+    validators = {"ETag": _list_etag(version, query_key), **_REVALIDATE}
+    if _is_fresh(request, validators):
+        return _not_modified(validators)
+
+    # A versão faz parte da chave, como no ETag: uma escrita em qualquer
+    # worker torna as listagens anteriores inalcançáveis, e elas saem do
+    # cache por LRU/TTL. A versão só cresce, então uma página lida durante
+    # uma escrita concorrente fica sob uma chave que não é mais consultada.
+    cache = get_cache()
+    generation = await cache.generation()
+    cache_key = f"todos:list:{version}:{query_key}"
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        body, headers = unpack_response(cached)
+        return _json_response(body, {**headers, **validators})
+
+    completed = None if status_filter == "all" else status_filter == "completed"
+    items, next_id = await TodoService.get_todos_page(
+        limit, after_id, completed=completed, search=search
+    )
+    headers = {}
+    if next_id is not None:
+        next_cursor = encode_cursor(next_id)
+        next_url = request.url.include_query_params(limit=limit, cursor=next_cursor)
+        # Link relativo: a resposta pode ser reaproveitada do cache por outro host
+        headers["Link"] = f'<{next_url.path}?{next_url.query}>; rel="next"'
+        headers["X-Next-Cursor"] = next_cursor
+
+    body = encode_todos(items)
+    await cache.set(cache_key, pack_response(body, headers), generation)
+    return _json_response(body, {**headers, **validators})
 
 @router.post(
     "/", 
@@ -32,39 +274,388 @@ async def create_todo(todo: TodoCreate):
     - **description**: Descrição detalhada (opcional)
     - **completed**: Status de conclusão (padrão: False)
     """
-    return await TodoService.create_todo(todo.model_dump())
+    created = await TodoService.create_todo(todo.model_dump())
+    return FastJSONResponse(todo_payload(created), status_code=status.HTTP_201_CREATED)
+
+def _check_bulk_size(count: int) -> None:
+    """Rejeita lotes maiores que `MAX_BULK_ITEMS`."""
+    if count > settings.MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=413,  # Content Too Large
+            detail=f"Máximo de {settings.MAX_BULK_ITEMS} itens por lote"
+        )
+
+@router.post(
+    "/bulk",
+    response_model=List[TodoBulkResult],
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        413: {"description": "Lote maior que o permitido"}
+    },
+    summary="Criar tarefas em lote"
+)
+async def create_todos_bulk(todos: List[TodoCreate]):
+    """
+    Cria várias tarefas em uma única requisição.
+    
+    Todos os itens são validados de uma vez e gravados em uma única transação,
+    com IDs contíguos na ordem enviada. Se algum item for inválido, nenhum é criado.
+    """
+    _check_bulk_size(len(todos))
+    created = await TodoService.create_todos([todo.model_dump() for todo in todos])
+    return FastJSONResponse(
+        [
+            bulk_payload({"id": todo["id"], "status": status.HTTP_201_CREATED, "todo": todo})
+            for todo in created
+        ],
+        status_code=status.HTTP_201_CREATED,
+    )
+
+@router.patch(
+    "/bulk",
+    response_model=List[TodoBulkResult],
+    responses={
+        413: {"description": "Lote maior que o permitido"}
+    },
+    summary="Atualizar tarefas em lote"
+)
+async def update_todos_bulk(todos: List[TodoBulkUpdate]):
+    """
+    Atualiza várias tarefas em uma única transação.
+    
+    Cada item informa o `id`, os campos a alterar e, opcionalmente, a
+    `expected_version`. O resultado traz um status por item: 200 (atualizada),
+    404 (não encontrada) ou 412 (versão diferente da esperada).
+    """
+    _check_bulk_size(len(todos))
+    updated = await TodoService.update_todos(
+        [todo.model_dump(exclude_unset=True) for todo in todos]
+    )
+    results = []
+    for item, todo in zip(todos, updated):
+        if isinstance(todo, VersionConflictError):
+            results.append({"id": item.id, "status": status.HTTP_412_PRECONDITION_FAILED, "error": _CONFLICT})
+        elif todo is None:
+            results.append({"id": item.id, "status": status.HTTP_404_NOT_FOUND, "error": "Tarefa não encontrada"})
+        else:
+            results.append({"id": item.id, "status": status.HTTP_200_OK, "todo": todo})
+    return FastJSONResponse([bulk_payload(result) for result in results])
+
+@router.delete(
+    "/bulk",
+    response_model=List[TodoBulkResult],
+    responses={
+        413: {"description": "Lote maior que o permitido"}
+    },
+    summary="Remover tarefas em lote"
+)
+async def delete_todos_bulk(body: TodoBulkDelete):
+    """
+    Remove várias tarefas em uma única transação.
+    
+    O resultado traz um status por item: 204 (removida) ou 404 (não encontrada).
+    """
+    _check_bulk_size(len(body.ids))
+    deleted = await TodoService.delete_todos(body.ids)
+    return FastJSONResponse([
+        bulk_payload(
+            {"id": todo_id, "status": status.HTTP_204_NO_CONTENT}
+            if ok
+            else {"id": todo_id, "status": status.HTTP_404_NOT_FOUND, "error": "Tarefa não encontrada"}
+        )
+        for todo_id, ok in zip(body.ids, deleted)
+    ])
+
+_EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def _export_body(chunks: AsyncIterator[List[dict]], export_format: str) -> AsyncIterator[bytes]:
+    """Serializa os lotes de tarefas no formato de exportação."""
+    if export_format == "csv":
+        yield encode_csv((), header=True)
+        async for chunk in chunks:
+            yield encode_csv(chunk)
+    else:
+        async for chunk in chunks:
+            yield encode_ndjson(chunk)
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Tarefas em NDJSON ou CSV (opcionalmente gzip)",
+            "content": {"application/x-ndjson": {}, "text/csv": {}, "application/gzip": {}},
+        }
+    },
+    summary="Exportar tarefas"
+)
+async def export_todos(
+    export_format: Literal["ndjson", "csv"] = Query(
+        "ndjson", alias="format", description="Formato do arquivo exportado"
+    ),
+    gzip: bool = Query(False, description="Comprime o arquivo com gzip"),
+    search: Optional[str] = Query(
+        None, max_length=200, description="Termos buscados no título e na descrição"
+    ),
+    status_filter: Literal["all", "completed", "pending"] = Query(
+        "all", alias="filter", description="Filtra pelo status de conclusão"
+    ),
+):
+    """
+    Exporta as tarefas em streaming, em ordem de ID.
+    
+    - **format**: `ndjson` (uma tarefa JSON por linha) ou `csv` (com cabeçalho)
+    - **gzip**: Entrega o arquivo comprimido (`.gz`)
+    - **search** / **filter**: Mesmos filtros da listagem
+    
+    As tarefas são lidas do armazenamento em lotes de `EXPORT_CHUNK_SIZE` e
+    enviadas à medida que são serializadas, então a memória usada não
+    depende do tamanho da coleção.
+    """
+    completed = None if status_filter == "all" else status_filter == "completed"
+    chunks = TodoService.iter_todos(settings.EXPORT_CHUNK_SIZE, completed=completed, search=search)
+    body = _export_body(chunks, export_format)
+    filename = f"todos.{export_format}"
+    media_type = _EXPORT_MEDIA_TYPES[export_format]
+    if gzip:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+def _import_error(result: TodoImportResult, line: int, errors: Sequence[Mapping[str, Any]]) -> None:
+    """Contabiliza uma linha rejeitada, detalhando até `IMPORT_MAX_ERRORS`."""
+    result.failed += 1
+    if len(result.errors) < settings.IMPORT_MAX_ERRORS:
+        result.errors.append(TodoImportError(line=line, errors=[dict(error) for error in errors]))
+
+
+async def _commit_import_batch(batch: List[dict], result: TodoImportResult) -> None:
+    """Grava um lote da importação em uma transação."""
+    await TodoService.create_todos(batch)
+    result.imported += len(batch)
+    result.batches += 1
+    logger.info(
+        "Importação: %d linhas lidas, %d tarefas importadas, %d rejeitadas",
+        result.lines, result.imported, result.failed,
+    )
+    batch.clear()
+
+@router.post(
+    "/import",
+    response_model=TodoImportResult,
+    responses={
+        400: {"description": "Corpo gzip inválido ou truncado"},
+        415: {"description": "Content-Encoding não suportado"}
+    },
+    summary="Importar tarefas"
+)
+async def import_todos(request: Request):
+    """
+    Importa tarefas de um corpo NDJSON (um `TodoCreate` JSON por linha).
+    
+    O corpo é lido em streaming e pode vir comprimido (`Content-Encoding: gzip`
+    ou `Content-Type: application/gzip`). As linhas válidas são gravadas em
+    transações de `IMPORT_BATCH_SIZE` tarefas; como o corpo só volta a ser lido
+    depois de cada gravação, a memória usada não depende do tamanho do arquivo.
+    
+    Linhas inválidas não interrompem a importação: a resposta traz o total de
+    linhas lidas, importadas e rejeitadas e o erro de cada linha rejeitada
+    (até `IMPORT_MAX_ERRORS`). Linhas em branco são ignoradas.
+    """
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+    content_type = request.headers.get("content-type", "")
+    body: AsyncIterator[bytes] = request.stream()
+    if encoding in ("gzip", "x-gzip") or content_type.startswith("application/gzip"):
+        body = gunzip_stream(body)
+    elif encoding != "identity":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Encoding não suportado: {encoding}"
+        )
+
+    result = TodoImportResult()
+    batch: List[dict] = []
+    try:
+        async for line_no, line in iter_lines(body, settings.IMPORT_MAX_LINE_BYTES):
+            if line is None:
+                result.lines += 1
+                _import_error(result, line_no, [{
+                    "type": "line_too_long",
+                    "loc": [],
+                    "msg": f"Linha maior que {settings.IMPORT_MAX_LINE_BYTES} bytes",
+                }])
+                continue
+            if not line.strip():
+                continue
+            result.lines += 1
+            try:
+                todo = TodoCreate.model_validate_json(line)
+            except ValidationError as exc:
+                _import_error(result, line_no, exc.errors(
+                    include_url=False, include_context=False, include_input=False
+                ))
+                continue
+            batch.append(todo.model_dump())
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await _commit_import_batch(batch, result)
+    except ValueError as exc:
+        # Corpo corrompido: grava o que já foi validado e informa o progresso
+        if batch:
+            await _commit_import_batch(batch, result)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{exc} ({result.imported} tarefas importadas antes do erro)"
+        )
+    if batch:
+        await _commit_import_batch(batch, result)
+    return result
+
+def _sse_event(event: str, event_id: str, data: bytes) -> bytes:
+    """Um evento no formato text/event-stream (o JSON não contém quebras de linha)."""
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode(), event.encode(), data)
+
+
+async def _change_stream(
+    feed: ChangeFeed, position: Optional[int], heartbeat: float, lifetime: float
+) -> AsyncIterator[bytes]:
+    """
+    Eventos do registro de alterações a partir de `position`.
+
+    Sem posição válida, começa por um `reset`: o cliente recarrega a listagem
+    e passa a aplicar os eventos seguintes. Os eventos pendentes são
+    enviados juntos; sem alterações, um comentário mantém a conexão viva.
+    Termina após `lifetime` segundos ou quando o registro é fechado.
+    """
+    yield b"retry: 1000\n\n"
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + lifetime
+    seq = position
+    while not feed.closed:
+        changes = await feed.since(seq) if seq is not None else None
+        if seq is None or changes is None:
+            seq = await feed.last_seq()
+            yield _sse_event("reset", feed.event_id(seq), b"{}")
+        elif changes:
+            seq = changes[-1].seq
+            yield b"".join(
+                _sse_event(change.op, feed.event_id(change.seq), change.data)
+                for change in changes
+            )
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        if not await feed.wait(seq, min(heartbeat, remaining)) and not feed.closed:
+            yield b": heartbeat\n\n"
+
+@router.get(
+    "/changes",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Eventos `created`, `updated`, `deleted` e `reset` (SSE)",
+            "content": {"text/event-stream": {}},
+        }
+    },
+    summary="Acompanhar alterações"
+)
+async def stream_changes(
+    request: Request,
+    last_event_id: Optional[str] = Query(
+        None, description="ID do último evento recebido (alternativa ao cabeçalho Last-Event-ID)"
+    ),
+):
+    """
+    Entrega as alterações das tarefas como Server-Sent Events.
+    
+    Cada evento traz no campo `data` o JSON `{"seq", "op", "id", "todo"}`
+    (`todo` é null nas remoções). Enviando o ID do último evento recebido em
+    `Last-Event-ID` (o `EventSource` do navegador faz isso ao reconectar),
+    o cliente recebe as alterações que perdeu. Se elas não estiverem mais
+    disponíveis, ou na primeira conexão, o fluxo começa com um evento
+    `reset`: o cliente deve recarregar a listagem.
+    
+    A conexão é encerrada após `CHANGES_STREAM_TIMEOUT` segundos, ou no
+    desligamento do servidor, e o cliente reconecta a partir do último evento.
+    """
+    feed = get_changes()
+    position = await feed.parse_event_id(request.headers.get("last-event-id") or last_event_id)
+    return StreamingResponse(
+        _change_stream(
+            feed, position, settings.CHANGES_HEARTBEAT, settings.CHANGES_STREAM_TIMEOUT
+        ),
+        media_type="text/event-stream",
+        # Sem buffer em proxies (nginx) nem em caches intermediários
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get(
     "/{todo_id}", 
     response_model=TodoInDB,
     responses={
+        304: {"description": "Tarefa não modificada"},
         404: {"description": "Tarefa não encontrada"}
     },
     summary="Obter tarefa por ID"
 )
-async def read_todo(todo_id: int):
+async def read_todo(todo_id: int, request: Request):
     """
     Obtém os detalhes de uma tarefa específica.
     
     - **todo_id**: ID da tarefa a ser buscada
+    
+    Suporta requisições condicionais com `If-None-Match` e `If-Modified-Since`.
     """
+    # Chave pela versão da coleção: uma alteração feita por outro worker
+    # não é servida do cache local com o ETag antigo
+    cache = get_cache()
+    generation = await cache.generation()
+    cache_key = item_cache_key(todo_id, await TodoService.get_version())
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        body, headers = unpack_response(cached)
+        if _is_fresh(request, headers):
+            return _not_modified(headers)
+        return _json_response(body, headers)
+
     todo = await TodoService.get_todo(todo_id)
     if not todo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tarefa não encontrada"
         )
-    return todo
+    headers = _item_validators(todo)
+    if _is_fresh(request, headers, todo["updated_at"]):
+        return _not_modified(headers)
+    body = encode_todo(todo)
+    await cache.set(cache_key, pack_response(body, headers), generation)
+    return _json_response(body, headers)
 
 @router.put(
     "/{todo_id}", 
     response_model=TodoInDB,
     responses={
-        404: {"description": "Tarefa não encontrada"}
+        404: {"description": "Tarefa não encontrada"},
+        412: {"description": "A tarefa foi alterada desde a versão informada"}
     },
     summary="Atualizar tarefa"
 )
-async def update_todo(todo_id: int, todo: TodoUpdate):
+async def update_todo(
+    todo_id: int,
+    todo: TodoUpdate,
+    request: Request,
+    expected_version: Optional[int] = Query(
+        None, ge=1, description="Versão esperada da tarefa (alternativa ao If-Match)"
+    ),
+):
     """
     Atualiza uma tarefa existente.
     
@@ -72,14 +663,31 @@ async def update_todo(todo_id: int, todo: TodoUpdate):
     - **title**: Novo título (opcional)
     - **description**: Nova descrição (opcional)
     - **completed**: Novo status de conclusão (opcional)
+    - **expected_version**: Versão esperada (opcional)
+    
+    Para evitar sobrescrever alterações concorrentes, envie o `ETag` obtido na
+    leitura em `If-Match` (ou a versão em `expected_version`). Se a tarefa
+    tiver mudado nesse meio tempo, a resposta é `412 Precondition Failed`.
     """
-    updated_todo = await TodoService.update_todo(todo_id, todo.model_dump(exclude_unset=True))
+    if expected_version is None:
+        expected_version = _version_from_if_match(request.headers.get("if-match"), todo_id)
+    try:
+        updated_todo = await TodoService.update_todo(
+            todo_id, todo.model_dump(exclude_unset=True), expected_version
+        )
+    except VersionConflictError:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=_CONFLICT
+        )
     if not updated_todo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tarefa não encontrada"
         )
-    return updated_todo
+    return FastJSONResponse(
+        todo_payload(updated_todo), headers={"ETag": _item_etag(updated_todo)}
+    )
 
 @router.delete(
     "/{todo_id}",
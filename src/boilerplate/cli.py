@@ -0,0 +1,193 @@
+"""
+Linha de comando do boilerplate (`boilerplate ...`).
+
+Subcomandos:
+    serve     inicia o servidor de produção com vários workers
+    assets    gera os arquivos estáticos versionados e pré-comprimidos
+    loadtest  gera carga na API de tarefas de um servidor em execução
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import List, Optional
+
+from .utils.loadtest import (
+    DEFAULT_MIX,
+    LoadTestConfig,
+    format_report,
+    parse_mix,
+    run_loadtest,
+)
+
+
+def _mix(value: str):
+    try:
+        return parse_mix(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+def _positive(kind):
+    def convert(value: str):
+        number = kind(value)
+        if number <= 0:
+            raise argparse.ArgumentTypeError(f"precisa ser positivo: {value}")
+        return number
+    return convert
+
+
+def _serve(args: argparse.Namespace) -> int:
+    from .config import settings
+    from .core.server import ServerOptions, serve
+
+    options = ServerOptions.from_settings(
+        settings,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        cpu_affinity=args.cpu_affinity,
+        backlog=args.backlog,
+        keepalive=args.keepalive,
+        limit_concurrency=args.limit_concurrency,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        preload=args.preload,
+        access_log=args.access_log,
+    )
+    return serve(options)
+
+
+def _assets(args: argparse.Namespace) -> int:
+    from .config import settings
+    from .core.assets import DEFAULT_BUILD_DIR, STATIC_DIR, build_assets
+
+    output = args.output or settings.STATIC_BUILD_DIR or DEFAULT_BUILD_DIR
+    try:
+        manifest = build_assets(args.source or STATIC_DIR, output)
+    except (OSError, ValueError) as exc:
+        print(f"erro: {exc}", file=sys.stderr)
+        return 1
+    for name, entry in manifest["assets"].items():
+        sizes = "".join(f"  {encoding} {size} B" for encoding, size in entry["encodings"].items())
+        print(f"{name} -> {entry['path']}  {entry['size']} B{sizes}")
+    print(f"{len(manifest['assets'])} arquivo(s) em {output}")
+    return 0
+
+
+def _loadtest(args: argparse.Namespace) -> int:
+    config = LoadTestConfig(
+        url=args.url,
+        duration=args.duration,
+        warmup=args.warmup,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        connections=args.connections,
+        mix=args.mix,
+        seed_todos=args.seed_todos,
+        page_size=args.page_size,
+        timeout=args.timeout,
+        random_seed=args.random_seed,
+    )
+    try:
+        report = asyncio.run(run_loadtest(config))
+    except (OSError, ValueError) as exc:
+        print(f"erro: {exc}", file=sys.stderr)
+        return 1
+    print(json.dumps(report, indent=2, ensure_ascii=False) if args.json else format_report(report))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="boilerplate", description="Boilerplate Python")
+    subparsers = parser.add_subparsers(dest="command", metavar="comando")
+    subparsers.required = True
+
+    serve = subparsers.add_parser(
+        "serve",
+        help="inicia o servidor de produção",
+        description=(
+            "Inicia o servidor com vários workers (uvicorn). Os padrões vêm das "
+            "variáveis SERVER_* (ver .env.example); as opções abaixo as sobrescrevem."
+        ),
+    )
+    serve.add_argument("--host", help="endereço de escuta (SERVER_HOST)")
+    serve.add_argument("--port", type=int, help="porta (SERVER_PORT; 0 = porta livre)")
+    serve.add_argument("-w", "--workers", type=int,
+                       help="quantidade de workers (SERVER_WORKERS; 0 = uma por CPU)")
+    serve.add_argument("--cpu-affinity", action=argparse.BooleanOptionalAction, default=None,
+                       help="fixa cada worker em uma CPU (SERVER_CPU_AFFINITY)")
+    serve.add_argument("--backlog", type=_positive(int), help="fila de conexões (SERVER_BACKLOG)")
+    serve.add_argument("--keepalive", type=_positive(int),
+                       help="segundos de keep-alive ocioso (SERVER_KEEPALIVE_TIMEOUT)")
+    serve.add_argument("--limit-concurrency", type=int,
+                       help="conexões por worker antes de responder 503 (SERVER_LIMIT_CONCURRENCY)")
+    serve.add_argument("--max-requests", type=int,
+                       help="requisições até reiniciar o worker (SERVER_MAX_REQUESTS)")
+    serve.add_argument("--max-requests-jitter", type=int,
+                       help="variação aleatória de --max-requests (SERVER_MAX_REQUESTS_JITTER)")
+    serve.add_argument("--graceful-timeout", type=int,
+                       help="segundos para concluir requisições ao encerrar (SERVER_GRACEFUL_TIMEOUT)")
+    serve.add_argument("--preload", action=argparse.BooleanOptionalAction, default=None,
+                       help="importa a aplicação antes de criar os workers (SERVER_PRELOAD)")
+    serve.add_argument("--access-log", action=argparse.BooleanOptionalAction, default=None,
+                       help="log de cada requisição (SERVER_ACCESS_LOG)")
+    serve.set_defaults(handler=_serve)
+
+    assets = subparsers.add_parser(
+        "assets",
+        help="gera os arquivos estáticos versionados",
+        description=(
+            "Copia os arquivos estáticos com o hash do conteúdo no nome, gera as "
+            "variantes gzip e brotli (extra compression) e o manifest.json usado "
+            "pelos templates. Rode a cada alteração em static/ antes de iniciar o servidor."
+        ),
+    )
+    assets.add_argument("--source", help="diretório dos originais (padrão: static/ do pacote)")
+    assets.add_argument("--output", help="diretório de build (STATIC_BUILD_DIR)")
+    assets.set_defaults(handler=_assets)
+
+    loadtest = subparsers.add_parser(
+        "loadtest",
+        help="gera carga na API de tarefas",
+        description=(
+            "Gera carga em /api/v1/todos com um mix de leituras e escritas e "
+            "reporta vazão e latência (p50/p95/p99/p99.9). Sem --rate, roda em "
+            "laço fechado com --concurrency clientes; com --rate, em laço aberto."
+        ),
+    )
+    loadtest.add_argument("url", nargs="?", default="http://127.0.0.1:8010",
+                          help="URL base do servidor (padrão: %(default)s)")
+    loadtest.add_argument("-d", "--duration", type=_positive(float), default=10.0,
+                          help="duração da medição em segundos (padrão: %(default)s)")
+    loadtest.add_argument("--warmup", type=float, default=2.0,
+                          help="segundos iniciais descartados (padrão: %(default)s)")
+    loadtest.add_argument("-c", "--concurrency", type=_positive(int), default=16,
+                          help="clientes simultâneos no laço fechado (padrão: %(default)s)")
+    loadtest.add_argument("-r", "--rate", type=_positive(float),
+                          help="requisições por segundo (ativa o laço aberto)")
+    loadtest.add_argument("--connections", type=_positive(int),
+                          help="tamanho do pool keep-alive (padrão: --concurrency)")
+    loadtest.add_argument("--mix", type=_mix, default=parse_mix(DEFAULT_MIX),
+                          help="pesos por operação: list, get, create, update, delete "
+                               "(padrão: %s)" % DEFAULT_MIX)
+    loadtest.add_argument("--seed-todos", type=int, default=100,
+                          help="tarefas criadas antes da medição (padrão: %(default)s)")
+    loadtest.add_argument("--page-size", type=_positive(int), default=50,
+                          help="limit das listagens (padrão: %(default)s)")
+    loadtest.add_argument("--timeout", type=_positive(float), default=10.0,
+                          help="timeout por requisição em segundos (padrão: %(default)s)")
+    loadtest.add_argument("--random-seed", type=int, help="semente do sorteio das operações")
+    loadtest.add_argument("--json", action="store_true", help="relatório em JSON")
+    loadtest.set_defaults(handler=_loadtest)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
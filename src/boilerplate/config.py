@@ -2,8 +2,9 @@
 Módulo de configuração da aplicação.
 """
 import os
+import time
 from functools import lru_cache
-from typing import List
+from typing import Dict, List
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
@@ -21,8 +22,21 @@ class Settings(BaseSettings):
     ALLOWED_ORIGINS: List[str] = ["*"]
 
     # Configurações do banco de dados
+    # Use "memory://" para manter as tarefas apenas na memória do processo
     DATABASE_URL: str = "sqlite:///./sql_app.db"
     TEST_DATABASE_URL: str = "sqlite:///./test.db"
+    DATABASE_POOL_SIZE: int = 5  # conexões simultâneas por worker
+    DATABASE_TIMEOUT: float = 5.0  # segundos aguardando locks do banco
+
+    # Durabilidade dos backends em memória (memory:// e memory+compact://):
+    # com WAL_DIR, cada mutação é registrada em um log de escrita e o estado é
+    # restaurado na inicialização. WAL_SYNC: always (fsync antes de responder),
+    # interval (fsync a cada WAL_SYNC_INTERVAL segundos) ou off (sem fsync).
+    # Um snapshot é gravado sempre que o log passa de WAL_SNAPSHOT_BYTES.
+    WAL_DIR: str = ""
+    WAL_SYNC: str = "interval"
+    WAL_SYNC_INTERVAL: float = 0.05
+    WAL_SNAPSHOT_BYTES: int = 64 * 1024 * 1024
 
     # Configurações de segurança
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 dias
@@ -32,8 +46,117 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
+    # Configurações de paginação
+    DEFAULT_PAGE_SIZE: int = 100
+    MAX_PAGE_SIZE: int = 1000
+
+    # Quantidade máxima de itens por requisição nos endpoints em lote
+    MAX_BULK_ITEMS: int = 50000
+
+    # Tarefas lidas do armazenamento por vez na exportação em streaming
+    EXPORT_CHUNK_SIZE: int = 1000
+
+    # Importação NDJSON: tarefas por transação, erros detalhados na resposta
+    # e tamanho máximo de uma linha
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 100
+    IMPORT_MAX_LINE_BYTES: int = 1024 * 1024
+
+    # Compressão das respostas, na ordem de preferência de COMPRESSION_ENCODINGS
+    # (br e zstd exigem o extra compression). Corpos menores que
+    # COMPRESSION_MIN_SIZE bytes seguem sem compressão; streams são
+    # comprimidos bloco a bloco.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ENCODINGS: List[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_MIN_SIZE: int = 500
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1-9
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11
+    COMPRESSION_ZSTD_LEVEL: int = 3  # 1-22
+
+    # Proteção da API contra sobrecarga. Limite de taxa por cliente (token
+    # bucket): RATE_LIMIT_DEFAULT vale para as rotas sem limite próprio em
+    # RATE_LIMITS ("MÉTODO /template": "<quantidade>/<s|m|h>[:<burst>]");
+    # excedido, a resposta é 429 com Retry-After. API_MAX_IN_FLIGHT limita as
+    # requisições simultâneas por worker (0 = sem limite); acima dele, 503.
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_URL: str = "memory://"  # ou redis://host:6379/0 para dividir o limite entre workers
+    RATE_LIMIT_DEFAULT: str = "100/s:200"
+    RATE_LIMITS: Dict[str, str] = {
+        "POST /api/v1/todos/": "10/s:20",
+        "POST /api/v1/todos/bulk": "2/s:5",
+        "POST /api/v1/todos/import": "1/m:3",
+    }
+    RATE_LIMIT_KEY_HEADER: str = ""  # cabeçalho que identifica o cliente (vazio = IP)
+    API_MAX_IN_FLIGHT: int = 0
+    API_IN_FLIGHT_EXEMPT: List[str] = ["GET /api/v1/todos/changes"]  # streams longos
+    API_RETRY_AFTER: float = 1.0  # segundos sugeridos no 503
+
+    # Idempotency-Key nas rotas de escrita: a resposta fica gravada por
+    # IDEMPOTENCY_TTL segundos e é devolvida às repetições com a mesma chave.
+    # Repetições concorrentes esperam a original por até IDEMPOTENCY_WAIT
+    # segundos (depois, 409).
+    IDEMPOTENCY_ENABLED: bool = True
+    # IDEMPOTENCY_URL vazia grava as chaves no SQLite de DATABASE_URL (em
+    # memória com os demais backends); memory:// ou redis://host:6379/0.
+    IDEMPOTENCY_URL: str = ""
+    # Com chaves em memória, `boilerplate serve` só inicia vários workers se
+    # aceito que cada worker tenha as suas (repetições em outro executam de novo)
+    IDEMPOTENCY_PER_WORKER: bool = False
+    IDEMPOTENCY_TTL: int = 86400
+    IDEMPOTENCY_LOCK_TTL: int = 60  # reserva de uma chave em execução
+    IDEMPOTENCY_WAIT: float = 10.0
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000  # chaves mantidas no backend em memória
+    IDEMPOTENCY_ROUTES: List[str] = [
+        "POST /api/v1/todos/",
+        "POST /api/v1/todos/bulk",
+        "PUT /api/v1/todos/{todo_id}",
+    ]
+
     # Configurações de cache
-    CACHE_TTL: int = 300  # 5 minutos
+    CACHE_TTL: int = 300  # 5 minutos (0 desativa o cache de respostas)
+    CACHE_URL: str = "memory://"  # ou redis://host:6379/0 para compartilhar entre workers
+    CACHE_MAX_ENTRIES: int = 1024
+
+    # Registro de alterações (/api/v1/todos/changes): eventos mantidos para
+    # retomada, intervalo dos heartbeats e duração máxima de cada conexão
+    # SSE (o navegador reconecta sozinho a partir do último evento). Com o
+    # SQLite, o registro fica no banco e cada worker o consulta a cada
+    # CHANGES_POLL_INTERVAL segundos pelas alterações dos demais.
+    CHANGES_BUFFER_SIZE: int = 1024
+    CHANGES_HEARTBEAT: float = 15.0
+    CHANGES_STREAM_TIMEOUT: float = 300.0
+    CHANGES_POLL_INTERVAL: float = 0.5
+
+    # Métricas (/metrics). Com vários workers, METRICS_DIR deve apontar para
+    # um diretório compartilhado, esvaziado antes de iniciar os processos.
+    METRICS_ENABLED: bool = True
+    METRICS_DIR: str = ""
+    METRICS_FLUSH_INTERVAL: float = 1.0  # segundos entre gravações por worker
+
+    # Profiling estatístico de requisições (desativado por padrão). Perfila a
+    # fração PROFILING_SAMPLE_RATE das requisições e toda requisição mais
+    # lenta que PROFILING_SLOW_MS; os perfis ficam em PROFILING_DIR.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SLOW_MS: float = 500.0
+    PROFILING_INTERVAL_MS: float = 5.0  # intervalo entre amostras da pilha
+    PROFILING_DIR: str = "./profiles"
+    PROFILING_MAX_PROFILES: int = 50  # perfis mais antigos são removidos
+
+    # Servidor de produção (`boilerplate serve` / `python -m boilerplate`).
+    # SERVER_WORKERS=0 usa a quantidade de CPUs; limites com 0 ficam desativados.
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8010
+    SERVER_WORKERS: int = 0
+    SERVER_CPU_AFFINITY: bool = False  # fixa cada worker em uma CPU (Linux)
+    SERVER_BACKLOG: int = 2048  # conexões pendentes na fila do socket
+    SERVER_KEEPALIVE_TIMEOUT: int = 5  # segundos de conexão ociosa mantida
+    SERVER_LIMIT_CONCURRENCY: int = 0  # conexões/tarefas por worker antes de responder 503
+    SERVER_MAX_REQUESTS: int = 0  # requisições até reiniciar o worker
+    SERVER_MAX_REQUESTS_JITTER: int = 0  # variação aleatória do limite acima
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # segundos para concluir requisições ao encerrar
+    SERVER_PRELOAD: bool = True  # importa a aplicação antes de criar os workers
+    SERVER_ACCESS_LOG: bool = True
 
     # Configurações de e-mail
     SMTP_SERVER: str = "smtp.gmail.com"
@@ -42,6 +165,12 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""
     EMAIL_FROM: str = "noreply@example.com"
 
+    # Arquivos estáticos versionados e pré-comprimidos (`boilerplate assets`).
+    # Vazio = static_build/ dentro do pacote; sem build, servidos de static/.
+    STATIC_BUILD_DIR: str = ""
+    # Código compilado dos templates (vazio = diretório temporário do usuário)
+    TEMPLATE_CACHE_DIR: str = ""
+
     # Configurações de armazenamento
     STORAGE_BACKEND: str = "local"  # ou 's3', 'gcs', etc.
     STORAGE_BUCKET: str = ""
@@ -64,13 +193,11 @@ class Settings(BaseSettings):
     @field_validator("TIMEZONE")
     @classmethod
     def validate_timezone(cls, v: str):
-        import pytz
-        try:
-            pytz.timezone(v)
+        from .core.clock import is_valid_zone
+        if is_valid_zone(v):
             return v
-        except Exception:
-            # Fallback seguro
-            return "America/Sao_Paulo"
+        # Fallback seguro
+        return "America/Sao_Paulo"
 
 
 @lru_cache()
@@ -79,29 +206,22 @@ def get_settings() -> Settings:
     Retorna as configurações da aplicação.
     
     Utiliza lru_cache para evitar a recriação das configurações a cada requisição.
-    Configura o timezone para America/Sao_Paulo.
+    Configura o timezone do processo e o relógio da aplicação (`core.clock`).
     """
-    # Importa os módulos necessários
-    import os
-    import time
-    import pytz
-    from datetime import datetime
-    
+    from .core import clock
+
     # Obtém as configurações
     settings = Settings()
     
-    # Configura o timezone do sistema operacional
-    os.environ["TZ"] = settings.TIMEZONE
-    
-    try:
-        time.tzset()  # Linux/Unix
-    except AttributeError:
-        # Windows não tem time.tzset()
-        pass  # Já configuramos o TZ anteriormente
+    # Configura o timezone do sistema operacional (só se mudou: workers
+    # criados por fork ou com TZ já exportado não precisam reler a base)
+    if os.environ.get("TZ") != settings.TIMEZONE:
+        os.environ["TZ"] = settings.TIMEZONE
+        if hasattr(time, "tzset"):  # Windows não tem time.tzset()
+            time.tzset()
         
-    # Configura o timezone padrão para o pytz
-    timezone = pytz.timezone(settings.TIMEZONE)
-    datetime.now(timezone)  # Aplica o timezone
+    # Resolve o timezone uma única vez para todo o processo
+    clock.configure(settings.TIMEZONE)
     
     return settings
 
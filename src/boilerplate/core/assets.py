@@ -0,0 +1,195 @@
+"""
+Arquivos estáticos versionados e pré-comprimidos.
+
+`boilerplate assets` copia os arquivos de `static/` para o diretório de build
+(`STATIC_BUILD_DIR`) com o hash do conteúdo no nome (`js/todos.3f2a9c1e7b04.js`),
+grava as variantes gzip e brotli (com o extra `compression`) e um
+`manifest.json` que associa cada arquivo ao seu nome versionado.
+
+Os templates referenciam os arquivos por `asset("js/todos.js")`, que resolve o
+nome versionado pelo manifesto. `StaticAssets` serve esses arquivos com a
+variante aceita pelo cliente (`Accept-Encoding`) e `Cache-Control: immutable`:
+o nome muda junto com o conteúdo, então o navegador nunca revalida, e nenhuma
+compressão acontece durante as requisições.
+
+Sem o build (desenvolvimento), `asset` devolve o caminho original e os
+arquivos são servidos de `static/` com revalidação por ETag. O manifesto é
+lido na inicialização: depois de um novo build, reinicie os workers.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from ..utils.http import negotiate_encoding
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - extra opcional
+    brotli = None
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+STATIC_DIR = PACKAGE_DIR / "static"
+DEFAULT_BUILD_DIR = PACKAGE_DIR / "static_build"
+MANIFEST = "manifest.json"
+
+# Os nomes versionados nunca mudam de conteúdo
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Extensões que valem a compressão (texto e ícones sem compressão própria)
+COMPRESSIBLE = frozenset({".css", ".js", ".mjs", ".json", ".map", ".svg", ".html", ".txt", ".xml", ".ico"})
+# Variantes que não economizam ao menos 10% são descartadas
+MAX_RATIO = 0.9
+# Extensão de cada codificação, na ordem de preferência do servidor
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+PathLike = Union[str, os.PathLike]
+
+
+def fingerprint(content: bytes) -> str:
+    """Hash curto do conteúdo usado nos nomes versionados."""
+    return hashlib.sha256(content).hexdigest()[:12]
+
+
+def build_encodings() -> tuple:
+    """Codificações geradas no build (brotli só com o pacote instalado)."""
+    return tuple(encoding for encoding in SUFFIXES if encoding != "br" or brotli is not None)
+
+
+def _compress(encoding: str, content: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content, quality=11)
+    # mtime fixo: o mesmo conteúdo gera sempre os mesmos bytes
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def build_assets(source: PathLike = STATIC_DIR, output: PathLike = DEFAULT_BUILD_DIR) -> dict:
+    """
+    Gera os arquivos versionados, suas variantes comprimidas e o manifesto.
+
+    O diretório de saída é recriado a cada build. Retorna o manifesto:
+    `{"assets": {"js/todos.js": {"path": ..., "size": ..., "encodings": {"br": tamanho}}}}`.
+    """
+    source, output = Path(source).resolve(), Path(output).resolve()
+    if output == source or output in source.parents:
+        raise ValueError(f"O diretório de build não pode conter os originais: {output}")
+    if output.exists():
+        shutil.rmtree(output)
+    output.mkdir(parents=True)
+    encodings = build_encodings()
+    assets = {}
+    for path in sorted(source.rglob("*")):
+        if not path.is_file() or output in path.parents:
+            continue
+        content = path.read_bytes()
+        relative = path.relative_to(source)
+        hashed = relative.with_name(f"{path.stem}.{fingerprint(content)}{path.suffix}")
+        target = output / hashed
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        sizes = {}
+        if path.suffix.lower() in COMPRESSIBLE:
+            for encoding in encodings:
+                data = _compress(encoding, content)
+                if len(data) <= len(content) * MAX_RATIO:
+                    target.with_name(target.name + SUFFIXES[encoding]).write_bytes(data)
+                    sizes[encoding] = len(data)
+        assets[relative.as_posix()] = {
+            "path": hashed.as_posix(),
+            "size": len(content),
+            "encodings": sizes,
+        }
+    manifest = {"assets": assets}
+    # Gravado por último: um build interrompido não deixa manifesto
+    (output / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+@dataclass(frozen=True)
+class _Variant:
+    path: str
+    stat: os.stat_result
+
+
+@dataclass(frozen=True)
+class _Asset:
+    media_type: str
+    # Codificação -> arquivo; None é a versão sem compressão
+    variants: Dict[Optional[str], _Variant]
+
+    @property
+    def encodings(self) -> tuple:
+        return tuple(encoding for encoding in SUFFIXES if encoding in self.variants)
+
+
+class AssetManifest:
+    """Manifesto de um build, com os arquivos já localizados (sem `stat` por requisição)."""
+
+    def __init__(self, directory: Optional[PathLike] = None):
+        self.directory = Path(directory or DEFAULT_BUILD_DIR)
+        self.paths: Dict[str, str] = {}
+        self.files: Dict[str, _Asset] = {}
+        manifest = self.directory / MANIFEST
+        if manifest.is_file():
+            self._load(json.loads(manifest.read_text()))
+
+    def _load(self, manifest: dict) -> None:
+        for name, entry in manifest["assets"].items():
+            hashed = entry["path"]
+            target = self.directory / hashed
+            variants: Dict[Optional[str], _Variant] = {None: _Variant(str(target), os.stat(target))}
+            for encoding in entry.get("encodings", {}):
+                path = f"{target}{SUFFIXES[encoding]}"
+                variants[encoding] = _Variant(path, os.stat(path))
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            self.paths[name] = hashed
+            self.files[hashed] = _Asset(media_type, variants)
+
+    def __bool__(self) -> bool:
+        return bool(self.files)
+
+    def url_path(self, name: str) -> str:
+        """Caminho versionado de um arquivo (ou o original, sem build)."""
+        name = name.lstrip("/")
+        return self.paths.get(name, name)
+
+
+class StaticAssets(StaticFiles):
+    """
+    `StaticFiles` que serve os arquivos versionados do manifesto.
+
+    Os demais caminhos (nomes originais) seguem o comportamento padrão,
+    servidos de `directory`.
+    """
+
+    def __init__(self, *, manifest: AssetManifest, **kwargs):
+        super().__init__(**kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.manifest.files.get(path.replace(os.sep, "/"))
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"), asset.encodings)
+        variant = asset.variants[encoding]
+        headers = {"Cache-Control": IMMUTABLE}
+        if asset.encodings:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        response = FileResponse(
+            variant.path, stat_result=variant.stat, media_type=asset.media_type, headers=headers
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,202 @@
+"""
+Cache de respostas já serializadas.
+
+Os valores são bytes (JSON pronto para envio), de modo que um acerto no
+cache evita tanto a consulta ao armazenamento quanto a serialização.
+
+Dois backends estão disponíveis:
+
+- `MemoryCache` — LRU limitado por quantidade de entradas, por processo
+- `SharedCache` — delega a um cliente compatível com Redis, compartilhado
+  entre workers (requer o extra `redis`)
+
+A invalidação usa um número de geração: toda mutação incrementa a geração,
+e gravações iniciadas antes de uma mutação são descartadas, evitando que
+uma leitura antiga repopule o cache com dados já alterados.
+"""
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    """Contadores de uso do cache."""
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class ResponseCache(ABC):
+    """Interface assíncrona comum aos backends de cache."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Retorna o valor armazenado ou None em caso de ausência/expiração."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, generation: Optional[int] = None) -> None:
+        """
+        Armazena um valor pelo TTL configurado.
+
+        Se `generation` for informada e já tiver sido superada por uma
+        invalidação, o valor é descartado.
+        """
+
+    @abstractmethod
+    async def generation(self) -> int:
+        """Geração atual; deve ser lida antes de consultar o armazenamento."""
+
+    @abstractmethod
+    async def invalidate(self, keys: Iterable[str] = ()) -> None:
+        """Remove as chaves informadas e avança a geração."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove todas as entradas."""
+
+    def info(self) -> Dict[str, Any]:
+        """Estatísticas expostas para dimensionamento do cache."""
+        return {"backend": type(self).__name__, "ttl": self.ttl, **self.stats.as_dict()}
+
+
+class MemoryCache(ResponseCache):
+    """Cache LRU em memória com TTL por entrada."""
+
+    def __init__(self, ttl: int, max_entries: int = 1024):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, generation: Optional[int] = None) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        if generation is not None and generation != self._generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        self.stats.sets += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def invalidate(self, keys: Iterable[str] = ()) -> None:
+        self._generation += 1
+        self.stats.invalidations += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._generation += 1
+
+    def info(self) -> Dict[str, Any]:
+        return {**super().info(), "entries": len(self._entries), "max_entries": self.max_entries}
+
+
+class SharedCache(ResponseCache):
+    """
+    Cache compartilhado entre processos sobre um cliente estilo Redis.
+
+    O cliente precisa oferecer os métodos assíncronos `get`, `set(key, value,
+    ex=...)`, `delete(*keys)` e `incr(key)` (como `redis.asyncio.Redis`).
+    O limite de tamanho fica a cargo da política de memória do servidor
+    (por exemplo, `maxmemory-policy allkeys-lru`).
+    """
+
+    def __init__(self, client: Any, ttl: int, prefix: str = "boilerplate:cache:"):
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+        self._generation_key = f"{prefix}generation"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.client.get(self.prefix + key)
+        if value is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, generation: Optional[int] = None) -> None:
+        if self.ttl <= 0:
+            return
+        if generation is not None and generation != await self.generation():
+            return
+        await self.client.set(self.prefix + key, value, ex=self.ttl)
+        self.stats.sets += 1
+
+    async def generation(self) -> int:
+        value = await self.client.get(self._generation_key)
+        return int(value or 0)
+
+    async def invalidate(self, keys: Iterable[str] = ()) -> None:
+        await self.client.incr(self._generation_key)
+        self.stats.invalidations += 1
+        keys = [self.prefix + key for key in keys]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def clear(self) -> None:
+        # Avançar a geração torna inalcançáveis as chaves de listagem; as
+        # chaves de itens expiram pelo TTL.
+        await self.client.incr(self._generation_key)
+
+
+def pack_response(body: bytes, headers: Optional[Dict[str, str]] = None) -> bytes:
+    """Combina cabeçalhos e corpo em um único valor de cache."""
+    return json.dumps(headers or {}).encode() + b"\n" + body
+
+
+def unpack_response(value: bytes) -> Tuple[bytes, Dict[str, str]]:
+    """Inverso de `pack_response`: retorna `(corpo, cabeçalhos)`."""
+    raw_headers, _, body = value.partition(b"\n")
+    return body, json.loads(raw_headers)
+
+
+def create_cache(url: str, ttl: int, max_entries: int = 1024) -> ResponseCache:
+    """Cria o backend de cache correspondente à URL informada."""
+    if url in ("memory://", "memory:", ""):
+        return MemoryCache(ttl, max_entries=max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as exc:
+            raise ImportError(
+                "O cache compartilhado requer o pacote redis: pip install 'python-boilerplate[redis]'"
+            ) from exc
+        return SharedCache(Redis.from_url(url), ttl)
+    raise ValueError(f"CACHE_URL não suportada: {url}")
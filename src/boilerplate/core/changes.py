@@ -0,0 +1,287 @@
+"""
+Registro ordenado das alterações de tarefas (change feed).
+
+O `TodoService` publica cada criação, atualização e remoção com um número de
+sequência crescente. O endpoint SSE `/api/v1/todos/changes` entrega os
+eventos aos clientes, que retomam a partir do último evento recebido
+(`Last-Event-ID`) sem recarregar a listagem. Ficam disponíveis para retomada
+as últimas `CHANGES_BUFFER_SIZE` alterações.
+
+Os IDs dos eventos têm a forma `<época>-<sequência>`. A época identifica a
+instância do registro, então um ID emitido por outro registro (de antes de
+um reinício, por exemplo) não é confundido com uma posição deste. Se a
+posição pedida não estiver mais disponível, o cliente deve recarregar a
+listagem.
+
+Dois registros estão disponíveis, conforme o armazenamento:
+
+- `MemoryChangeFeed` — buffer circular do processo, usado com os backends
+  em memória (que também são por processo)
+- `StorageChangeFeed` — os eventos são gravados pelo próprio backend, na
+  mesma transação da escrita (tabela `todos_changes` do SQLite), e todos os
+  workers entregam as alterações de todos. Os clientes conectados a um
+  worker são acordados pelas escritas dele na hora e pelas dos demais na
+  consulta seguinte (a cada `poll_interval` segundos).
+
+`close()` encerra os streams abertos (no desligamento do servidor), em vez
+de mantê-los até `CHANGES_STREAM_TIMEOUT`.
+"""
+import asyncio
+import secrets
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import (
+    Any,
+    Deque,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    runtime_checkable,
+)
+
+from .serialization import dumps, todo_payload
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+# Alteração a registrar: operação, ID e tarefa (None nas remoções)
+Entry = Tuple[str, int, Optional[dict]]
+
+
+@dataclass(frozen=True)
+class Change:
+    """Uma alteração publicada, com o JSON do evento já serializado."""
+    seq: int
+    op: str
+    todo_id: int
+    data: bytes
+
+
+def encode_todo(todo: Optional[dict]) -> Optional[bytes]:
+    """JSON da tarefa de um evento, gravado no momento da publicação."""
+    return dumps(todo_payload(todo)) if todo is not None else None
+
+
+def event_data(seq: int, op: str, todo_id: int, todo: Optional[bytes]) -> bytes:
+    """JSON `{"seq", "op", "id", "todo"}` de um evento."""
+    return b'{"seq":%d,"op":%s,"id":%d,"todo":%s}' % (
+        seq, dumps(op), todo_id, todo if todo is not None else b"null"
+    )
+
+
+@runtime_checkable
+class ChangeLog(Protocol):
+    """Backend de armazenamento que grava as alterações junto com as escritas."""
+
+    def enable_changes(self, capacity: int) -> None:
+        """Passa a gravar as alterações, mantendo as últimas `capacity`."""
+
+    async def changes_epoch(self) -> str:
+        """Época do registro, compartilhada por todos os processos."""
+
+    async def last_change(self) -> int:
+        """Sequência da última alteração gravada (0 se nenhuma)."""
+
+    async def changes_since(
+        self, seq: int, limit: int
+    ) -> List[Tuple[int, str, int, Optional[bytes]]]:
+        """Até `limit` alterações posteriores a `seq`: (seq, op, id, JSON da tarefa)."""
+
+
+class ChangeFeed(ABC):
+    """Interface assíncrona comum aos registros de alterações."""
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError("capacity precisa ser positiva")
+        self.capacity = capacity
+        self.epoch = ""
+        self.closed = False
+        self._waiters: Set[asyncio.Future] = set()
+
+    @abstractmethod
+    async def last_seq(self) -> int:
+        """Sequência do último evento publicado (0 se nenhum)."""
+
+    @abstractmethod
+    async def since(self, seq: int) -> Optional[List[Change]]:
+        """
+        Eventos posteriores a `seq`, em ordem.
+
+        Retorna None se algum deles já não está disponível: o cliente ficou
+        para trás e precisa recarregar a listagem.
+        """
+
+    @abstractmethod
+    async def _append(self, entries: List[Entry]) -> None:
+        """Registra as alterações de uma escrita."""
+
+    def event_id(self, seq: int) -> str:
+        """ID SSE de uma posição do registro (após `last_seq` ou `parse_event_id`)."""
+        return f"{self.epoch}-{seq}"
+
+    async def parse_event_id(self, value: Optional[str]) -> Optional[int]:
+        """
+        Posição correspondente a um `Last-Event-ID`.
+
+        Retorna None para IDs ausentes, malformados, de outra época ou
+        posteriores ao último evento.
+        """
+        last = await self.last_seq()
+        if not value:
+            return None
+        epoch, _, seq = value.strip().rpartition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > last:
+            return None
+        return int(seq)
+
+    async def publish(self, op: str, todo_id: int, todo: Optional[dict] = None) -> None:
+        """Registra uma alteração e acorda os clientes aguardando eventos."""
+        await self._append([(op, todo_id, todo)])
+        self._wake()
+
+    async def publish_many(self, op: str, todos: Iterable[dict]) -> None:
+        """Registra uma alteração por tarefa, acordando os clientes uma vez."""
+        await self._append([(op, todo["id"], todo) for todo in todos])
+        self._wake()
+
+    async def publish_deleted(self, todo_ids: Iterable[int]) -> None:
+        """Registra a remoção de várias tarefas."""
+        await self._append([(DELETED, todo_id, None) for todo_id in todo_ids])
+        self._wake()
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Aguarda até `timeout` segundos por um evento posterior a `seq`."""
+        if self.closed:
+            return False
+        if await self.last_seq() > seq:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.add(waiter)
+        self._watch()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._waiters.discard(waiter)
+        return not self.closed and await self.last_seq() > seq
+
+    def close(self) -> None:
+        """
+        Encerra os streams: as esperas terminam e novas retornam na hora.
+
+        Pode ser chamado de um tratador de sinal ou de outra thread.
+        """
+        self.closed = True
+        for waiter in list(self._waiters):
+            waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+
+    @abstractmethod
+    def _watch(self) -> None:
+        """Acompanha alterações feitas fora deste processo enquanto há esperas."""
+
+    def _wake(self) -> None:
+        waiters, self._waiters = self._waiters, set()
+        for waiter in waiters:
+            _resolve(waiter)
+
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class MemoryChangeFeed(ChangeFeed):
+    """Buffer circular das últimas `capacity` alterações do processo."""
+
+    def __init__(self, capacity: int = 1024):
+        super().__init__(capacity)
+        self.epoch = secrets.token_hex(4)
+        self._events: Deque[Change] = deque(maxlen=capacity)
+        self._seq = 0
+
+    async def last_seq(self) -> int:
+        return self._seq
+
+    async def since(self, seq: int) -> Optional[List[Change]]:
+        if seq >= self._seq:
+            return []
+        oldest = self._seq - len(self._events) + 1
+        if seq + 1 < oldest:
+            return None
+        return list(islice(self._events, seq + 1 - oldest, None))
+
+    async def _append(self, entries: List[Entry]) -> None:
+        for op, todo_id, todo in entries:
+            # O JSON é montado na publicação: a tarefa do backend em memória é
+            # o próprio dicionário armazenado e pode mudar depois.
+            self._seq += 1
+            data = event_data(self._seq, op, todo_id, encode_todo(todo))
+            self._events.append(Change(self._seq, op, todo_id, data))
+
+    def _watch(self) -> None:
+        # Só este processo publica: `_wake` já acorda as esperas
+        return
+
+
+class StorageChangeFeed(ChangeFeed):
+    """
+    Registro gravado pelo backend de armazenamento (`ChangeLog`).
+
+    As publicações só acordam os clientes deste processo: o backend já
+    gravou as alterações na transação da escrita.
+    """
+
+    def __init__(self, backend: ChangeLog, capacity: int = 1024, poll_interval: float = 0.5):
+        super().__init__(capacity)
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self._seen = 0
+        self._poller: "Optional[asyncio.Task[None]]" = None
+        backend.enable_changes(capacity)
+
+    async def last_seq(self) -> int:
+        if not self.epoch:
+            self.epoch = await self.backend.changes_epoch()
+        self._seen = max(self._seen, await self.backend.last_change())
+        return self._seen
+
+    async def since(self, seq: int) -> Optional[List[Change]]:
+        if seq >= await self.last_seq():
+            return []
+        rows = await self.backend.changes_since(seq, self.capacity)
+        if not rows or rows[0][0] != seq + 1:
+            return None
+        return [
+            Change(row_seq, op, todo_id, event_data(row_seq, op, todo_id, todo))
+            for row_seq, op, todo_id, todo in rows
+        ]
+
+    async def _append(self, entries: List[Entry]) -> None:
+        pass
+
+    def _watch(self) -> None:
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+
+    async def _poll(self) -> None:
+        # Uma consulta por intervalo para todas as esperas do processo
+        while self._waiters and not self.closed:
+            await asyncio.sleep(self.poll_interval)
+            seen = self._seen
+            if await self.last_seq() > seen:
+                self._wake()
+
+
+def create_change_feed(storage: Any, capacity: int = 1024, poll_interval: float = 0.5) -> ChangeFeed:
+    """Registro compartilhado se o backend o oferecer; senão, em memória."""
+    if isinstance(storage, ChangeLog):
+        return StorageChangeFeed(storage, capacity, poll_interval)
+    return MemoryChangeFeed(capacity)
@@ -0,0 +1,125 @@
+"""
+Relógio e timezone da aplicação.
+
+O timezone configurado (`TIMEZONE`) é resolvido uma única vez com `zoneinfo`
+e reaproveitado em todo o código, em vez de uma busca `pytz.timezone(...)`
+a cada chamada. O relógio padrão é configurado por `get_settings`.
+"""
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> tzinfo:
+    """
+    Retorna o timezone de nome `name` (ex.: "America/Sao_Paulo").
+
+    Lança `ZoneInfoNotFoundError` (ou `ValueError` para nomes malformados)
+    se o timezone não existir.
+    """
+    return ZoneInfo(name)
+
+
+def is_valid_zone(name: str) -> bool:
+    """Verifica se `name` é um timezone conhecido."""
+    try:
+        get_zone(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+class Clock:
+    """Relógio ligado a um timezone fixo."""
+
+    def __init__(self, zone: str):
+        self.name = zone
+        self.tz = get_zone(zone)
+
+    def now(self) -> datetime:
+        """Data/hora atual no timezone do relógio."""
+        return datetime.now(self.tz)
+
+    def localize(self, value: datetime) -> datetime:
+        """
+        Converte `value` para o timezone do relógio.
+
+        Datas sem timezone são consideradas já no horário local.
+        """
+        if value.tzinfo is None:
+            return value.replace(tzinfo=self.tz)
+        if value.tzinfo is self.tz:
+            return value
+        return value.astimezone(self.tz)
+
+    def localize_many(self, values: Iterable[datetime]) -> List[datetime]:
+        """
+        Converte um lote de datas de uma vez.
+
+        Datas já no timezone do relógio são mantidas e cada objeto repetido
+        (ex.: `created_at` e `updated_at` de tarefas criadas juntas) é
+        convertido uma única vez.
+        """
+        tz = self.tz
+        # O original fica guardado junto com a conversão, para que seu id
+        # não seja reutilizado por outro objeto durante o laço
+        converted: Dict[int, Tuple[datetime, datetime]] = {}
+        result: List[datetime] = []
+        for value in values:
+            if value.tzinfo is tz:
+                result.append(value)
+                continue
+            cached = converted.get(id(value))
+            if cached is None:
+                cached = converted[id(value)] = (value, self.localize(value))
+            result.append(cached[1])
+        return result
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(value: datetime) -> int:
+    """
+    Microssegundos desde a época (UTC), para armazenamento compacto.
+
+    Datas sem timezone são consideradas no horário do relógio padrão.
+    """
+    if value.tzinfo is None:
+        value = get_clock().localize(value)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def from_micros(micros: int, tz: tzinfo) -> datetime:
+    """Inverso de `to_micros`, no timezone `tz`."""
+    seconds, fraction = divmod(micros, 1_000_000)
+    return datetime.fromtimestamp(seconds, tz).replace(microsecond=fraction)
+
+
+_clock: Optional[Clock] = None
+
+
+def configure(zone: str) -> Clock:
+    """Define o timezone do relógio padrão."""
+    global _clock
+    _clock = Clock(zone)
+    return _clock
+
+
+def get_clock() -> Clock:
+    """Retorna o relógio padrão, configurando-o a partir das settings se preciso."""
+    if _clock is None:
+        from ..config import get_settings
+
+        get_settings()
+        if _clock is None:  # pragma: no cover - get_settings sempre configura
+            return configure(get_settings().TIMEZONE)
+    return _clock
+
+
+def now() -> datetime:
+    """Data/hora atual no timezone configurado."""
+    return get_clock().now()
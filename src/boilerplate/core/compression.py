@@ -0,0 +1,270 @@
+"""
+Compressão das respostas HTTP (gzip, brotli e zstd).
+
+`CompressionMiddleware` negocia a codificação pelo `Accept-Encoding`, na
+ordem de preferência de `COMPRESSION_ENCODINGS`. brotli e zstd dependem do
+extra `compression` e ficam de fora quando os pacotes não estão instalados.
+
+- Respostas com corpo único menores que `minimum_size` seguem sem compressão
+  (o ganho não paga o custo nem os bytes do cabeçalho).
+- Respostas em streaming (`more_body`) são comprimidas bloco a bloco, com um
+  flush a cada bloco: o cliente recebe cada parte assim que ela é gerada, sem
+  esperar o fim da resposta.
+- Respostas já codificadas (`Content-Encoding`, como os arquivos estáticos
+  pré-comprimidos e a exportação com `gzip=true`), tipos que não comprimem
+  (imagens, `application/gzip`), `text/event-stream` e `Cache-Control:
+  no-transform` passam intactos.
+- O ETag forte de uma resposta comprimida ganha o sufixo da codificação
+  (`"abc-gzip"`), como a RFC 9110 exige para representações distintas. Um
+  `304` mantém o sufixo quando o cliente revalidou a versão comprimida.
+
+`CompressedVariants` guarda as versões comprimidas de um corpo que não muda
+(como o esquema OpenAPI), geradas uma vez por codificação.
+"""
+import zlib
+from typing import Callable, Dict, Optional, Protocol, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.http import coded_etag, negotiate_encoding
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - extra opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - extra opcional
+    zstandard = None
+
+# Níveis padrão: compressão rápida, adequada a respostas geradas por requisição
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+
+_COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+)
+# Tipos que não podem ser retidos nem comprimidos em blocos com proveito
+_EXCLUDED_TYPES = ("text/event-stream",)
+
+
+class _Compressor(Protocol):
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        """Comprime um bloco; `finish` encerra o fluxo."""
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if finish else self._compressor.flush())
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        out = self._compressor.compress(data)
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if finish else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return out + self._compressor.flush(mode)
+
+
+# Só as codificações disponíveis neste ambiente, pelo nível de compressão
+_COMPRESSORS: Dict[str, Callable[[int], _Compressor]] = {"gzip": _GzipCompressor}
+if zstandard is not None:
+    _COMPRESSORS["zstd"] = _ZstdCompressor
+if brotli is not None:
+    _COMPRESSORS["br"] = _BrotliCompressor
+
+
+def available_encodings(preferred: Sequence[str] = tuple(DEFAULT_LEVELS)) -> Tuple[str, ...]:
+    """Codificações de `preferred` suportadas neste ambiente, na mesma ordem."""
+    return tuple(encoding for encoding in preferred if encoding in _COMPRESSORS)
+
+
+def compress(encoding: str, data: bytes, level: Optional[int] = None) -> bytes:
+    """Comprime um corpo completo."""
+    compressor = _COMPRESSORS[encoding](DEFAULT_LEVELS[encoding] if level is None else level)
+    return compressor.compress(data, finish=True)
+
+
+def is_compressible(headers: Headers) -> bool:
+    """Verifica se uma resposta, pelos cabeçalhos, deve ser comprimida."""
+    if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+        return False
+    content_type = headers.get("content-type", "").lower()
+    if content_type.startswith(_EXCLUDED_TYPES):
+        return False
+    return content_type.startswith(_COMPRESSIBLE_TYPES) or content_type.split(";")[0].endswith(
+        ("+json", "+xml")
+    )
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime as respostas conforme o `Accept-Encoding`."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        encodings: Sequence[str] = tuple(DEFAULT_LEVELS),
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings)
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get("accept-encoding"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(
+            send, encoding, self.levels[encoding], self.minimum_size, headers.get("if-none-match", "")
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    """Estado da compressão de uma resposta."""
+
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int, if_none_match: str = ""):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.if_none_match = if_none_match
+        self._start: Optional[Message] = None
+        self._passthrough = False
+        self._compressor: Optional[_Compressor] = None
+
+    async def send(self, message: Message) -> None:
+        if self._passthrough:
+            await self._send(message)
+            return
+        kind = message["type"]
+        if kind == "http.response.start":
+            # Retido até o primeiro bloco do corpo, que decide o modo
+            if message["status"] == 304:
+                self._tag_not_modified(message)
+            if message["status"] in (204, 304) or not is_compressible(Headers(raw=message["headers"])):
+                self._passthrough = True
+                await self._send(message)
+            else:
+                self._start = message
+            return
+        if kind != "http.response.body":
+            # Extensões (`http.response.debug`, enviada antes do início pelos
+            # templates, ou `pathsend`) seguem como estão
+            if self._start is None:
+                await self._send(message)
+            else:
+                await self._pass(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compressor is None:
+            if not more_body and len(body) < self.minimum_size:
+                await self._pass(message)
+                return
+            assert self._start is not None
+            self._compressor = _COMPRESSORS[self.encoding](self.level)
+            headers = MutableHeaders(scope=self._start)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["ETag"] = coded_etag(headers["ETag"], self.encoding)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self._compressor.compress(body, finish=True)
+                headers["Content-Length"] = str(len(body))
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self._start)
+
+        if not body and more_body:
+            return
+        data = self._compressor.compress(body, finish=not more_body)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _tag_not_modified(self, message: Message) -> None:
+        """Usa no `304` o ETag da versão comprimida se foi ela a revalidada."""
+        headers = MutableHeaders(scope=message)
+        etag = headers.get("etag")
+        if etag is None:
+            return
+        coded = coded_etag(etag, self.encoding)
+        if coded != etag and coded in self.if_none_match:
+            headers["ETag"] = coded
+
+    async def _pass(self, message: Message) -> None:
+        assert self._start is not None
+        self._passthrough = True
+        await self._send(self._start)
+        await self._send(message)
+
+
+class CompressedVariants:
+    """
+    Um corpo fixo e suas versões comprimidas, geradas no primeiro uso.
+
+    A resposta já sai com `Content-Encoding`, então o middleware não a
+    comprime de novo.
+    """
+
+    def __init__(
+        self,
+        body: bytes,
+        media_type: str,
+        encodings: Sequence[str] = tuple(DEFAULT_LEVELS),
+        levels: Optional[Dict[str, int]] = None,
+        minimum_size: int = 500,
+    ):
+        self.body = body
+        self.media_type = media_type
+        self.encodings = available_encodings(encodings) if len(body) >= minimum_size else ()
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+        self._variants: Dict[str, bytes] = {}
+
+    def get(self, encoding: str) -> bytes:
+        """Corpo comprimido com `encoding` (calculado uma única vez)."""
+        data = self._variants.get(encoding)
+        if data is None:
+            data = self._variants[encoding] = compress(encoding, self.body, self.levels[encoding])
+        return data
+
+    def response(self, accept_encoding: Optional[str]) -> Response:
+        """Resposta com a variante aceita pelo cliente."""
+        encoding = negotiate_encoding(accept_encoding, self.encodings)
+        headers = {"Vary": "Accept-Encoding"} if self.encodings else {}
+        if encoding is None:
+            return Response(self.body, media_type=self.media_type, headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(self.get(encoding), media_type=self.media_type, headers=headers)
@@ -0,0 +1,438 @@
+"""
+Requisições idempotentes com o cabeçalho `Idempotency-Key`.
+
+Um cliente que repete um `POST`/`PUT` após um timeout envia a mesma chave;
+`IdempotencyMiddleware` executa a requisição uma única vez e devolve a
+resposta gravada às repetições (com `Idempotent-Replayed: true`).
+
+- A chave é registrada com a impressão digital da requisição (método,
+  caminho e hash do corpo). A mesma chave com outra requisição recebe 422.
+- Repetições que chegam enquanto a original ainda executa esperam por ela:
+  no mesmo worker, por um evento; entre workers (backend compartilhado),
+  consultando o registro. Esgotada a espera, a resposta é 409 com
+  `Retry-After`.
+- Uma resposta de sucesso maior que `max_response_bytes` (como a de um lote
+  grande) não é gravada, mas a chave fica registrada como executada: as
+  repetições recebem 409, sem executar de novo.
+- Só respostas de sucesso (status < 400) são gravadas. Erros (como 422 de
+  validação ou 412 de `If-Match`, que não alteram nada) e exceções liberam
+  a chave: a próxima tentativa, corrigida ou não, executa de novo.
+- Se o cliente desconectar antes de enviar o corpo inteiro, a chave não é
+  reservada e a requisição não executa.
+
+Três backends estão disponíveis:
+
+- `MemoryIdempotencyStore` — por processo, limitado por quantidade de chaves
+  (com vários workers, o servidor só inicia com `IDEMPOTENCY_PER_WORKER`)
+- `StorageIdempotencyStore` — gravado pelo backend de armazenamento (tabela
+  `idempotency_keys` do SQLite), compartilhado pelos workers que usam o
+  mesmo banco; é o padrão com `IDEMPOTENCY_URL` vazia
+- `SharedIdempotencyStore` — delega a um cliente compatível com Redis,
+  compartilhado entre workers (requer o extra `redis`)
+"""
+import asyncio
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    runtime_checkable,
+)
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.http import compile_route
+from .serialization import dumps
+
+HEADER = "idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# Cabeçalhos da resposta que não fazem sentido em uma repetição
+_SKIPPED_HEADERS = frozenset({"content-length", "date", "server", "set-cookie"})
+
+
+@dataclass
+class IdempotencyRecord:
+    """
+    Registro de uma chave: em andamento (`status` None) ou concluída.
+
+    Concluída sem `replayable`, a requisição executou mas a resposta não foi
+    gravada (grande demais para repetir).
+    """
+    fingerprint: str
+    status: Optional[int] = None
+    headers: List[Tuple[str, str]] = field(default_factory=list)
+    body: bytes = b""
+    replayable: bool = True
+
+    @property
+    def completed(self) -> bool:
+        return self.status is not None
+
+    def pack(self) -> bytes:
+        meta = {
+            "fingerprint": self.fingerprint,
+            "status": self.status,
+            "headers": self.headers,
+            "replayable": self.replayable,
+        }
+        return json.dumps(meta).encode() + b"\n" + self.body
+
+    @classmethod
+    def unpack(cls, value: bytes) -> "IdempotencyRecord":
+        meta, _, body = value.partition(b"\n")
+        meta = json.loads(meta)
+        headers = [tuple(pair) for pair in meta["headers"]]
+        return cls(meta["fingerprint"], meta["status"], headers, body, meta.get("replayable", True))
+
+
+class IdempotencyStore(ABC):
+    """Interface assíncrona comum aos backends de idempotência."""
+
+    def __init__(self, ttl: int, lock_ttl: int = 60):
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    @abstractmethod
+    async def reserve(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        """
+        Registra a chave como em andamento, se ainda não existir.
+
+        Retorna None quando a reserva foi feita (quem chamou executa a
+        requisição) ou o registro existente. A reserva expira em `lock_ttl`
+        segundos, liberando a chave se o processo cair no meio da execução.
+        """
+
+    @abstractmethod
+    async def complete(self, key: str, record: IdempotencyRecord) -> None:
+        """Grava a resposta de uma chave reservada pelo TTL configurado."""
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Libera uma chave reservada sem gravar resposta."""
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+    Registros em memória com TTL, limitados a `max_entries` (LRU).
+
+    Reservas em andamento não são descartadas pelo limite: sem elas, uma
+    repetição executaria de novo enquanto a original ainda roda.
+    """
+
+    def __init__(self, ttl: int, lock_ttl: int = 60, max_entries: int = 10000):
+        super().__init__(ttl, lock_ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, IdempotencyRecord]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        self._store(key, now + self.lock_ttl, IdempotencyRecord(fingerprint))
+        return None
+
+    async def complete(self, key: str, record: IdempotencyRecord) -> None:
+        self._store(key, time.monotonic() + self.ttl, record)
+
+    async def release(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def _store(self, key: str, expires_at: float, record: IdempotencyRecord) -> None:
+        self._entries[key] = (expires_at, record)
+        self._entries.move_to_end(key)
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        now = time.monotonic()
+        evicted: List[str] = []
+        for old_key, (old_expires_at, old_record) in self._entries.items():
+            if len(evicted) == excess:
+                break
+            if old_record.completed or old_expires_at <= now:
+                evicted.append(old_key)
+        for old_key in evicted:
+            del self._entries[old_key]
+
+
+@runtime_checkable
+class IdempotencyLog(Protocol):
+    """Backend de armazenamento que grava as chaves de idempotência."""
+
+    async def idempotency_reserve(
+        self, key: str, record: bytes, expires_at: float, now: float
+    ) -> Optional[bytes]:
+        """Grava `record` se a chave não existir ou tiver expirado; senão, retorna o existente."""
+
+    async def idempotency_store(self, key: str, record: bytes, expires_at: float, now: float) -> None:
+        """Grava `record` na chave e descarta as chaves expiradas."""
+
+    async def idempotency_release(self, key: str) -> None:
+        """Remove a chave."""
+
+
+class StorageIdempotencyStore(IdempotencyStore):
+    """
+    Registros gravados pelo backend de armazenamento (`IdempotencyLog`).
+
+    As expirações usam o relógio do sistema, comum aos processos que
+    compartilham o banco.
+    """
+
+    def __init__(self, backend: IdempotencyLog, ttl: int, lock_ttl: int = 60):
+        super().__init__(ttl, lock_ttl)
+        self.backend = backend
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        now = time.time()
+        existing = await self.backend.idempotency_reserve(
+            key, IdempotencyRecord(fingerprint).pack(), now + self.lock_ttl, now
+        )
+        return IdempotencyRecord.unpack(existing) if existing is not None else None
+
+    async def complete(self, key: str, record: IdempotencyRecord) -> None:
+        now = time.time()
+        await self.backend.idempotency_store(key, record.pack(), now + self.ttl, now)
+
+    async def release(self, key: str) -> None:
+        await self.backend.idempotency_release(key)
+
+
+class SharedIdempotencyStore(IdempotencyStore):
+    """
+    Registros compartilhados entre processos sobre um cliente estilo Redis.
+
+    O cliente precisa oferecer os métodos assíncronos `get`, `set(key, value,
+    ex=..., nx=...)` e `delete(*keys)` (como `redis.asyncio.Redis`).
+    """
+
+    def __init__(self, client: Any, ttl: int, lock_ttl: int = 60, prefix: str = "boilerplate:idempotency:"):
+        super().__init__(ttl, lock_ttl)
+        self.client = client
+        self.prefix = prefix
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        key = self.prefix + key
+        value = IdempotencyRecord(fingerprint).pack()
+        while True:
+            if await self.client.set(key, value, ex=self.lock_ttl, nx=True):
+                return None
+            existing = await self.client.get(key)
+            # Expirada entre as duas chamadas: tenta reservar de novo
+            if existing is not None:
+                return IdempotencyRecord.unpack(existing)
+
+    async def complete(self, key: str, record: IdempotencyRecord) -> None:
+        await self.client.set(self.prefix + key, record.pack(), ex=self.ttl)
+
+    async def release(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+
+def create_idempotency_store(
+    url: str, ttl: int, lock_ttl: int = 60, max_entries: int = 10000, storage: Any = None
+) -> IdempotencyStore:
+    """
+    Cria o backend de idempotência correspondente à URL informada.
+
+    Com a URL vazia, as chaves ficam no armazenamento das tarefas (`storage`)
+    se ele as oferecer; senão, em memória.
+    """
+    if not url and isinstance(storage, IdempotencyLog):
+        return StorageIdempotencyStore(storage, ttl, lock_ttl)
+    if url in ("memory://", "memory:", ""):
+        return MemoryIdempotencyStore(ttl, lock_ttl, max_entries=max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as exc:
+            raise ImportError(
+                "A idempotência compartilhada requer o pacote redis: pip install 'python-boilerplate[redis]'"
+            ) from exc
+        return SharedIdempotencyStore(Redis.from_url(url), ttl, lock_ttl)
+    raise ValueError(f"IDEMPOTENCY_URL não suportada: {url}")
+
+
+def fingerprint(method: str, path: str, query: bytes, body: bytes) -> str:
+    """Impressão digital de uma requisição: método, caminho, query e corpo."""
+    digest = hashlib.sha256(f"{method} {path}?".encode() + query + b"\n" + body)
+    return digest.hexdigest()
+
+
+def _error(status: int, detail: str, retry_after: Optional[int] = None) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    headers = [("content-type", "application/json")]
+    if retry_after is not None:
+        headers.append(("retry-after", str(retry_after)))
+    return status, headers, dumps({"detail": detail})
+
+
+class IdempotencyMiddleware:
+    """
+    Middleware ASGI que aplica o `Idempotency-Key` às rotas em `routes`
+    (`"MÉTODO /template"`). Requisições sem o cabeçalho seguem normalmente.
+
+    O corpo da requisição é lido por inteiro antes da execução, para compor
+    a impressão digital; a resposta é gravada sem compressão (a repetição é
+    comprimida conforme o seu próprio `Accept-Encoding`).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: IdempotencyStore,
+        routes: Iterable[str] = (),
+        wait: float = 10.0,
+        poll_interval: float = 0.05,
+        max_response_bytes: int = 1024 * 1024,
+    ):
+        self.app = app
+        self.store = store
+        self.routes = [compile_route(route) for route in routes]
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self.max_response_bytes = max_response_bytes
+        # Chaves em execução neste worker: as repetições esperam o evento
+        self._running: Dict[str, asyncio.Event] = {}
+
+    def _applies(self, scope: Scope) -> bool:
+        method, path = scope["method"], scope["path"]
+        return any(m == method and regex.match(path) for m, regex in self.routes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+        key = Headers(scope=scope).get(HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await self._send(send, _error(400, f"Idempotency-Key deve ter de 1 a {MAX_KEY_LENGTH} caracteres"))
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            # Cliente desconectado: não há a quem responder
+            return
+        digest = fingerprint(scope["method"], scope["path"], scope.get("query_string", b""), body)
+        deadline = time.monotonic() + self.wait
+        while True:
+            running = self._running.get(key)
+            if running is not None:
+                try:
+                    await asyncio.wait_for(running.wait(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass
+            record = await self.store.reserve(key, digest)
+            if record is None:
+                break
+            if record.fingerprint != digest:
+                await self._send(send, _error(422, "Idempotency-Key já usada com outra requisição"))
+                return
+            if record.status is not None and not record.replayable:
+                await self._send(send, _error(409, "Requisição com esta Idempotency-Key já executada"))
+                return
+            if record.status is not None:
+                headers = record.headers + [(REPLAYED_HEADER.lower(), "true")]
+                await self._send(send, (record.status, headers, record.body))
+                return
+            if time.monotonic() >= deadline:
+                await self._send(send, _error(409, "Requisição com esta Idempotency-Key em andamento", 1))
+                return
+            if running is None:
+                # Em execução em outro worker: consulta o registro de novo
+                await asyncio.sleep(self.poll_interval)
+
+        event = self._running[key] = asyncio.Event()
+        try:
+            await self._execute(scope, body, receive, send, key, digest)
+        finally:
+            del self._running[key]
+            event.set()
+
+    async def _execute(
+        self, scope: Scope, body: bytes, receive: Receive, send: Send, key: str, digest: str
+    ) -> None:
+        record = IdempotencyRecord(digest)
+        chunks: List[bytes] = []
+        size = 0
+        storable = True
+        replayed = False
+
+        async def receive_wrapper() -> Message:
+            # O corpo já lido é entregue de uma vez; depois, a espera pela
+            # desconexão segue com o `receive` original
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal size, storable
+            if message["type"] == "http.response.start":
+                record.status = message["status"]
+                record.headers = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                    if name.decode("latin-1").lower() not in _SKIPPED_HEADERS
+                ]
+            elif message["type"] == "http.response.body" and storable:
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size > self.max_response_bytes:
+                    storable = False
+                    chunks.clear()
+                else:
+                    chunks.append(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except BaseException:
+            await self.store.release(key)
+            raise
+        if record.status is None or record.status >= 400:
+            await self.store.release(key)
+            return
+        if storable:
+            record.body = b"".join(chunks)
+        else:
+            # Executada, mas sem resposta para repetir: a chave fica registrada
+            record.headers, record.replayable = [], False
+        await self.store.complete(key, record)
+
+    @staticmethod
+    async def _send(send: Send, response: Tuple[int, List[Tuple[str, str]], bytes]) -> None:
+        status, headers, body = response
+        raw = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        raw.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": raw})
+        await send({"type": "http.response.body", "body": body})
+
+
+async def _read_body(receive: Receive) -> Optional[bytes]:
+    """Corpo completo da requisição, ou None se o cliente desconectar antes."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
@@ -0,0 +1,565 @@
+"""
+Métricas no formato de exposição do Prometheus.
+
+As métricas são mantidas em estruturas simples do processo, alteradas
+apenas pelo event loop, o que dispensa locks. Com vários workers, cada
+processo grava periodicamente um instantâneo em `METRICS_DIR` e a rota
+`/metrics` agrega os instantâneos de todos eles:
+
+- contadores e histogramas são somados, inclusive os de workers que já
+  terminaram (consolidados em um único arquivo, para que os totais
+  continuem crescentes);
+- gauges consideram apenas processos vivos, somados (`mode="sum"`) ou
+  separados pelo rótulo `pid` (`mode="pid"`).
+
+O diretório deve ser esvaziado antes de iniciar os workers.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from starlette.routing import Match, compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+if sys.platform != "win32":
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[str, ...]
+
+# Limites (em segundos) dos histogramas de latência
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites (em bytes) do histograma de tamanho das respostas
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    """Base das métricas: nome, ajuda e nomes dos rótulos."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, Any] = {}
+
+    def samples(self) -> List[Tuple[Labels, Any]]:
+        return list(self.values.items())
+
+    def clear(self) -> None:
+        self.values.clear()
+
+
+class Counter(Metric):
+    """Contador crescente."""
+
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        values = self.values
+        values[labels] = values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Valor que sobe e desce; `mode` define a agregação entre processos."""
+
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), mode: str = "sum"
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.mode = mode
+        self.collector: Optional[Callable[[], Iterable[Tuple[Labels, float]]]] = None
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        values = self.values
+        values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: Labels, value: float) -> None:
+        self.values[labels] = value
+
+    def samples(self) -> List[Tuple[Labels, Any]]:
+        if self.collector is not None:
+            # Valores lidos no momento da coleta (ex.: estatísticas do backend)
+            self.values = dict(self.collector())
+        return super().samples()
+
+
+class Histogram(Metric):
+    """
+    Histograma com limites fixos.
+
+    Cada série guarda as contagens por faixa (não acumuladas), a soma e o
+    total de observações: `[c0, c1, ..., cN, soma, total]`.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class Registry:
+    """Conjunto de métricas de um processo."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), mode: str = "sum"
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, mode))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def clear(self) -> None:
+        for metric in self.metrics.values():
+            metric.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Instantâneo serializável em JSON das séries deste processo."""
+        return {
+            "pid": os.getpid(),
+            "metrics": {
+                name: [[list(labels), value] for labels, value in metric.samples()]
+                for name, metric in self.metrics.items()
+            },
+        }
+
+    def render(self, snapshots: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Gera o texto de exposição.
+
+        Sem `snapshots`, usa apenas as séries deste processo; caso contrário,
+        agrega os instantâneos informados (um por processo).
+        """
+        if snapshots is None:
+            snapshots = [self.snapshot()]
+        lines: List[str] = []
+        for name, metric in self.metrics.items():
+            merged = _merge(metric, snapshots)
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            labelnames = metric.labelnames
+            if isinstance(metric, Gauge) and metric.mode == "pid":
+                labelnames = labelnames + ("pid",)
+            for labels in sorted(merged):
+                value = merged[labels]
+                pairs = list(zip(labelnames, labels))
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float("inf"),), value):
+                        cumulative += count
+                        bucket = _labels(pairs + [("le", _number(bound))])
+                        lines.append(f"{name}_bucket{bucket} {_number(cumulative)}")
+                    lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-2])}")
+                    lines.append(f"{name}_count{_labels(pairs)} {_number(value[-1])}")
+                else:
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge(metric: Metric, snapshots: List[Dict[str, Any]]) -> Dict[Labels, Any]:
+    merged: Dict[Labels, Any] = {}
+    is_gauge = isinstance(metric, Gauge)
+    by_pid = isinstance(metric, Gauge) and metric.mode == "pid"
+    for snapshot in snapshots:
+        if is_gauge and not snapshot.get("alive", True):
+            continue
+        for labels, value in snapshot["metrics"].get(metric.name, ()):
+            labels = tuple(labels)
+            if by_pid:
+                labels += (str(snapshot["pid"]),)
+            current = merged.get(labels)
+            if current is None:
+                merged[labels] = list(value) if isinstance(value, list) else value
+            elif isinstance(current, list):
+                for pos, item in enumerate(value):
+                    current[pos] += item
+            else:
+                merged[labels] = current + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: List[Tuple[str, Any]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value)
+
+
+class MultiProcessStore:
+    """
+    Instantâneos por processo em um diretório compartilhado.
+
+    O instantâneo é tirado no event loop (as métricas não têm locks), mas a
+    gravação do arquivo roda em uma thread, fora do caminho da requisição.
+    Os arquivos de processos encerrados são somados a `metrics-retired.json`
+    e removidos na coleta, para que workers reciclados não se acumulem.
+    """
+
+    RETIRED = "metrics-retired.json"
+
+    def __init__(self, directory: str, interval: float = 1.0):
+        self.directory = directory
+        self.interval = interval
+        self._last_flush = 0.0
+        self._flushing = False
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def write(self, snapshot: Dict[str, Any]) -> None:
+        """Grava um instantâneo deste processo (bloqueante)."""
+        _write_json(self._path(os.getpid()), snapshot)
+
+    def flush(self, registry: Registry) -> None:
+        """Grava o instantâneo deste processo (bloqueante)."""
+        self._last_flush = time.monotonic()
+        self.write(registry.snapshot())
+
+    def maybe_flush(self, registry: Registry) -> None:
+        """
+        Agenda a gravação do instantâneo em uma thread se o intervalo desde a
+        última gravação passou e não há outra em andamento.
+        """
+        now = time.monotonic()
+        if self._flushing or now - self._last_flush < self.interval:
+            return
+        self._last_flush = now
+        self._flushing = True
+        future = asyncio.get_running_loop().run_in_executor(None, self.write, registry.snapshot())
+        future.add_done_callback(self._flushed)
+
+    def _flushed(self, future: "asyncio.Future[None]") -> None:
+        self._flushing = False
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("Falha ao gravar as métricas em %s", self.directory, exc_info=future.exception())
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """
+        Lê os instantâneos dos processos vivos e o acumulado dos encerrados
+        (bloqueante).
+        """
+        retired_path = os.path.join(self.directory, self.RETIRED)
+        snapshots = []
+        dead = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "metrics-*.json"))):
+            if path == retired_path:
+                continue
+            snapshot = _read_json(path)
+            if snapshot is None:
+                continue
+            if _pid_alive(snapshot.get("pid", 0)):
+                snapshot["alive"] = True
+                snapshots.append(snapshot)
+            else:
+                dead.append(path)
+        retired = self._retire(dead) if dead else _read_json(retired_path)
+        if retired is not None:
+            retired["alive"] = False
+            snapshots.append(retired)
+        return snapshots
+
+    def _retire(self, paths: List[str]) -> Dict[str, Any]:
+        """Soma os instantâneos de processos encerrados ao acumulado e os remove."""
+        retired_path = os.path.join(self.directory, self.RETIRED)
+        with open(os.path.join(self.directory, "metrics.lock"), "a") as lock:
+            if sys.platform != "win32":
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            retired = _read_json(retired_path) or {"pid": 0, "metrics": {}}
+            for path in paths:
+                # Outro worker pode ter consolidado o arquivo enquanto
+                # esperávamos o lock
+                snapshot = _read_json(path)
+                if snapshot is not None:
+                    _accumulate(retired["metrics"], snapshot["metrics"])
+            _write_json(retired_path, retired)
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return retired
+
+
+def _accumulate(total: Dict[str, List[Any]], metrics: Dict[str, List[Any]]) -> None:
+    """Soma séries de um instantâneo a outro (gauges incluídos, mas ignorados na agregação)."""
+    for name, series in metrics.items():
+        merged = {tuple(labels): value for labels, value in total.get(name, ())}
+        for labels, value in series:
+            key = tuple(labels)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = value
+            elif isinstance(current, list):
+                merged[key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged[key] = current + value
+        total[name] = [[list(labels), value] for labels, value in merged.items()]
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None  # arquivo removido, sendo substituído ou corrompido
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    """Grava com troca atômica do arquivo."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as file:
+        json.dump(data, file, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Registro e métricas padrão da aplicação
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "Requisições HTTP atendidas.", ("method", "route", "status")
+)
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP.", ("method", "route")
+)
+http_response_size = registry.histogram(
+    "http_response_size_bytes", "Tamanho do corpo das respostas HTTP.", ("method", "route"), SIZE_BUCKETS
+)
+http_in_progress = registry.gauge(
+    "http_requests_in_progress", "Requisições HTTP em andamento.", ("method", "route")
+)
+http_rejected = registry.counter(
+    "http_requests_rejected_total",
+    "Requisições rejeitadas pelo limite de taxa (429) ou de concorrência (503).",
+    ("reason", "rule"),
+)
+service_duration = registry.histogram(
+    "todo_service_duration_seconds", "Duração das operações do TodoService.", ("operation",)
+)
+storage_stats = registry.gauge(
+    "storage_backend_stats", "Estatísticas do backend de armazenamento.", ("backend", "stat"), mode="pid"
+)
+cache_stats = registry.gauge(
+    "response_cache_stats", "Estatísticas do cache de respostas.", ("backend", "stat"), mode="pid"
+)
+
+_store: Optional[MultiProcessStore] = None
+
+
+def configure(directory: str = "", interval: float = 1.0) -> None:
+    """Ativa (ou desativa, com diretório vazio) a agregação entre processos."""
+    global _store
+    _store = MultiProcessStore(directory, interval) if directory else None
+
+
+async def render() -> str:
+    """
+    Texto de exposição de `/metrics`, agregando os workers se configurado.
+
+    A leitura e a gravação dos instantâneos rodam em uma thread.
+    """
+    if _store is None:
+        return registry.render()
+    store = _store
+    snapshot = registry.snapshot()
+
+    def exchange() -> List[Dict[str, Any]]:
+        store.write(snapshot)
+        return store.collect()
+
+    return registry.render(await asyncio.to_thread(exchange))
+
+
+def timed(operation: str) -> Callable:
+    """Decorador que mede a duração de uma corrotina em `todo_service_duration_seconds`."""
+    labels = (operation,)
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                service_duration.observe(labels, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede as requisições HTTP por rota.
+
+    A rota é identificada pelo template (ex.: `/api/v1/todos/{todo_id}`),
+    mantendo a cardinalidade dos rótulos limitada. O template é resolvido no
+    início da requisição (para o gauge de requisições em andamento) e
+    guardado por método e caminho.
+    """
+
+    _MAX_CACHED_PATHS = 4096
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._templates: Dict[Tuple[str, str], str] = {}
+        self._operations: Optional[List[Tuple[Any, str, frozenset]]] = None
+
+    def _operation_template(self, scope: Scope) -> Optional[str]:
+        """
+        Template da operação documentada que atende o método e o caminho.
+
+        Routers incluídos não expõem o caminho completo em versões recentes
+        do FastAPI, então os templates vêm do schema OpenAPI (na ordem de
+        declaração das rotas).
+        """
+        if self._operations is None:
+            paths = scope["app"].openapi().get("paths", {})
+            self._operations = [
+                (compile_path(path)[0], path, frozenset(m.upper() for m in operations))
+                for path, operations in paths.items()
+            ]
+        method, path = scope["method"], scope["path"]
+        partial = None
+        for regex, template, methods in self._operations:
+            if regex.match(path):
+                if method in methods or (method == "HEAD" and "GET" in methods):
+                    return template
+                partial = partial or template
+        return partial
+
+    def _route_template(self, scope: Scope) -> str:
+        key = (scope["method"], scope["path"])
+        template = self._templates.get(key)
+        if template is not None:
+            return template
+        template = None
+        partial = None
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.NONE:
+                continue
+            path = getattr(route, "path", None)
+            if not isinstance(path, str):
+                path = self._operation_template(scope)
+            if match == Match.FULL:
+                template = path
+                break
+            partial = partial or path
+        template = template or partial or "unmatched"
+        if len(self._templates) >= self._MAX_CACHED_PATHS:
+            self._templates.clear()
+        self._templates[key] = template
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        labels = (method, self._route_template(scope))
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_progress.inc(labels)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_duration.observe(labels, time.perf_counter() - start)
+            http_response_size.observe(labels, size)
+            http_requests.inc(labels + (str(status_code),))
+            http_in_progress.dec(labels)
+            if _store is not None:
+                _store.maybe_flush(registry)
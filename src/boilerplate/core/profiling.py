@@ -0,0 +1,210 @@
+"""
+Profiling estatístico opcional das requisições.
+
+Quando ativado (`PROFILING_ENABLED`), uma thread amostra periodicamente a
+pilha da thread do event loop. Ao fim de cada requisição sorteada
+(`PROFILING_SAMPLE_RATE`) ou mais lenta que `PROFILING_SLOW_MS`, as amostras
+do intervalo da requisição são gravadas em `PROFILING_DIR` no formato
+"collapsed stack" (uma linha `quadro;quadro;... contagem` por pilha), que
+pode ser aberto no speedscope ou convertido em flame graph.
+
+As amostras são da thread do event loop como um todo: com requisições
+concorrentes, o perfil de uma requisição inclui o trabalho das demais.
+Desativado, nada disso é carregado: nem middleware, nem thread, nem rotas.
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+Stack = Tuple[str, ...]
+
+
+class StackSampler:
+    """Amostra a pilha de uma thread a intervalos regulares."""
+
+    def __init__(self, interval: float, window: float = 120.0):
+        self.interval = interval
+        # Amostras mais antigas que a janela são descartadas
+        self.samples: Deque[Tuple[float, Stack]] = deque(maxlen=max(1, int(window / interval)))
+        self._labels: Dict[Any, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+
+    def start(self, thread_id: int) -> None:
+        """Inicia a amostragem da thread `thread_id` (não faz nada se já iniciada)."""
+        if self._thread is not None:
+            return
+        self._target = thread_id
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _label(self, code: Any) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            # Caminhos encurtados a partir do pacote (ou do site-packages)
+            for marker in ("site-packages" + os.sep, "src" + os.sep):
+                pos = filename.rfind(marker)
+                if pos >= 0:
+                    filename = filename[pos + len(marker):]
+                    break
+            label = self._labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+        return label
+
+    def _run(self) -> None:
+        interval, target, samples = self.interval, self._target, self.samples
+        if target is None:
+            return
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            samples.append((time.perf_counter(), tuple(stack)))
+
+    def between(self, start: float, end: float) -> Dict[Stack, int]:
+        """Contagem de amostras por pilha no intervalo `[start, end]`."""
+        counts: Dict[Stack, int] = {}
+        for timestamp, stack in reversed(self.samples):
+            if timestamp < start:
+                break
+            if timestamp <= end:
+                counts[stack] = counts.get(stack, 0) + 1
+        return counts
+
+
+def collapsed(counts: Dict[Stack, int]) -> str:
+    """Formato "collapsed stack" (aceito pelo speedscope e pelo flamegraph.pl)."""
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(counts.items()))
+
+
+class Profiler:
+    """Decide quais requisições perfilar e mantém os perfis recentes."""
+
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: float = 0.0,
+        slow_ms: float = 500.0,
+        interval_ms: float = 5.0,
+        max_profiles: int = 50,
+    ):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.slow = slow_ms / 1000
+        self.sampler = StackSampler(interval_ms / 1000)
+        self.recent: Deque[Dict[str, Any]] = deque()
+        self.max_profiles = max_profiles
+        self._counter = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def record(
+        self, scope: Scope, status: int, start: float, end: float, sampled: bool
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Grava o perfil da requisição se ela foi sorteada ou foi lenta.
+
+        Os arquivos são gravados e removidos em uma thread, fora do event loop.
+        """
+        duration = end - start
+        slow = duration >= self.slow
+        if not (sampled or slow):
+            return None
+        counts = self.sampler.between(start, end)
+        if not counts:
+            return None
+        self._counter += 1
+        profile_id = f"{int(time.time() * 1000)}-{os.getpid()}-{self._counter}"
+        filename = f"{profile_id}.collapsed"
+        await asyncio.to_thread(self._write, filename, collapsed(counts))
+        profile = {
+            "id": profile_id,
+            "file": filename,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "samples": sum(counts.values()),
+            "reason": "slow" if slow else "sampled",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.recent.append(profile)
+        expired = []
+        while len(self.recent) > self.max_profiles:
+            expired.append(self.recent.popleft()["file"])
+        if expired:
+            await asyncio.to_thread(self._remove, expired)
+        return profile
+
+    def _write(self, filename: str, text: str) -> None:
+        with open(os.path.join(self.directory, filename), "w") as file:
+            file.write(text)
+
+    def _remove(self, filenames: List[str]) -> None:
+        for filename in filenames:
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        for profile in self.recent:
+            if profile["id"] == profile_id:
+                return profile
+        return None
+
+    def read(self, profile: Dict[str, Any]) -> str:
+        with open(os.path.join(self.directory, profile["file"])) as file:
+            return file.read()
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI que perfila requisições sorteadas ou lentas."""
+
+    def __init__(self, app: ASGIApp, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profiler = self.profiler
+        # A primeira requisição revela a thread do event loop
+        profiler.sampler.start(threading.get_ident())
+        sampled = profiler.should_sample()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await profiler.record(scope, status_code, start, time.perf_counter(), sampled)
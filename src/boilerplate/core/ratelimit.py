@@ -0,0 +1,270 @@
+"""
+Proteção da API contra sobrecarga.
+
+Dois limites, aplicados por `RateLimitMiddleware` antes do roteamento (uma
+requisição rejeitada não lê o corpo nem chega ao serviço):
+
+- Taxa por cliente: token bucket por regra e cliente. Acima do limite, a
+  resposta é 429 com `Retry-After` (segundos até haver uma ficha).
+- Concorrência por worker: ao atingir `max_in_flight` requisições em
+  andamento, as novas recebem 503 com `Retry-After` na hora, em vez de
+  esperar na fila do event loop. A latência das aceitas fica limitada.
+
+O bucket é guardado no formato GCRA: um único instante por cliente (o
+"tempo teórico de chegada"), equivalente a um token bucket com capacidade
+`burst` reabastecido a `rate` fichas por segundo.
+
+Dois backends estão disponíveis para os buckets:
+
+- `MemoryRateLimiter` — por processo (com N workers, o limite efetivo é N
+  vezes o configurado)
+- `SharedRateLimiter` — delega a um cliente compatível com Redis, dividindo
+  o limite entre os workers (requer o extra `redis`)
+
+As regras usam o formato `"<quantidade>/<s|m|h>[:<burst>]"` (ex.: `"10/s"`,
+`"600/m:50"`); sem `burst`, a capacidade é a quantidade de um período.
+"""
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..utils.http import compile_route
+from . import metrics
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600}
+# Tempos em microssegundos: inteiros exatos também no script do Redis
+_MICROS = 1_000_000
+
+
+@dataclass(frozen=True)
+class Rate:
+    """Limite de um token bucket."""
+    per_second: float
+    burst: int
+
+    @property
+    def interval(self) -> int:
+        """Microssegundos para repor uma ficha."""
+        return max(1, round(_MICROS / self.per_second))
+
+
+def parse_rate(value: str) -> Rate:
+    """Converte `"10/s"` ou `"600/m:50"` em um `Rate`."""
+    try:
+        limit, _, burst = value.strip().partition(":")
+        amount_text, _, period = limit.partition("/")
+        amount = float(amount_text)
+        rate = Rate(amount / _PERIODS[period.strip().lower()], int(burst) if burst else math.ceil(amount))
+    except (KeyError, ValueError) as exc:
+        raise ValueError(f"Limite inválido: {value!r} (use, por exemplo, '10/s' ou '600/m:50')") from exc
+    if rate.per_second <= 0 or rate.burst < 1:
+        raise ValueError(f"Limite inválido: {value!r}")
+    return rate
+
+
+def gcra(tat: Optional[int], now: int, interval: int, burst: int) -> Tuple[Optional[int], int]:
+    """
+    Decide uma requisição; retorna `(novo instante, espera)`.
+
+    Com a requisição aceita, a espera é 0 e o novo instante deve ser gravado;
+    rejeitada, o instante é None e a espera (µs) é o tempo até a próxima ficha.
+    """
+    new_tat = max(tat or now, now) + interval
+    allow_at = new_tat - interval * burst
+    if now < allow_at:
+        return None, allow_at - now
+    return new_tat, 0
+
+
+class RateLimiter(ABC):
+    """Interface assíncrona comum aos backends de rate limit."""
+
+    @abstractmethod
+    async def acquire(self, key: str, rate: Rate) -> float:
+        """Consome uma ficha de `key`; retorna 0 ou os segundos até a próxima."""
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Buckets em memória, limitados a `max_keys` clientes (LRU)."""
+
+    def __init__(self, max_keys: int = 65536):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, int]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def acquire(self, key: str, rate: Rate) -> float:
+        now = time.monotonic_ns() // 1000
+        tat, wait = gcra(self._buckets.get(key), now, rate.interval, rate.burst)
+        if tat is None:
+            return wait / _MICROS
+        self._buckets[key] = tat
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            # Buckets antigos já estão cheios (equivalem a ausentes), então
+            # descartar o menos recente não concede fichas a mais
+            self._buckets.popitem(last=False)
+        return 0.0
+
+
+# Executado atomicamente no servidor, com o relógio do Redis (o mesmo para
+# todos os workers). A chave expira quando o bucket volta a ficar cheio; os
+# instantes são gravados com `%d` (tostring do Lua arredondaria os µs).
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - interval * burst
+if now < allow_at then return allow_at - now end
+redis.call('SET', KEYS[1], string.format('%d', new_tat), 'PX', string.format('%d', math.ceil((new_tat - now) / 1000)))
+return 0
+"""
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Buckets compartilhados entre processos sobre um cliente estilo Redis.
+
+    O cliente precisa oferecer `eval(script, numkeys, *keys_and_args)` (como
+    `redis.asyncio.Redis`), usado com `GCRA_SCRIPT`.
+    """
+
+    def __init__(self, client: Any, prefix: str = "boilerplate:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def acquire(self, key: str, rate: Rate) -> float:
+        wait = await self.client.eval(GCRA_SCRIPT, 1, self.prefix + key, rate.interval, rate.burst)
+        return int(wait) / _MICROS
+
+
+def create_rate_limiter(url: str) -> RateLimiter:
+    """Cria o backend de rate limit correspondente à URL informada."""
+    if url in ("memory://", "memory:", ""):
+        return MemoryRateLimiter()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as exc:
+            raise ImportError(
+                "O rate limit compartilhado requer o pacote redis: pip install 'python-boilerplate[redis]'"
+            ) from exc
+        return SharedRateLimiter(Redis.from_url(url))
+    raise ValueError(f"RATE_LIMIT_URL não suportada: {url}")
+
+
+def _reject(status: int, detail: str, retry_after: float) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    body = dumps({"detail": detail})
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+    ]
+    return status, headers, body
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI com o limite de taxa por cliente e o de concorrência.
+
+    Vale para os caminhos sob `prefix`. `limits` associa rotas
+    (`"MÉTODO /template"`) a limites; as demais usam `default`, um bucket por
+    cliente compartilhado entre elas. Rotas em `exempt` (como streams longos)
+    não contam para `max_in_flight`. O cliente é o IP ou, com `key_header`,
+    o valor desse cabeçalho.
+
+    Se o backend compartilhado falhar, a requisição é aceita: indisponível o
+    Redis, a API segue atendendo, só sem o limite de taxa.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: Optional[RateLimiter] = None,
+        limits: Optional[Dict[str, str]] = None,
+        default: str = "",
+        prefix: str = "/api/",
+        max_in_flight: int = 0,
+        exempt: Iterable[str] = (),
+        key_header: str = "",
+        retry_after: float = 1.0,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.rules = [(*compile_route(route), route, parse_rate(rate)) for route, rate in (limits or {}).items()]
+        self.default = parse_rate(default) if default else None
+        self.prefix = prefix
+        self.max_in_flight = max_in_flight
+        self.exempt = [compile_route(route) for route in exempt]
+        self.key_header = key_header.lower()
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._overloaded = _reject(503, "Servidor sobrecarregado, tente novamente", retry_after)
+
+    def _rule(self, method: str, path: str) -> Tuple[Optional[str], Optional[Rate]]:
+        for rule_method, regex, name, rate in self.rules:
+            if rule_method == method and regex.match(path):
+                return name, rate
+        return ("default", self.default) if self.default else (None, None)
+
+    def _client(self, scope: Scope) -> str:
+        if self.key_header:
+            value = Headers(scope=scope).get(self.key_header)
+            if value:
+                return value
+        client = scope.get("client")
+        return client[0] if client else "-"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        method, path = scope["method"], scope["path"]
+
+        name, rate = self._rule(method, path)
+        if rate is not None and self.limiter is not None:
+            try:
+                wait = await self.limiter.acquire(f"{name}:{self._client(scope)}", rate)
+            except Exception:
+                logger.warning("Falha no backend de rate limit; requisição aceita", exc_info=True)
+                wait = 0.0
+            if wait > 0:
+                metrics.http_rejected.inc(("rate_limit", name or "-"))
+                await self._send(send, _reject(429, "Limite de requisições excedido", wait))
+                return
+
+        if self.max_in_flight <= 0 or any(
+            m == method and regex.match(path) for m, regex in self.exempt
+        ):
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_in_flight:
+            metrics.http_rejected.inc(("overload", name or "-"))
+            await self._send(send, self._overloaded)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    async def _send(send: Send, response: Tuple[int, List[Tuple[bytes, bytes]], bytes]) -> None:
+        status, headers, body = response
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
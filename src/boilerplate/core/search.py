@@ -0,0 +1,163 @@
+"""
+Índice invertido incremental para busca textual em Tarefas.
+
+O índice é atualizado a cada inserção, alteração ou remoção, de modo que uma
+busca custa proporcionalmente ao número de termos consultados e de documentos
+encontrados, e não ao total de tarefas.
+"""
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# Letras e dígitos, como o tokenizador `unicode61` do FTS5 (que separa os
+# termos no "_"): a busca dá o mesmo resultado em todos os backends
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Prefixos que expandem para mais termos que isso (ex.: "a") não são
+# materializados como conjunto; são verificados documento a documento.
+MAX_PREFIX_EXPANSION = 64
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Quebra o texto em termos normalizados.
+
+    Converte para minúsculas e remove acentos, para que "ação" e "acao"
+    sejam equivalentes na busca.
+    """
+    if not text:
+        return []
+    if text.isascii():
+        # Sem acentos a remover (caso comum; evita a normalização Unicode)
+        return _TOKEN_RE.findall(text.lower())
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(folded)
+
+
+def matches_terms(terms: Iterable[str], *texts: Optional[str]) -> bool:
+    """Verifica se os textos contêm todos os termos (como prefixo)."""
+    words = tokenize(" ".join(text for text in texts if text))
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
+class InvertedIndex:
+    """
+    Índice invertido `termo -> IDs` com suporte a busca por prefixo.
+
+    O vocabulário é mantido ordenado, então os termos que começam com um
+    prefixo formam um intervalo contíguo localizado por busca binária.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []
+        self._doc_terms: Dict[int, FrozenSet[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    @property
+    def term_count(self) -> int:
+        """Quantidade de termos distintos no vocabulário."""
+        return len(self._vocabulary)
+
+    def add(self, doc_id: int, *texts: Optional[str]) -> None:
+        """Indexa (ou reindexa) um documento a partir dos textos informados."""
+        if doc_id in self._doc_terms:
+            self.remove(doc_id)
+        terms = frozenset(tokenize(" ".join(text for text in texts if text)))
+        self._doc_terms[doc_id] = terms
+        postings = self._postings
+        for term in terms:
+            posting = postings.get(term)
+            if posting is None:
+                posting = postings[term] = set()
+                insort(self._vocabulary, term)
+            posting.add(doc_id)
+
+    def remove(self, doc_id: int) -> None:
+        """Remove um documento do índice (não faz nada se ele não existir)."""
+        for term in self._doc_terms.pop(doc_id, ()):
+            posting = self._postings[term]
+            posting.discard(doc_id)
+            if not posting:
+                del self._postings[term]
+                pos = bisect_left(self._vocabulary, term)
+                del self._vocabulary[pos]
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._vocabulary.clear()
+        self._doc_terms.clear()
+
+    def _prefix_matches(self, prefix: str) -> Set[int]:
+        pos = bisect_left(self._vocabulary, prefix)
+        vocabulary = self._vocabulary
+        if pos < len(vocabulary) and vocabulary[pos] == prefix and (
+            pos + 1 == len(vocabulary) or not vocabulary[pos + 1].startswith(prefix)
+        ):
+            # Caso comum: termo completo sem extensões no vocabulário
+            return self._postings[prefix]
+        matches: Set[int] = set()
+        while pos < len(vocabulary) and vocabulary[pos].startswith(prefix):
+            matches |= self._postings[vocabulary[pos]]
+            pos += 1
+        return matches
+
+    def _expansion(self, prefix: str) -> int:
+        """Quantidade de termos do vocabulário que começam com `prefix`."""
+        lo = bisect_left(self._vocabulary, prefix)
+        hi = bisect_left(self._vocabulary, prefix + "\U0010ffff", lo)
+        return hi - lo
+
+    def plan(self, query: str) -> Tuple[Optional[Set[int]], List[str]]:
+        """
+        Separa a consulta em uma parte seletiva e uma parte residual.
+
+        Retorna `(candidatos, prefixos)`: os candidatos são a interseção dos
+        termos seletivos (None se não houver nenhum) e os prefixos residuais
+        são amplos demais para materializar e devem ser conferidos com
+        `matches` nos documentos percorridos.
+        """
+        terms = set(tokenize(query))
+        broad = [t for t in terms if self._expansion(t) > MAX_PREFIX_EXPANSION]
+        selective = terms.difference(broad)
+        candidates = self._intersect(selective) if selective else None
+        return candidates, broad
+
+    def matches(self, doc_id: int, prefixes: List[str]) -> bool:
+        """Verifica se o documento contém todos os prefixos informados."""
+        terms = self._doc_terms.get(doc_id, ())
+        return all(any(t.startswith(p) for t in terms) for p in prefixes)
+
+    def _intersect(self, terms: Iterable[str]) -> Set[int]:
+        candidates = sorted((self._prefix_matches(t) for t in terms), key=len)
+        if len(candidates) == 1:
+            return candidates[0]
+        result = candidates[0] & candidates[1]
+        for matches in candidates[2:]:
+            if not result:
+                break
+            result &= matches
+        return result
+
+    def search(self, query: str) -> Optional[Set[int]]:
+        """
+        Retorna os IDs que contêm todos os termos da consulta (como prefixo).
+
+        Retorna None se a consulta não tiver termos, indicando "sem filtro".
+        O conjunto retornado pode ser compartilhado com o índice e não deve
+        ser modificado.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return None
+        return self._intersect(terms)
+
+    def rebuild(self, docs: Iterable[dict]) -> None:
+        """Reconstrói o índice a partir de uma coleção de tarefas."""
+        self.clear()
+        for doc in docs:
+            self.add(doc["id"], doc.get("title"), doc.get("description"))
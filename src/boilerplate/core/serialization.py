@@ -0,0 +1,131 @@
+"""
+Serialização rápida das respostas de Tarefas.
+
+As tarefas devolvidas pelo `TodoService` foram montadas pelo próprio serviço
+(ou lidas do backend), então revalidá-las com `TodoInDB` a cada resposta é
+trabalho redundante. Este módulo codifica os dicionários diretamente em
+bytes, produzindo exatamente o mesmo JSON que `TypeAdapter(TodoInDB).dump_json`.
+
+Usa `orjson` quando instalado (extra `speedups`) e, na falta dele, o módulo
+`json` da biblioteca padrão.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Iterable
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None  # type: ignore[assignment]
+
+
+def _isoformat(value: datetime) -> str:
+    text = value.isoformat()
+    # Mesmo formato do Pydantic: UTC é representado por "Z"
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return _isoformat(value)
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa para JSON compacto em UTF-8, no mesmo formato do Pydantic."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode()
+
+
+def todo_payload(todo: dict) -> dict:
+    """
+    Dicionário de saída de uma tarefa, na ordem dos campos de `TodoInDB`.
+
+    Os valores não são revalidados: a tarefa deve vir do serviço, com as
+    datas já no timezone configurado.
+    """
+    return {
+        "title": todo["title"],
+        "description": todo.get("description"),
+        "completed": todo.get("completed", False),
+        "id": todo["id"],
+        "version": todo.get("version", 1),
+        "created_at": todo["created_at"],
+        "updated_at": todo["updated_at"],
+    }
+
+
+def bulk_payload(result: dict) -> dict:
+    """Dicionário de saída de um item de lote, na ordem de `TodoBulkResult`."""
+    todo = result.get("todo")
+    return {
+        "id": result["id"],
+        "status": result["status"],
+        "todo": todo_payload(todo) if todo is not None else None,
+        "error": result.get("error"),
+    }
+
+
+def encode_todo(todo: dict) -> bytes:
+    """JSON de uma tarefa."""
+    return dumps(todo_payload(todo))
+
+
+def encode_todos(todos: Iterable[dict]) -> bytes:
+    """JSON de uma lista de tarefas."""
+    return dumps([todo_payload(todo) for todo in todos])
+
+
+def encode_ndjson(todos: Iterable[dict]) -> bytes:
+    """NDJSON (uma tarefa JSON por linha) de um lote de tarefas."""
+    return b"".join(dumps(todo_payload(todo)) + b"\n" for todo in todos)
+
+
+# Colunas da exportação CSV
+CSV_COLUMNS = ("id", "title", "description", "completed", "version", "created_at", "updated_at")
+
+
+def encode_csv(todos: Iterable[dict], header: bool = False) -> bytes:
+    """
+    Linhas CSV (RFC 4180) de um lote de tarefas.
+
+    Booleanos são escritos como `true`/`false`, datas em ISO 8601 e a
+    descrição ausente como campo vazio.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    writer.writerows(
+        (
+            todo["id"],
+            todo["title"],
+            todo.get("description") or "",
+            "true" if todo.get("completed") else "false",
+            todo.get("version", 1),
+            _isoformat(todo["created_at"]),
+            _isoformat(todo["updated_at"]),
+        )
+        for todo in todos
+    )
+    return buffer.getvalue().encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Resposta JSON serializada por `dumps`, sem passar por `jsonable_encoder`.
+
+    O conteúdo deve conter apenas tipos JSON nativos e datetimes, como os
+    produzidos por `todo_payload` e `bulk_payload`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
@@ -0,0 +1,369 @@
+"""
+Servidor de produção com vários workers (`boilerplate serve`).
+
+O processo mestre abre o socket de escuta, opcionalmente importa a
+aplicação (`preload`) e cria os workers com `fork`. Cada worker roda um
+`uvicorn.Server` sobre o socket herdado; o kernel distribui as conexões.
+
+- Com `preload`, o código e os objetos criados na importação são
+  compartilhados entre os workers por copy-on-write. `gc.freeze()` tira
+  esses objetos das coletas, que de outro modo tocariam (e copiariam) as
+  páginas de memória de cada worker.
+- Com `max_requests`, cada worker encerra graciosamente após atender esse
+  número de requisições (mais um `max_requests_jitter` sorteado, para que
+  os workers não reiniciem juntos) e o mestre cria outro no lugar. Isso
+  limita o efeito de vazamentos e fragmentação de memória. O worker para
+  de aceitar conexões e atende as que já aceitou antes de sair; as que
+  estão na fila do socket ficam para os demais.
+- SIGTERM/SIGINT encerram os workers graciosamente; após
+  `graceful_timeout` segundos, os restantes recebem SIGKILL. SIGHUP
+  reinicia os workers um a um. Os streams de alterações (SSE) abertos
+  terminam no início do encerramento, e os clientes reconectam.
+
+Em plataformas sem `fork` (Windows), roda um único processo uvicorn.
+"""
+import asyncio
+import gc
+import glob
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("boilerplate.server")
+
+APP = "boilerplate.main:app"
+# Workers que morrem logo após iniciar indicam erro de configuração
+MIN_WORKER_UPTIME = 1.0
+RESPAWN_BACKOFF = 1.0
+
+
+@dataclass
+class ServerOptions:
+    host: str = "127.0.0.1"
+    port: int = 8010
+    workers: int = 1
+    cpu_affinity: bool = False
+    backlog: int = 2048
+    keepalive: int = 5
+    limit_concurrency: Optional[int] = None
+    max_requests: Optional[int] = None
+    max_requests_jitter: int = 0
+    graceful_timeout: int = 30
+    preload: bool = True
+    log_level: str = "info"
+    access_log: bool = True
+
+    @classmethod
+    def from_settings(cls, settings: Any, **overrides: Any) -> "ServerOptions":
+        """Opções a partir de `Settings`; valores None em `overrides` são ignorados."""
+        options = cls(
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            workers=settings.SERVER_WORKERS,
+            cpu_affinity=settings.SERVER_CPU_AFFINITY,
+            backlog=settings.SERVER_BACKLOG,
+            keepalive=settings.SERVER_KEEPALIVE_TIMEOUT,
+            limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY,
+            max_requests=settings.SERVER_MAX_REQUESTS,
+            max_requests_jitter=settings.SERVER_MAX_REQUESTS_JITTER,
+            graceful_timeout=settings.SERVER_GRACEFUL_TIMEOUT,
+            preload=settings.SERVER_PRELOAD,
+            log_level=settings.LOG_LEVEL.lower(),
+            access_log=settings.SERVER_ACCESS_LOG,
+        )
+        for name, value in overrides.items():
+            if value is not None:
+                setattr(options, name, value)
+        # 0 desativa os limites e usa uma CPU por worker
+        options.limit_concurrency = options.limit_concurrency or None
+        options.max_requests = options.max_requests or None
+        options.workers = options.workers or os.cpu_count() or 1
+        return options
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Abre o socket de escuta compartilhado pelos workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def clear_metrics_dir(directory: str) -> None:
+    """Remove as métricas de execuções anteriores (workers que não existem mais)."""
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def per_process_backends(settings: Any) -> List[str]:
+    """
+    Configurações ativas cujo backend guarda estado só no próprio processo.
+
+    Com vários workers, cada um teria o seu: repetições com a mesma
+    Idempotency-Key executariam de novo em outro worker e o limite de taxa
+    valeria por worker. O cache de respostas não entra: as chaves incluem a
+    versão da coleção, compartilhada pelo armazenamento.
+    """
+    backends = (
+        # Sem URL, as chaves ficam no armazenamento das tarefas
+        ("IDEMPOTENCY_URL", settings.IDEMPOTENCY_URL or settings.DATABASE_URL, settings.IDEMPOTENCY_ENABLED),
+        ("RATE_LIMIT_URL", settings.RATE_LIMIT_URL, settings.RATE_LIMIT_ENABLED),
+    )
+    return [name for name, url, enabled in backends if enabled and url.startswith("memory")]
+
+
+def _uvicorn_config(app, options: ServerOptions):
+    import uvicorn
+
+    return uvicorn.Config(
+        app,
+        backlog=options.backlog,
+        timeout_keep_alive=options.keepalive,
+        limit_concurrency=options.limit_concurrency,
+        limit_max_requests=options.max_requests,
+        limit_max_requests_jitter=options.max_requests_jitter,
+        timeout_graceful_shutdown=options.graceful_timeout,
+        log_level=options.log_level,
+        access_log=options.access_log,
+    )
+
+
+def _end_streams() -> None:
+    """Encerra os streams de alterações abertos neste processo."""
+    todo_service = sys.modules.get("boilerplate.services.todo")
+    if todo_service is not None:
+        todo_service.get_changes().close()
+
+
+def _uvicorn_server(config):
+    import uvicorn
+
+    class Server(uvicorn.Server):
+        async def shutdown(self, sockets=None):
+            # Os streams SSE durariam até CHANGES_STREAM_TIMEOUT e seguram o
+            # encerramento até o graceful_timeout: terminam antes da espera
+            # pelas requisições em andamento (o cliente reconecta em outro)
+            _end_streams()
+            await self.drain_accepted()
+            await super().shutdown(sockets)
+
+        async def drain_accepted(self) -> None:
+            """
+            Para de aceitar conexões e espera as já aceitas enviarem a requisição.
+
+            O uvicorn fecha na hora as conexões sem requisição em andamento,
+            inclusive as recém-aceitas cujo pedido ainda não foi lido: o
+            cliente receberia a conexão fechada sem resposta.
+            """
+            for server in self.servers:
+                server.close()
+            deadline = time.monotonic() + self.config.timeout_keep_alive
+            while time.monotonic() < deadline and any(
+                getattr(connection, "cycle", False) is None
+                for connection in self.server_state.connections
+            ):
+                await asyncio.sleep(0.01)
+
+    return Server(config)
+
+
+class Master:
+    """Processo mestre: cria, monitora e substitui os workers."""
+
+    def __init__(self, options: ServerOptions, sock: socket.socket, app=APP):
+        self.options = options
+        self.sock = sock
+        self.app = app
+        self.workers: Dict[int, int] = {}  # pid -> slot
+        self.started: Dict[int, float] = {}  # pid -> horário de início
+        self.stopping = False
+        self.restarts = 0
+        self._reload: List[int] = []
+        self._signalled: Optional[int] = None
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        self.cpus = cpus if options.cpu_affinity else []
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        for slot in range(self.options.workers):
+            self.spawn(slot)
+        while not self.stopping:
+            self.reap()
+            self.reload_next()
+            time.sleep(0.1)
+        return self.shutdown()
+
+    def spawn(self, slot: int) -> int:
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - executado no processo filho
+            code = 1
+            try:
+                self._worker(slot)
+                code = 0
+            except SystemExit as exc:
+                code = exc.code if isinstance(exc.code, int) else 1
+            except Exception:
+                logger.exception("Falha no worker %s", os.getpid())
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self.workers[pid] = slot
+        self.started[pid] = time.monotonic()
+        logger.info("Worker %s iniciado (slot %s)", pid, slot)
+        return pid
+
+    def _worker(self, slot: int) -> None:  # pragma: no cover - processo filho
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        if self.cpus:
+            cpu = self.cpus[slot % len(self.cpus)]
+            os.sched_setaffinity(0, {cpu})
+        server = _uvicorn_server(_uvicorn_config(self.app, self.options))
+        try:
+            server.run(sockets=[self.sock])
+        finally:
+            # O worker sai com os._exit, sem atexit: grava o que estiver
+            # pendente (WAL) e fecha as conexões do backend
+            todo_service = sys.modules.get("boilerplate.services.todo")
+            if todo_service is not None:
+                todo_service.get_storage().close()
+
+    def reap(self) -> None:
+        """Recolhe workers encerrados e cria substitutos."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.workers.pop(pid, None)
+            started = self.started.pop(pid, time.monotonic())
+            if slot is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code == 0:
+                logger.info("Worker %s encerrado; reiniciando no slot %s", pid, slot)
+            else:
+                logger.warning("Worker %s terminou com código %s; reiniciando", pid, code)
+                if time.monotonic() - started < MIN_WORKER_UPTIME:
+                    time.sleep(RESPAWN_BACKOFF)
+            self.restarts += 1
+            self.spawn(slot)
+
+    def reload_next(self) -> None:
+        """Reinicia os workers pendentes de SIGHUP, um por vez."""
+        while self._reload and self._reload[0] not in self.workers:
+            # Já encerrado (e substituído por `reap`): segue para o próximo
+            self._reload.pop(0)
+        if self._reload and self._reload[0] != self._signalled:
+            self._signalled = self._reload[0]
+            os.kill(self._signalled, signal.SIGTERM)
+
+    def _handle_reload(self, signum, frame) -> None:
+        logger.info("SIGHUP: reiniciando os workers")
+        self._reload = list(self.workers)
+
+    def _handle_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def shutdown(self) -> int:
+        """Encerra os workers graciosamente e aguarda até `graceful_timeout`."""
+        logger.info("Encerrando %s worker(s)", len(self.workers))
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.options.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for pid in list(self.workers):
+            logger.warning("Worker %s não encerrou a tempo; enviando SIGKILL", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.workers.clear()
+        self.sock.close()
+        return 0
+
+
+def serve(options: ServerOptions) -> int:
+    """Inicia o servidor com as opções informadas."""
+    from ..config import settings
+
+    logging.basicConfig(level=options.log_level.upper(), format="%(levelname)s: %(message)s")
+    if settings.DATABASE_URL.startswith("memory") and options.workers > 1:
+        logger.warning("DATABASE_URL=memory://: cada worker terá suas próprias tarefas")
+    if settings.WAL_DIR and (options.workers > 1 or options.preload):
+        # O log pertence a um processo, e um worker que substitui outro
+        # precisa restaurar as tarefas do disco, não da memória do mestre
+        logger.warning("WAL_DIR configurado: rodando um único worker, sem preload")
+        options.workers, options.preload = 1, False
+    per_process = per_process_backends(settings) if options.workers > 1 else []
+    if "IDEMPOTENCY_URL" in per_process and not settings.IDEMPOTENCY_PER_WORKER:
+        logger.error(
+            "Idempotency-Key em memória com %s workers: uma repetição atendida por outro "
+            "worker executaria de novo. Use o SQLite (DATABASE_URL) ou IDEMPOTENCY_URL=redis://..., "
+            "ou aceite chaves por worker com IDEMPOTENCY_PER_WORKER=true",
+            options.workers,
+        )
+        return 1
+    if "RATE_LIMIT_URL" in per_process:
+        logger.warning(
+            "RATE_LIMIT_URL=memory://: limite por worker (%s vezes o configurado)", options.workers
+        )
+    clear_metrics_dir(settings.METRICS_DIR)
+    if not hasattr(os, "fork"):  # pragma: no cover - Windows
+        if options.workers > 1:
+            logger.warning("Sem fork nesta plataforma: rodando um único worker")
+        config = _uvicorn_config(APP, options)
+        config.host, config.port = options.host, options.port
+        _uvicorn_server(config).run()
+        return 0
+
+    sock = bind_socket(options.host, options.port, options.backlog)
+    host, port = sock.getsockname()[:2]
+    app: Any = APP
+    if options.preload:
+        from ..main import app as application
+        from ..main import preload_templates
+
+        app = application
+
+        # Templates compilados antes do fork, compartilhados pelos workers
+        preload_templates()
+
+        # Objetos da importação passam à geração permanente do GC
+        gc.freeze()
+    logger.info(
+        "Escutando em http://%s:%s com %s worker(s)%s",
+        host, port, options.workers, " (pré-carregados)" if options.preload else "",
+    )
+    sys.stdout.flush()
+    return Master(options, sock, app).run()
@@ -0,0 +1,52 @@
+"""
+Backends de armazenamento de Tarefas.
+
+O backend é escolhido a partir de `DATABASE_URL`:
+
+- `memory://` — dicionário em memória do processo
+- `memory+compact://` — colunas compactas em memória (milhões de tarefas
+  por worker)
+- `sqlite:///caminho/para/arquivo.db` — arquivo SQLite compartilhado
+- `sqlite:///:memory:` — SQLite em memória (útil em testes)
+"""
+from .base import StorageBackend, UpdateResult, VersionConflictError
+from .memory import MemoryBackend
+
+__all__ = [
+    "StorageBackend",
+    "MemoryBackend",
+    "CompactMemoryBackend",
+    "SQLiteBackend",
+    "UpdateResult",
+    "VersionConflictError",
+    "create_backend",
+]
+
+
+def __getattr__(name: str):
+    # O módulo do SQLite (e o sqlite3) só é importado quando usado
+    if name == "SQLiteBackend":
+        from .sqlite import SQLiteBackend
+
+        return SQLiteBackend
+    if name == "CompactMemoryBackend":
+        from .compact import CompactMemoryBackend
+
+        return CompactMemoryBackend
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def create_backend(url: str, pool_size: int = 5, timeout: float = 5.0) -> StorageBackend:
+    """Cria o backend de armazenamento correspondente à URL informada."""
+    if url in ("memory://", "memory:"):
+        return MemoryBackend()
+    if url in ("memory+compact://", "memory+compact:"):
+        from .compact import CompactMemoryBackend
+
+        return CompactMemoryBackend()
+    if url.startswith("sqlite://"):
+        from .sqlite import SQLiteBackend
+
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else ""
+        return SQLiteBackend(path, pool_size=pool_size, timeout=timeout)
+    raise ValueError(f"DATABASE_URL não suportada: {url}")
@@ -0,0 +1,126 @@
+"""
+Contrato comum dos backends de armazenamento de Tarefas.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+
+class VersionConflictError(Exception):
+    """A versão esperada de uma tarefa não corresponde à versão armazenada."""
+
+    def __init__(self, todo_id: int, expected: int, current: int):
+        super().__init__(
+            f"Tarefa {todo_id}: versão esperada {expected}, versão atual {current}"
+        )
+        self.todo_id = todo_id
+        self.expected = expected
+        self.current = current
+
+
+# Resultado de um item em `update_many`
+UpdateResult = Union[dict, VersionConflictError, None]
+
+
+class StorageBackend(ABC):
+    """
+    Interface assíncrona implementada por todos os backends de armazenamento.
+
+    Os backends trabalham com dicionários simples (o mesmo formato retornado
+    pelo `TodoService`); a geração de timestamps fica a cargo do serviço.
+    """
+
+    # Identifica a instância dos dados. Nos backends em memória, os dados e a
+    # contagem de versões recomeçam a cada inicialização (ou são restaurados
+    # do WAL com outra contagem): um valor novo por processo evita que uma
+    # versão de antes do reinício coincida com outra depois dele.
+    epoch: str = ""
+
+    @abstractmethod
+    async def version(self) -> int:
+        """
+        Versão da coleção: contador crescente avançado a cada escrita.
+
+        Usado para gerar ETags das listagens sem consultar as tarefas.
+        """
+
+    @abstractmethod
+    async def list(self) -> List[dict]:
+        """Retorna todas as tarefas ordenadas por ID."""
+
+    @abstractmethod
+    async def list_page(
+        self,
+        after_id: Optional[int],
+        limit: int,
+        completed: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Retorna até `limit` tarefas com ID maior que `after_id`, em ordem de ID.
+
+        - **completed**: filtra pelo status de conclusão (None = todas)
+        - **search**: termos buscados por prefixo em título e descrição
+        """
+
+    @abstractmethod
+    async def get(self, todo_id: int) -> Optional[dict]:
+        """Obtém uma tarefa pelo ID."""
+
+    @abstractmethod
+    async def create(self, data: dict, now: datetime) -> dict:
+        """Insere uma nova tarefa e retorna o registro com o ID gerado."""
+
+    @abstractmethod
+    async def update(
+        self,
+        todo_id: int,
+        data: dict,
+        now: datetime,
+        expected_version: Optional[int] = None,
+    ) -> Optional[dict]:
+        """
+        Aplica uma atualização parcial e incrementa a versão da tarefa.
+
+        Retorna None se a tarefa não existir. Com `expected_version`, a
+        atualização é um compare-and-swap atômico: se a versão armazenada
+        for outra, lança `VersionConflictError` sem alterar nada.
+        """
+
+    @abstractmethod
+    async def delete(self, todo_id: int) -> bool:
+        """Remove uma tarefa; retorna False se ela não existir."""
+
+    @abstractmethod
+    async def create_many(self, items: Sequence[dict], now: datetime) -> List[dict]:
+        """
+        Insere várias tarefas em uma única transação.
+
+        Os IDs são alocados em um bloco contíguo, na ordem de `items`.
+        """
+
+    @abstractmethod
+    async def update_many(
+        self, updates: Sequence[Tuple[int, dict, Optional[int]]], now: datetime
+    ) -> List[UpdateResult]:
+        """
+        Aplica várias atualizações `(id, dados, versão esperada)` em uma transação.
+
+        Cada resultado é a tarefa atualizada, None para IDs inexistentes ou
+        um `VersionConflictError` para itens cuja versão não confere.
+        """
+
+    @abstractmethod
+    async def delete_many(self, todo_ids: Sequence[int]) -> List[bool]:
+        """Remove várias tarefas; False para IDs inexistentes."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove todas as tarefas (usado principalmente em testes)."""
+
+    def stats(self) -> Dict[str, float]:
+        """Estatísticas numéricas do backend, expostas em `/metrics`."""
+        return {}
+
+    def close(self) -> None:
+        """Libera recursos mantidos pelo backend (conexões, arquivos)."""
@@ -0,0 +1,520 @@
+"""
+Backend de armazenamento em memória compacto (`DATABASE_URL=memory+compact://`).
+
+Em vez de um dicionário por tarefa (com dois `datetime` e os índices de
+busca do `MemoryBackend`), as tarefas ficam em colunas:
+
+- IDs, datas (microssegundos desde a época, int64) e versões em `array`
+- título e descrição codificados em UTF-8 em uma única área de bytes
+  (`_text`), referenciados por deslocamento e tamanho
+- status em dois bitmaps: tarefas vivas pendentes e vivas concluídas
+- termos de busca (já normalizados) em outra área de bytes (`_terms`), um
+  segmento `\\n<id>: termo1 termo2` por tarefa
+
+Uma tarefa ocupa algumas dezenas de bytes além do próprio texto, contra
+mais de 2 KB no `MemoryBackend`. Os dicionários só são montados ao
+devolver as tarefas ao serviço.
+
+A busca não mantém índice invertido: cada termo é procurado em `_terms`
+com as buscas de bytes do próprio Python (em C). Termos com poucas
+ocorrências viram um conjunto de candidatos; os demais são conferidos
+tarefa a tarefa durante a paginação, como no `MemoryBackend`.
+
+Remoções e alterações de texto deixam espaço morto nas colunas e nas
+áreas de bytes, recuperado por uma compactação quando ele passa da metade.
+"""
+import re
+import secrets
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from ..clock import from_micros, get_clock, to_micros
+from ..search import tokenize
+from .base import StorageBackend, UpdateResult, VersionConflictError
+
+_NONZERO = re.compile(b"[^\x00]")
+
+# Termos com até esta quantidade de ocorrências são materializados como
+# conjunto de candidatos; os mais frequentes são conferidos por tarefa.
+MAX_SEARCH_CANDIDATES = 4096
+# Espaço morto (posições removidas ou bytes de textos antigos) tolerado
+# antes da compactação, além da metade do total
+COMPACT_MIN_SLOTS = 1024
+COMPACT_MIN_BYTES = 1024 * 1024
+# Planos de busca mantidos por versão da coleção (paginação de uma busca)
+_PLAN_CACHE_SIZE = 32
+
+
+class CompactMemoryBackend(StorageBackend):
+    """Armazena as tarefas em colunas compactas (ver o docstring do módulo)."""
+
+    def __init__(self):
+        self._next_id = 1
+        self._version = 0
+        self.epoch = secrets.token_hex(4)
+        self._plans: Dict[str, Tuple[Optional[Set[int]], List[bytes]]] = {}
+        self._plans_version = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._ids = array("q")
+        self._created = array("q")
+        self._updated = array("q")
+        self._versions = array("q")
+        self._text_off = array("q")
+        self._title_len = array("i")
+        self._desc_len = array("i")  # -1 = sem descrição
+        self._term_off = array("q")
+        self._open = bytearray()  # bit por posição: viva e pendente
+        self._done = bytearray()  # bit por posição: viva e concluída
+        self._text = bytearray()
+        self._terms = bytearray()
+        self._live = 0
+        self._completed = 0
+        self._dead_bytes = 0
+
+    # Posições e status
+
+    def _slot(self, todo_id: int) -> int:
+        """Posição de uma tarefa viva nas colunas, ou -1."""
+        ids = self._ids
+        pos = bisect_left(ids, todo_id)
+        if pos < len(ids) and ids[pos] == todo_id and self._alive(pos):
+            return pos
+        return -1
+
+    def _alive(self, slot: int) -> bool:
+        byte, mask = slot >> 3, 1 << (slot & 7)
+        return bool((self._open[byte] | self._done[byte]) & mask)
+
+    def _is_done(self, slot: int) -> bool:
+        return bool(self._done[slot >> 3] & (1 << (slot & 7)))
+
+    def _set_status(self, slot: int, completed: Optional[bool]) -> None:
+        """Marca a posição como pendente, concluída ou removida (None)."""
+        byte, mask = slot >> 3, 1 << (slot & 7)
+        if self._done[byte] & mask:
+            self._completed -= 1
+        self._open[byte] &= ~mask & 0xFF
+        self._done[byte] &= ~mask & 0xFF
+        if completed is None:
+            return
+        if completed:
+            self._done[byte] |= mask
+            self._completed += 1
+        else:
+            self._open[byte] |= mask
+
+    def _scan(self, start: int, completed: Optional[bool]) -> Iterator[int]:
+        """Posições vivas a partir de `start`, opcionalmente filtradas por status."""
+        end = len(self._ids)
+        if completed is None:
+            for slot in range(start, end):
+                if self._alive(slot):
+                    yield slot
+            return
+        bitmap = self._done if completed else self._open
+        slot = start
+        while slot < end:
+            byte = slot >> 3
+            if not bitmap[byte]:
+                # Pula em C os bytes sem nenhuma tarefa com o status pedido
+                match = _NONZERO.search(bitmap, byte + 1)
+                if match is None:
+                    return
+                slot = match.start() << 3
+                continue
+            if bitmap[byte] & (1 << (slot & 7)):
+                yield slot
+            slot += 1
+
+    # Texto e termos de busca
+
+    def _texts(self, slot: int) -> Tuple[str, Optional[str]]:
+        start = self._text_off[slot]
+        middle = start + self._title_len[slot]
+        desc_len = self._desc_len[slot]
+        title = self._text[start:middle].decode()
+        description = None if desc_len < 0 else self._text[middle:middle + desc_len].decode()
+        return title, description
+
+    def _text_size(self, slot: int) -> int:
+        return self._title_len[slot] + max(self._desc_len[slot], 0)
+
+    def _write_text(self, title: str, description: Optional[str]) -> Tuple[int, int, int]:
+        start = len(self._text)
+        title_bytes = title.encode()
+        self._text += title_bytes
+        if description is None:
+            return start, len(title_bytes), -1
+        desc_bytes = description.encode()
+        self._text += desc_bytes
+        return start, len(title_bytes), len(desc_bytes)
+
+    def _write_terms(self, todo_id: int, title: str, description: Optional[str]) -> int:
+        start = len(self._terms)
+        terms = dict.fromkeys(tokenize(title) + tokenize(description))
+        self._terms += b"\n%d:" % todo_id + "".join(" " + term for term in terms).encode()
+        return start
+
+    def _segment(self, slot: int) -> Tuple[int, int]:
+        """Início e fim do segmento de termos de uma posição."""
+        start = self._term_off[slot]
+        end = self._terms.find(b"\n", start + 1)
+        return start, len(self._terms) if end < 0 else end
+
+    def _blank_terms(self, slot: int) -> None:
+        """Apaga os termos de uma posição (espaços não casam com nenhum termo)."""
+        start, end = self._segment(slot)
+        colon = self._terms.index(b":", start)
+        self._terms[colon + 1:end] = b" " * (end - colon - 1)
+        self._dead_bytes += end - start
+
+    def _plan(self, search: str) -> Tuple[Optional[Set[int]], List[bytes]]:
+        """Candidatos (None = todos) e padrões conferidos por tarefa."""
+        if self._plans_version != self._version:
+            self._plans.clear()
+            self._plans_version = self._version
+        plan = self._plans.get(search)
+        if plan is not None:
+            return plan
+        counted = sorted(
+            (self._terms.count(pattern), pattern)
+            for pattern in {b" " + term.encode() for term in tokenize(search)}
+        )
+        candidates: Optional[Set[int]] = None
+        residual: List[bytes] = []
+        for count, pattern in counted:
+            if count > MAX_SEARCH_CANDIDATES:
+                residual.append(pattern)
+            elif candidates is None:
+                candidates = self._find_ids(pattern)
+            elif candidates:
+                candidates &= self._find_ids(pattern)
+        if len(self._plans) >= _PLAN_CACHE_SIZE:
+            self._plans.clear()
+        plan = self._plans[search] = (candidates, residual)
+        return plan
+
+    def _find_ids(self, pattern: bytes) -> Set[int]:
+        """IDs das tarefas com algum termo começando por `pattern`."""
+        terms = self._terms
+        found: Set[int] = set()
+        pos = terms.find(pattern)
+        while pos >= 0:
+            start = terms.rfind(b"\n", 0, pos)
+            found.add(int(terms[start + 1:terms.index(b":", start)]))
+            # Um termo basta: segue para o próximo segmento
+            end = terms.find(b"\n", pos)
+            if end < 0:
+                break
+            pos = terms.find(pattern, end)
+        return found
+
+    def _matches(self, slot: int, patterns: List[bytes]) -> bool:
+        start, end = self._segment(slot)
+        segment = self._terms[start:end]
+        return all(pattern in segment for pattern in patterns)
+
+    # Materialização
+
+    def _todo(self, slot: int, dates: Dict[int, datetime]) -> dict:
+        """Dicionário de uma posição; `dates` reaproveita datas repetidas."""
+        return self._todos([slot], dates)[0]
+
+    def _todos(self, slots: Sequence[int], dates: Optional[Dict[int, datetime]] = None) -> List[dict]:
+        # Laço único com as colunas em variáveis locais: é o caminho de
+        # todas as leituras
+        dates = {} if dates is None else dates
+        tz = get_clock().tz
+        ids, text, done = self._ids, self._text, self._done
+        text_off, title_len, desc_len = self._text_off, self._title_len, self._desc_len
+        created, updated, versions = self._created, self._updated, self._versions
+        todos = []
+        for slot in slots:
+            start = text_off[slot]
+            middle = start + title_len[slot]
+            size = desc_len[slot]
+            stamps = []
+            for micros in (created[slot], updated[slot]):
+                value = dates.get(micros)
+                if value is None:
+                    value = dates[micros] = from_micros(micros, tz)
+                stamps.append(value)
+            todos.append({
+                "id": ids[slot],
+                "title": text[start:middle].decode(),
+                "description": None if size < 0 else text[middle:middle + size].decode(),
+                "completed": bool(done[slot >> 3] & (1 << (slot & 7))),
+                "created_at": stamps[0],
+                "updated_at": stamps[1],
+                "version": versions[slot],
+            })
+        return todos
+
+    # Escrita
+
+    def _append(self, data: dict, now: int) -> int:
+        todo_id = self._next_id
+        self._next_id += 1
+        slot = len(self._ids)
+        title, description = data["title"], data.get("description")
+        start, title_len, desc_len = self._write_text(title, description)
+        self._ids.append(todo_id)
+        self._created.append(now)
+        self._updated.append(now)
+        self._versions.append(1)
+        self._text_off.append(start)
+        self._title_len.append(title_len)
+        self._desc_len.append(desc_len)
+        self._term_off.append(self._write_terms(todo_id, title, description))
+        if slot & 7 == 0:
+            self._open.append(0)
+            self._done.append(0)
+        self._set_status(slot, bool(data.get("completed")))
+        self._live += 1
+        self._version += 1
+        return slot
+
+    def _update(
+        self, todo_id: int, data: dict, now: int, expected_version: Optional[int] = None
+    ) -> int:
+        slot = self._slot(todo_id)
+        if slot < 0:
+            return -1
+        current = self._versions[slot]
+        if expected_version is not None and expected_version != current:
+            raise VersionConflictError(todo_id, expected_version, current)
+        if "title" in data or "description" in data:
+            title, description = self._texts(slot)
+            title = data.get("title", title)
+            description = data.get("description", description)
+            self._dead_bytes += self._text_size(slot)
+            start, title_len, desc_len = self._write_text(title, description)
+            self._text_off[slot] = start
+            self._title_len[slot] = title_len
+            self._desc_len[slot] = desc_len
+            self._blank_terms(slot)
+            self._term_off[slot] = self._write_terms(todo_id, title, description)
+        if "completed" in data:
+            self._set_status(slot, bool(data["completed"]))
+        self._updated[slot] = now
+        self._versions[slot] = current + 1
+        self._version += 1
+        return slot
+
+    def _delete(self, todo_id: int) -> bool:
+        slot = self._slot(todo_id)
+        if slot < 0:
+            return False
+        self._set_status(slot, None)
+        self._blank_terms(slot)
+        self._dead_bytes += self._text_size(slot)
+        self._live -= 1
+        self._version += 1
+        return True
+
+    def _maybe_compact(self) -> None:
+        dead_slots = len(self._ids) - self._live
+        used_bytes = len(self._text) + len(self._terms) - self._dead_bytes
+        if dead_slots > max(COMPACT_MIN_SLOTS, self._live) or (
+            self._dead_bytes > max(COMPACT_MIN_BYTES, used_bytes)
+        ):
+            self.compact()
+
+    def compact(self) -> None:
+        """Descarta as posições removidas e os textos antigos."""
+        old = self.__dict__.copy()
+        slots = list(self._scan(0, None))
+        self._reset()
+        for slot in slots:
+            new = len(self._ids)
+            self._ids.append(old["_ids"][slot])
+            self._created.append(old["_created"][slot])
+            self._updated.append(old["_updated"][slot])
+            self._versions.append(old["_versions"][slot])
+            start = old["_text_off"][slot]
+            size = old["_title_len"][slot] + max(old["_desc_len"][slot], 0)
+            self._text_off.append(len(self._text))
+            self._text += old["_text"][start:start + size]
+            self._title_len.append(old["_title_len"][slot])
+            self._desc_len.append(old["_desc_len"][slot])
+            start = old["_term_off"][slot]
+            end = old["_terms"].find(b"\n", start + 1)
+            self._term_off.append(len(self._terms))
+            self._terms += old["_terms"][start:end if end >= 0 else len(old["_terms"])]
+            if new & 7 == 0:
+                self._open.append(0)
+                self._done.append(0)
+            self._set_status(new, bool(old["_done"][slot >> 3] & (1 << (slot & 7))))
+            self._live += 1
+
+    # Interface do backend
+
+    async def version(self) -> int:
+        return self._version
+
+    async def list(self) -> List[dict]:
+        return self._todos(list(self._scan(0, None)))
+
+    async def list_page(
+        self,
+        after_id: Optional[int],
+        limit: int,
+        completed: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> List[dict]:
+        candidates: Optional[Set[int]] = None
+        residual: List[bytes] = []
+        if search:
+            candidates, residual = self._plan(search)
+        page: List[int] = []
+        slots: Iterator[int]
+        if candidates is not None:
+            ordered = sorted(candidates)
+            start = bisect_right(ordered, after_id) if after_id is not None else 0
+            slots = (self._slot(todo_id) for todo_id in ordered[start:])
+            slots = (
+                slot for slot in slots
+                if slot >= 0 and (completed is None or self._is_done(slot) == completed)
+            )
+        else:
+            start = bisect_right(self._ids, after_id) if after_id is not None else 0
+            slots = self._scan(start, completed)
+        for slot in slots:
+            if residual and not self._matches(slot, residual):
+                continue
+            page.append(slot)
+            if len(page) == limit:
+                break
+        return self._todos(page)
+
+    async def get(self, todo_id: int) -> Optional[dict]:
+        slot = self._slot(todo_id)
+        return self._todo(slot, {}) if slot >= 0 else None
+
+    async def create(self, data: dict, now: datetime) -> dict:
+        return self._todo(self._append(data, to_micros(now)), {})
+
+    async def update(
+        self,
+        todo_id: int,
+        data: dict,
+        now: datetime,
+        expected_version: Optional[int] = None,
+    ) -> Optional[dict]:
+        slot = self._update(todo_id, data, to_micros(now), expected_version)
+        if slot < 0:
+            return None
+        todo = self._todo(slot, {})
+        self._maybe_compact()
+        return todo
+
+    async def delete(self, todo_id: int) -> bool:
+        deleted = self._delete(todo_id)
+        if deleted:
+            self._maybe_compact()
+        return deleted
+
+    async def create_many(self, items: Sequence[dict], now: datetime) -> List[dict]:
+        micros = to_micros(now)
+        return self._todos([self._append(data, micros) for data in items])
+
+    async def update_many(
+        self, updates: Sequence[Tuple[int, dict, Optional[int]]], now: datetime
+    ) -> List[UpdateResult]:
+        micros = to_micros(now)
+        dates: Dict[int, datetime] = {}
+        results: List[UpdateResult] = []
+        for todo_id, data, expected_version in updates:
+            try:
+                slot = self._update(todo_id, data, micros, expected_version)
+            except VersionConflictError as conflict:
+                results.append(conflict)
+                continue
+            results.append(self._todo(slot, dates) if slot >= 0 else None)
+        self._maybe_compact()
+        return results
+
+    async def delete_many(self, todo_ids: Sequence[int]) -> List[bool]:
+        deleted = [self._delete(todo_id) for todo_id in todo_ids]
+        self._maybe_compact()
+        return deleted
+
+    async def clear(self) -> None:
+        self.reset()
+
+    # Recuperação (ver `durable.py`)
+
+    @property
+    def next_id(self) -> int:
+        """ID da próxima tarefa criada."""
+        return self._next_id
+
+    @next_id.setter
+    def next_id(self, value: int) -> None:
+        self._next_id = max(self._next_id, value)
+
+    def restore(self, todo: dict) -> None:
+        """Grava uma tarefa como está (ID, datas e versão), criando-a se preciso."""
+        self.restore_many((todo,))
+
+    def restore_many(self, todos: Iterable[dict]) -> None:
+        """Grava um lote de tarefas como estão (usado ao carregar snapshots)."""
+        fields = ("title", "description", "completed")
+        # Tarefas de um mesmo lote costumam compartilhar as datas
+        last_date, last_micros = None, 0
+        for todo in todos:
+            todo_id = todo["id"]
+            created, updated = todo["created_at"], todo["updated_at"]
+            if updated is not last_date:
+                last_date, last_micros = updated, to_micros(updated)
+            updated_micros = last_micros
+            if created is not last_date:
+                last_date, last_micros = created, to_micros(created)
+            slot = self._slot(todo_id) if self._ids and todo_id <= self._ids[-1] else -1
+            if slot < 0:
+                # As colunas são ordenadas por ID: tarefas novas vêm depois das demais
+                if self._ids and todo_id <= self._ids[-1]:
+                    raise ValueError(f"Tarefa {todo_id} restaurada fora de ordem")
+                self._next_id = todo_id
+                slot = self._append(todo, updated_micros)
+            else:
+                self._update(todo_id, {key: todo.get(key) for key in fields}, updated_micros)
+            self._created[slot] = last_micros
+            self._versions[slot] = todo.get("version", 1)
+
+    def reset(self) -> None:
+        """Remove todas as tarefas (mesmo efeito de `clear`, sem corrotina)."""
+        self._reset()
+        self._version += 1
+
+    def discard(self, todo_id: int) -> bool:
+        """Remove uma tarefa (mesmo efeito de `delete`, sem corrotina)."""
+        deleted = self._delete(todo_id)
+        if deleted:
+            self._maybe_compact()
+        return deleted
+
+    def nbytes(self) -> int:
+        """Bytes ocupados pelas colunas, bitmaps e áreas de texto."""
+        columns = (
+            self._ids, self._created, self._updated, self._versions,
+            self._text_off, self._title_len, self._desc_len, self._term_off,
+        )
+        return (
+            sum(column.itemsize * len(column) for column in columns)
+            + len(self._open) + len(self._done) + len(self._text) + len(self._terms)
+        )
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "todos": self._live,
+            "completed": self._completed,
+            "slots": len(self._ids),
+            "bytes": self.nbytes(),
+            "dead_bytes": self._dead_bytes,
+            "version": self._version,
+        }
@@ -0,0 +1,659 @@
+"""
+Durabilidade dos backends em memória: log de escrita (WAL) e snapshots.
+
+Com `WAL_DIR` configurado, o backend em memória é envolvido por um
+`DurableBackend`. Cada mutação é aplicada na memória e registrada no WAL
+com o estado final das tarefas afetadas (ou os IDs removidos). Como os
+registros são idempotentes, a recuperação só precisa reaplicá-los em ordem
+sobre o último snapshot.
+
+Arquivos em `WAL_DIR`:
+
+- `wal-<n>.log` — segmentos do WAL, gravados em sequência
+- `snapshot-<n>.bin` — estado completo; a recuperação o carrega e reaplica
+  os segmentos a partir do `<n>`
+
+Os dois formatos são binários: registros com tamanho, CRC32 e operação,
+com as tarefas empacotadas (`struct`), datas em microssegundos. O snapshot
+é lido por `mmap`. Um registro incompleto no fim do último segmento (queda
+durante a gravação) é descartado.
+
+A durabilidade é ajustável (`WAL_SYNC`):
+
+- `always` — a resposta só é enviada depois do fsync do registro. As
+  escritas concorrentes compartilham o mesmo fsync (commit em grupo).
+- `interval` — fsync a cada `WAL_SYNC_INTERVAL` segundos, em uma thread;
+  uma queda do sistema perde no máximo esse intervalo.
+- `off` — grava no mesmo intervalo, sem fsync (sobrevive a reinícios do
+  processo, não a quedas do sistema).
+
+Quando o segmento atual passa de `WAL_SNAPSHOT_BYTES`, um novo snapshot é
+gravado em segundo plano e os segmentos anteriores são removidos. O
+snapshot percorre a coleção por cursor enquanto as escritas continuam: as
+alterações feitas durante a gravação estão no segmento novo e são
+reaplicadas por cima.
+
+O WAL pertence a um único processo (o diretório é travado na primeira
+escrita); com `WAL_DIR`, use um único worker.
+"""
+import asyncio
+import atexit
+import glob
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import (
+    IO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    runtime_checkable,
+)
+
+from ..clock import from_micros, get_clock, to_micros
+from .base import StorageBackend, UpdateResult
+
+if sys.platform != "win32":
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+SYNC_MODES = ("always", "interval", "off")
+
+WAL_MAGIC = b"TODOWAL1"
+SNAPSHOT_MAGIC = b"TODOSNP1"
+
+# Operações dos registros
+PUT, DELETE, CLEAR, END = 1, 2, 3, 4
+
+_RECORD = struct.Struct("<IIB")  # tamanho do conteúdo, CRC32, operação
+# ID, criação e atualização (µs), versão, concluída, bytes do título e da
+# descrição (-1 = sem descrição)
+_TODO = struct.Struct("<qqqqBIi")
+_COUNT = struct.Struct("<I")
+_END = struct.Struct("<qq")  # próximo ID, total de tarefas
+
+# Tarefas lidas por vez ao gravar um snapshot
+SNAPSHOT_CHUNK = 10_000
+
+_SEGMENT_RE = re.compile(r"(wal|snapshot)-(\d+)\.(log|bin)$")
+
+
+@runtime_checkable
+class RecoverableBackend(Protocol):
+    """Operações síncronas usadas na recuperação do WAL."""
+
+    next_id: int
+
+    def restore_many(self, todos: Iterable[dict]) -> None:
+        """Grava tarefas com os IDs, datas e versões informados."""
+
+    def discard(self, todo_id: int) -> bool:
+        """Remove uma tarefa, se existir."""
+
+    def reset(self) -> None:
+        """Remove todas as tarefas."""
+
+
+# Formato dos registros
+
+def _frame(op: int, payload: bytes) -> bytes:
+    crc = zlib.crc32(payload, zlib.crc32(bytes((op,))))
+    return _RECORD.pack(len(payload), crc, op) + payload
+
+
+def encode_put(todos: Sequence[dict]) -> bytes:
+    """Registro com o estado completo de um lote de tarefas."""
+    micros: Dict[datetime, int] = {}
+    parts = [_COUNT.pack(len(todos))]
+    for todo in todos:
+        created, updated = todo["created_at"], todo["updated_at"]
+        if created not in micros:
+            micros[created] = to_micros(created)
+        if updated not in micros:
+            micros[updated] = to_micros(updated)
+        title = todo["title"].encode()
+        description = todo.get("description")
+        desc = description.encode() if description is not None else b""
+        parts.append(_TODO.pack(
+            todo["id"], micros[created], micros[updated], todo.get("version", 1),
+            bool(todo.get("completed")), len(title), -1 if description is None else len(desc),
+        ))
+        parts.append(title)
+        parts.append(desc)
+    return _frame(PUT, b"".join(parts))
+
+
+def encode_delete(todo_ids: Sequence[int]) -> bytes:
+    """Registro de remoção de tarefas."""
+    return _frame(DELETE, _COUNT.pack(len(todo_ids)) + struct.pack(f"<{len(todo_ids)}q", *todo_ids))
+
+
+def encode_clear() -> bytes:
+    return _frame(CLEAR, b"")
+
+
+def decode_put(payload: bytes) -> Iterator[dict]:
+    tz = get_clock().tz
+    dates: Dict[int, datetime] = {}
+    (count,) = _COUNT.unpack_from(payload, 0)
+    pos = _COUNT.size
+    for _ in range(count):
+        todo_id, created, updated, version, completed, title_len, desc_len = (
+            _TODO.unpack_from(payload, pos)
+        )
+        pos += _TODO.size
+        title = payload[pos:pos + title_len].decode()
+        pos += title_len
+        description = None
+        if desc_len >= 0:
+            description = payload[pos:pos + desc_len].decode()
+            pos += desc_len
+        for micros in (created, updated):
+            if micros not in dates:
+                dates[micros] = from_micros(micros, tz)
+        yield {
+            "id": todo_id,
+            "title": title,
+            "description": description,
+            "completed": bool(completed),
+            "created_at": dates[created],
+            "updated_at": dates[updated],
+            "version": version,
+        }
+
+
+def decode_delete(payload: bytes) -> Tuple[int, ...]:
+    (count,) = _COUNT.unpack_from(payload, 0)
+    return struct.unpack_from(f"<{count}q", payload, _COUNT.size)
+
+
+def read_records(buffer, pos: int) -> Iterator[Tuple[int, bytes, int]]:
+    """
+    Registros `(operação, conteúdo, fim)` a partir de `pos`.
+
+    Para no primeiro registro incompleto ou com CRC inválido; o `fim` do
+    último registro produzido indica até onde o arquivo é válido.
+    """
+    size_total = len(buffer)
+    while pos + _RECORD.size <= size_total:
+        size, crc, op = _RECORD.unpack_from(buffer, pos)
+        start = pos + _RECORD.size
+        end = start + size
+        if end > size_total:
+            return
+        payload = buffer[start:end]
+        if zlib.crc32(payload, zlib.crc32(bytes((op,)))) != crc:
+            return
+        yield op, payload, end
+        pos = end
+
+
+# Arquivos
+
+def _path(directory: str, kind: str, number: int) -> str:
+    suffix = "log" if kind == "wal" else "bin"
+    return os.path.join(directory, f"{kind}-{number:08d}.{suffix}")
+
+
+def _numbers(directory: str, kind: str) -> List[int]:
+    numbers = []
+    for path in glob.glob(os.path.join(directory, f"{kind}-*")):
+        match = _SEGMENT_RE.search(os.path.basename(path))
+        if match and match.group(1) == kind:
+            numbers.append(int(match.group(2)))
+    return sorted(numbers)
+
+
+def _fsync_directory(directory: str) -> None:
+    if os.name != "posix":  # pragma: no cover
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _apply(backend: RecoverableBackend, op: int, payload: bytes) -> None:
+    if op == PUT:
+        backend.restore_many(decode_put(payload))
+    elif op == DELETE:
+        for todo_id in decode_delete(payload):
+            backend.discard(todo_id)
+    elif op == CLEAR:
+        backend.reset()
+
+
+def load_snapshot(path: str, backend: RecoverableBackend) -> int:
+    """Carrega um snapshot no backend e retorna a quantidade de tarefas."""
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        if buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"Snapshot inválido: {path}")
+        for op, payload, _ in read_records(buffer, len(SNAPSHOT_MAGIC)):
+            if op == END:
+                next_id, count = _END.unpack(payload)
+                backend.next_id = next_id
+                return count
+            _apply(backend, op, payload)
+    raise ValueError(f"Snapshot incompleto ou corrompido: {path}")
+
+
+def replay_segment(path: str, backend: RecoverableBackend, last: bool) -> int:
+    """
+    Reaplica um segmento do WAL e retorna a quantidade de registros.
+
+    Um final inválido só é aceito no último segmento (gravação
+    interrompida) e é removido do arquivo.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:len(WAL_MAGIC)] != WAL_MAGIC:
+        if not data and last:
+            return 0
+        raise ValueError(f"Segmento do WAL inválido: {path}")
+    records, valid = 0, len(WAL_MAGIC)
+    for op, payload, valid in read_records(data, len(WAL_MAGIC)):
+        _apply(backend, op, payload)
+        records += 1
+    if valid < len(data):
+        if not last:
+            raise ValueError(f"Segmento do WAL corrompido: {path} (byte {valid})")
+        logger.warning("WAL: descartando %d bytes incompletos no fim de %s", len(data) - valid, path)
+        with open(path, "r+b") as file:
+            file.truncate(valid)
+    return records
+
+
+def recover(directory: str, backend: RecoverableBackend) -> int:
+    """
+    Restaura o backend a partir do último snapshot e dos segmentos do WAL.
+
+    Retorna o número do segmento em que as próximas escritas devem ser
+    gravadas.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.tmp")):
+        os.remove(path)
+    started = time.perf_counter()
+    first, count = 1, 0
+    snapshots = _numbers(directory, "snapshot")
+    if snapshots:
+        first = snapshots[-1]
+        count = load_snapshot(_path(directory, "snapshot", first), backend)
+    segments = [number for number in _numbers(directory, "wal") if number >= first]
+    records = 0
+    for number in segments:
+        records += replay_segment(
+            _path(directory, "wal", number), backend, last=number == segments[-1]
+        )
+    if count or records:
+        logger.info(
+            "WAL: %d tarefas do snapshot e %d registros recuperados em %.2f s",
+            count, records, time.perf_counter() - started,
+        )
+    return max(segments[-1] if segments else 0, first - 1) + 1
+
+
+class WriteAheadLog:
+    """
+    Gravação dos registros em segmentos, por uma thread dedicada.
+
+    `append` só acrescenta o registro a um buffer; a thread grava o buffer
+    acumulado de uma vez (e faz um único fsync para todos os registros).
+    """
+
+    def __init__(self, directory: str, segment: int, sync: str = "interval", interval: float = 0.05):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"WAL_SYNC inválido: {sync} (use {', '.join(SYNC_MODES)})")
+        self.directory = directory
+        self.segment = segment
+        self.sync = sync
+        self.interval = interval
+        self.segment_bytes = 0
+        self.records = 0
+        self.syncs = 0
+        self._cond = threading.Condition()
+        self._io = threading.Lock()
+        self._buffer = bytearray()
+        self._appended = 0
+        self._durable = 0
+        self._waiters: List[Tuple[int, asyncio.Future]] = []
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._pid: Optional[int] = None
+        self._file: Optional[IO[bytes]] = None
+        self._lock_file: Optional[IO[str]] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _start(self) -> None:
+        # Aberto na primeira escrita de cada processo, para que o mestre de
+        # `boilerplate serve` possa importar a aplicação antes do fork
+        self._pid = os.getpid()
+        self._lock_file = open(os.path.join(self.directory, "LOCK"), "a")
+        if sys.platform != "win32":
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise RuntimeError(f"WAL_DIR em uso por outro processo: {self.directory}") from None
+        self._file = self._open_segment()
+        self._thread = threading.Thread(target=self._run, name="wal-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _open_segment(self) -> IO[bytes]:
+        file = open(_path(self.directory, "wal", self.segment), "ab")
+        if file.tell() == 0:
+            file.write(WAL_MAGIC)
+            file.flush()
+            _fsync_directory(self.directory)
+        return file
+
+    def append(self, record: bytes) -> int:
+        """Acrescenta um registro; retorna sua posição para `wait`."""
+        if self._pid != os.getpid():
+            self._start()
+        with self._cond:
+            if self._error is not None:
+                raise RuntimeError("WAL indisponível") from self._error
+            self._buffer += record
+            self._appended += 1
+            self.records += 1
+            self.segment_bytes += len(record)
+            if self.sync == "always":
+                self._cond.notify()
+            return self._appended
+
+    async def wait(self, position: int) -> None:
+        """No modo `always`, aguarda o fsync do registro `position`."""
+        if self.sync != "always":
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        with self._cond:
+            if self._error is not None:
+                raise RuntimeError("WAL indisponível") from self._error
+            if self._durable >= position:
+                return
+            self._waiters.append((position, waiter))
+        await waiter
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self.sync == "always":
+                    while not self._buffer and not self._closed:
+                        self._cond.wait()
+                elif not self._closed:
+                    self._cond.wait(self.interval)
+                closing = self._closed
+            try:
+                self.flush(force=closing)
+            except Exception as exc:  # disco cheio, permissões...
+                logger.exception("WAL: falha ao gravar em %s", self.directory)
+                with self._cond:
+                    self._error = exc
+                    waiters, self._waiters = self._waiters, []
+                for _, waiter in waiters:
+                    _notify(waiter, exc)
+                return
+            if closing:
+                return
+
+    def flush(self, force: bool = False) -> None:
+        """Grava os registros pendentes (com fsync, exceto no modo `off`)."""
+        with self._io:
+            with self._cond:
+                data, self._buffer = self._buffer, bytearray()
+                position = self._appended
+            if data:
+                assert self._file is not None  # aberto por `_start` antes do primeiro registro
+                self._file.write(data)
+                self._file.flush()
+                if force or self.sync != "off":
+                    os.fsync(self._file.fileno())
+                    self.syncs += 1
+            self._mark_durable(position)
+
+    def rotate(self) -> int:
+        """
+        Passa a gravar em um novo segmento e retorna o seu número.
+
+        Os segmentos anteriores ficam completos e sincronizados.
+        """
+        if self._pid != os.getpid():
+            self._start()
+        with self._io:
+            with self._cond:
+                data, self._buffer = self._buffer, bytearray()
+                position = self._appended
+                self.segment += 1
+                self.segment_bytes = 0
+            previous = self._file
+            assert previous is not None
+            previous.write(data)
+            previous.flush()
+            os.fsync(previous.fileno())
+            previous.close()
+            self._file = self._open_segment()
+            self._mark_durable(position)
+        return self.segment
+
+    def _mark_durable(self, position: int) -> None:
+        with self._cond:
+            self._durable = max(self._durable, position)
+            ready = [waiter for pos, waiter in self._waiters if pos <= position]
+            self._waiters = [item for item in self._waiters if item[0] > position]
+        for waiter in ready:
+            _notify(waiter)
+
+    def close(self) -> None:
+        """Grava e sincroniza os registros pendentes e encerra a thread."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        assert self._file is not None and self._lock_file is not None
+        self._file.close()
+        self._lock_file.close()
+        atexit.unregister(self.close)
+
+
+def _notify(waiter: asyncio.Future, error: Optional[BaseException] = None) -> None:
+    """Conclui a espera de uma corrotina a partir da thread do WAL."""
+    def resolve():
+        if waiter.done():
+            return
+        if error is None:
+            waiter.set_result(None)
+        else:
+            waiter.set_exception(RuntimeError("WAL indisponível"))
+
+    try:
+        waiter.get_loop().call_soon_threadsafe(resolve)
+    except RuntimeError:  # event loop já encerrado
+        pass
+
+
+class DurableBackend(StorageBackend):
+    """
+    Backend em memória com WAL e snapshots.
+
+    O backend envolvido precisa oferecer as operações síncronas usadas na
+    recuperação (`RecoverableBackend`), como `MemoryBackend` e
+    `CompactMemoryBackend`. Suas corrotinas não podem
+    suspender: o registro é montado logo após a mutação, antes que outra
+    requisição altere as mesmas tarefas.
+    """
+
+    def __init__(
+        self,
+        backend: StorageBackend,
+        directory: str,
+        sync: str = "interval",
+        interval: float = 0.05,
+        snapshot_bytes: int = 64 * 1024 * 1024,
+    ):
+        if not isinstance(backend, RecoverableBackend):
+            raise ValueError(f"WAL_DIR não se aplica a {type(backend).__name__}")
+        self.backend = backend
+        # A versão recomeça na recuperação: a época é a do backend envolvido
+        self.epoch = backend.epoch
+        self.directory = directory
+        self.snapshot_bytes = snapshot_bytes
+        self.snapshots = 0
+        self._snapshot_task: Optional[asyncio.Future] = None
+        self.wal = WriteAheadLog(directory, recover(directory, backend), sync, interval)
+
+    async def _log(self, record: bytes) -> None:
+        position = self.wal.append(record)
+        if self.wal.segment_bytes >= self.snapshot_bytes and not self._snapshot_running():
+            self._snapshot_task = asyncio.ensure_future(self._snapshot_in_background())
+        await self.wal.wait(position)
+
+    def _snapshot_running(self) -> bool:
+        task = self._snapshot_task
+        return task is not None and not task.done() and not task.get_loop().is_closed()
+
+    async def _snapshot_in_background(self) -> None:
+        try:
+            await self.snapshot()
+        except Exception:
+            logger.exception("WAL: falha ao gravar o snapshot em %s", self.directory)
+
+    async def snapshot(self) -> str:
+        """Grava um snapshot e remove os segmentos que ele substitui."""
+        # Rotação e limite lidos juntos, sem ceder o event loop: as tarefas
+        # com ID a partir de `limit` foram criadas depois e estão inteiras no
+        # segmento novo, que a recuperação reaplica por cima do snapshot
+        segment = self.wal.rotate()
+        limit = self.backend.next_id
+        path = _path(self.directory, "snapshot", segment)
+        tmp = path + ".tmp"
+        started = time.perf_counter()
+        count, after = 0, None
+        with open(tmp, "wb") as file:
+            file.write(SNAPSHOT_MAGIC)
+            while True:
+                chunk = await self.backend.list_page(after, SNAPSHOT_CHUNK)
+                chunk = [todo for todo in chunk if todo["id"] < limit]
+                if not chunk:
+                    break
+                # Serializado antes do próximo await: as tarefas do backend
+                # em memória são os próprios dicionários armazenados
+                data = encode_put(chunk)
+                await asyncio.to_thread(file.write, data)
+                count += len(chunk)
+                after = chunk[-1]["id"]
+            file.write(_frame(END, _END.pack(limit, count)))
+            file.flush()
+            await asyncio.to_thread(os.fsync, file.fileno())
+        os.replace(tmp, path)
+        _fsync_directory(self.directory)
+        for number in _numbers(self.directory, "snapshot"):
+            if number < segment:
+                os.remove(_path(self.directory, "snapshot", number))
+        for number in _numbers(self.directory, "wal"):
+            if number < segment:
+                os.remove(_path(self.directory, "wal", number))
+        self.snapshots += 1
+        logger.info(
+            "WAL: snapshot com %d tarefas gravado em %.2f s", count, time.perf_counter() - started
+        )
+        return path
+
+    async def version(self) -> int:
+        return await self.backend.version()
+
+    async def list(self) -> List[dict]:
+        return await self.backend.list()
+
+    async def list_page(
+        self,
+        after_id: Optional[int],
+        limit: int,
+        completed: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> List[dict]:
+        return await self.backend.list_page(after_id, limit, completed=completed, search=search)
+
+    async def get(self, todo_id: int) -> Optional[dict]:
+        return await self.backend.get(todo_id)
+
+    async def create(self, data: dict, now: datetime) -> dict:
+        todo = await self.backend.create(data, now)
+        await self._log(encode_put([todo]))
+        return todo
+
+    async def update(
+        self,
+        todo_id: int,
+        data: dict,
+        now: datetime,
+        expected_version: Optional[int] = None,
+    ) -> Optional[dict]:
+        todo = await self.backend.update(todo_id, data, now, expected_version)
+        if todo is not None:
+            await self._log(encode_put([todo]))
+        return todo
+
+    async def delete(self, todo_id: int) -> bool:
+        deleted = await self.backend.delete(todo_id)
+        if deleted:
+            await self._log(encode_delete([todo_id]))
+        return deleted
+
+    async def create_many(self, items: Sequence[dict], now: datetime) -> List[dict]:
+        todos = await self.backend.create_many(items, now)
+        if todos:
+            await self._log(encode_put(todos))
+        return todos
+
+    async def update_many(
+        self, updates: Sequence[Tuple[int, dict, Optional[int]]], now: datetime
+    ) -> List[UpdateResult]:
+        results = await self.backend.update_many(updates, now)
+        todos = [todo for todo in results if isinstance(todo, dict)]
+        if todos:
+            await self._log(encode_put(todos))
+        return results
+
+    async def delete_many(self, todo_ids: Sequence[int]) -> List[bool]:
+        deleted = await self.backend.delete_many(todo_ids)
+        removed = [todo_id for todo_id, ok in zip(todo_ids, deleted) if ok]
+        if removed:
+            await self._log(encode_delete(removed))
+        return deleted
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+        await self._log(encode_clear())
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self.backend.stats(),
+            "wal_segment": self.wal.segment,
+            "wal_segment_bytes": self.wal.segment_bytes,
+            "wal_records": self.wal.records,
+            "wal_syncs": self.wal.syncs,
+            "snapshots": self.snapshots,
+        }
+
+    def close(self) -> None:
+        self.wal.close()
+        self.backend.close()
@@ -0,0 +1,258 @@
+"""
+Backend de armazenamento em memória.
+
+Mantém as tarefas em um dicionário do processo. É rápido, mas cada worker
+possui sua própria cópia e os dados são perdidos ao reiniciar.
+"""
+import secrets
+from bisect import bisect_right, insort
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ..search import InvertedIndex
+from .base import StorageBackend, UpdateResult, VersionConflictError
+
+# Abaixo desta fração do total, ordenar os candidatos é mais barato que
+# percorrer o índice de IDs filtrando por pertinência.
+_SPARSE_RATIO = 8
+
+
+class MemoryBackend(StorageBackend):
+    """Armazena as tarefas em um dicionário `id -> tarefa`."""
+
+    def __init__(self, data: Optional[Dict[int, dict]] = None):
+        self.data: Dict[int, dict] = data if data is not None else {}
+        self._next_id = max(self.data, default=0) + 1
+        # Índice ordenado de IDs usado na paginação por cursor
+        self._ids: List[int] = []
+        # Índices secundários mantidos incrementalmente
+        self._search = InvertedIndex()
+        self._by_status: Dict[bool, Set[int]] = {True: set(), False: set()}
+        self._version = 0
+        self.epoch = secrets.token_hex(4)
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._ids = sorted(self.data)
+        self._search.rebuild(self.data.values())
+        self._by_status = {True: set(), False: set()}
+        for todo in self.data.values():
+            self._by_status[bool(todo.get("completed"))].add(todo["id"])
+
+    def _index(self) -> List[int]:
+        """Retorna o índice de IDs, reconstruindo os índices se `data` foi alterado por fora."""
+        if len(self._ids) != len(self.data):
+            self._reindex()
+            self._version += 1
+        return self._ids
+
+    async def version(self) -> int:
+        self._index()
+        return self._version
+
+    async def list(self) -> List[dict]:
+        return list(self.data.values())
+
+    async def list_page(
+        self,
+        after_id: Optional[int],
+        limit: int,
+        completed: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> List[dict]:
+        ids = self._index()
+        candidates: Optional[Set[int]] = None
+        residual: List[str] = []
+        if search:
+            candidates, residual = self._search.plan(search)
+        if completed is not None:
+            status_ids = self._by_status[completed]
+            candidates = status_ids if candidates is None else candidates & status_ids
+
+        if candidates is not None and len(candidates) * _SPARSE_RATIO < len(ids):
+            # Poucos candidatos: ordená-los é mais barato que percorrer o índice
+            ordered = sorted(candidates)
+            start = bisect_right(ordered, after_id) if after_id is not None else 0
+            if not residual:
+                page = ordered[start:start + limit]
+            else:
+                page = self._take(ordered, start, limit, None, residual)
+        else:
+            start = bisect_right(ids, after_id) if after_id is not None else 0
+            if candidates is None and not residual:
+                page = ids[start:start + limit]
+            else:
+                page = self._take(ids, start, limit, candidates, residual)
+        return [self.data[todo_id] for todo_id in page]
+
+    def _take(
+        self,
+        ordered: List[int],
+        start: int,
+        limit: int,
+        candidates: Optional[Set[int]],
+        residual: List[str],
+    ) -> List[int]:
+        """Percorre `ordered` a partir de `start` até completar a página."""
+        page: List[int] = []
+        for pos in range(start, len(ordered)):
+            todo_id = ordered[pos]
+            if candidates is not None and todo_id not in candidates:
+                continue
+            if residual and not self._search.matches(todo_id, residual):
+                continue
+            page.append(todo_id)
+            if len(page) == limit:
+                break
+        return page
+
+    async def get(self, todo_id: int) -> Optional[dict]:
+        return self.data.get(todo_id)
+
+    def _create(self, data: dict, now: datetime) -> dict:
+        todo_id = self._next_id
+        todo = {
+            "id": todo_id,
+            **data,
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
+        }
+        self.data[todo_id] = todo
+        # IDs são crescentes, então o append mantém o índice ordenado
+        self._ids.append(todo_id)
+        self._search.add(todo_id, todo.get("title"), todo.get("description"))
+        self._by_status[bool(todo.get("completed"))].add(todo_id)
+        self._next_id += 1
+        self._version += 1
+        return todo
+
+    def _update(
+        self, todo_id: int, data: dict, now: datetime, expected_version: Optional[int] = None
+    ) -> Optional[dict]:
+        todo = self.data.get(todo_id)
+        if todo is None:
+            return None
+        current = todo.get("version", 1)
+        # Sem await entre a verificação e a escrita: o compare-and-swap é
+        # atômico em relação às demais corrotinas do event loop.
+        if expected_version is not None and expected_version != current:
+            raise VersionConflictError(todo_id, expected_version, current)
+        was_completed = bool(todo.get("completed"))
+        todo.update({**data, "updated_at": now, "version": current + 1})
+        if "title" in data or "description" in data:
+            self._search.add(todo_id, todo.get("title"), todo.get("description"))
+        if bool(todo.get("completed")) != was_completed:
+            self._by_status[was_completed].discard(todo_id)
+            self._by_status[not was_completed].add(todo_id)
+        self._version += 1
+        return todo
+
+    def _delete(self, todo_id: int) -> bool:
+        todo = self.data.pop(todo_id, None)
+        if todo is None:
+            return False
+        ids = self._ids
+        pos = bisect_right(ids, todo_id) - 1
+        if pos >= 0 and ids[pos] == todo_id:
+            del ids[pos]
+        self._search.remove(todo_id)
+        self._by_status[bool(todo.get("completed"))].discard(todo_id)
+        self._version += 1
+        return True
+
+    async def create(self, data: dict, now: datetime) -> dict:
+        self._index()
+        return self._create(data, now)
+
+    async def update(
+        self,
+        todo_id: int,
+        data: dict,
+        now: datetime,
+        expected_version: Optional[int] = None,
+    ) -> Optional[dict]:
+        self._index()
+        return self._update(todo_id, data, now, expected_version)
+
+    async def delete(self, todo_id: int) -> bool:
+        self._index()
+        return self._delete(todo_id)
+
+    async def create_many(self, items: Sequence[dict], now: datetime) -> List[dict]:
+        self._index()
+        return [self._create(data, now) for data in items]
+
+    async def update_many(
+        self, updates: Sequence[Tuple[int, dict, Optional[int]]], now: datetime
+    ) -> List[UpdateResult]:
+        self._index()
+        results: List[UpdateResult] = []
+        for todo_id, data, expected_version in updates:
+            try:
+                results.append(self._update(todo_id, data, now, expected_version))
+            except VersionConflictError as conflict:
+                results.append(conflict)
+        return results
+
+    async def delete_many(self, todo_ids: Sequence[int]) -> List[bool]:
+        self._index()
+        return [self._delete(todo_id) for todo_id in todo_ids]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "todos": len(self.data),
+            "completed": len(self._by_status[True]),
+            "indexed_terms": self._search.term_count,
+            "version": self._version,
+        }
+
+    async def clear(self) -> None:
+        self.reset()
+
+    # Recuperação (ver `durable.py`)
+
+    @property
+    def next_id(self) -> int:
+        """ID da próxima tarefa criada."""
+        return self._next_id
+
+    @next_id.setter
+    def next_id(self, value: int) -> None:
+        self._next_id = max(self._next_id, value)
+
+    def restore(self, todo: dict) -> None:
+        """Grava uma tarefa como está (ID, datas e versão), criando-a se preciso."""
+        self.restore_many((todo,))
+
+    def restore_many(self, todos: Iterable[dict]) -> None:
+        """Grava um lote de tarefas como estão (usado ao carregar snapshots)."""
+        data, ids, status = self.data, self._index(), self._by_status
+        index = self._search
+        for todo in todos:
+            todo_id = todo["id"]
+            previous = data.get(todo_id)
+            if previous is None:
+                if not ids or ids[-1] < todo_id:
+                    ids.append(todo_id)
+                else:
+                    insort(ids, todo_id)
+            else:
+                status[bool(previous.get("completed"))].discard(todo_id)
+            data[todo_id] = todo
+            index.add(todo_id, todo.get("title"), todo.get("description"))
+            status[bool(todo.get("completed"))].add(todo_id)
+        if ids:
+            self._next_id = max(self._next_id, ids[-1] + 1)
+        self._version += 1
+
+    def reset(self) -> None:
+        """Remove todas as tarefas (mesmo efeito de `clear`, sem corrotina)."""
+        self.data.clear()
+        self._reindex()
+        self._version += 1
+
+    def discard(self, todo_id: int) -> bool:
+        """Remove uma tarefa (mesmo efeito de `delete`, sem corrotina)."""
+        self._index()
+        return self._delete(todo_id)
@@ -0,0 +1,609 @@
+"""
+Backend de armazenamento SQLite.
+
+Usa o módulo `sqlite3` da biblioteca padrão com um pool limitado de conexões.
+As operações bloqueantes rodam em threads (`asyncio.to_thread`) para não
+travar o event loop. O banco é aberto em modo WAL, permitindo leituras
+concorrentes de vários workers enquanto um deles escreve.
+"""
+import asyncio
+import itertools
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from ..changes import CREATED, DELETED, UPDATED, Entry, encode_todo
+from ..search import matches_terms, tokenize
+from .base import StorageBackend, UpdateResult, VersionConflictError
+
+# Comandos SQL fixos: o sqlite3 mantém um cache de statements preparados
+# por conexão, então reutilizar o mesmo texto evita recompilar a cada chamada.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS ix_todos_completed ON todos (completed, id);
+CREATE TABLE IF NOT EXISTS todos_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO todos_meta (id, version) VALUES (1, 0);
+CREATE TABLE IF NOT EXISTS todos_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    todo_id INTEGER NOT NULL,
+    todo BLOB
+);
+CREATE TABLE IF NOT EXISTS todos_changes_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    epoch TEXT NOT NULL
+);
+INSERT OR IGNORE INTO todos_changes_meta (id, epoch) VALUES (1, lower(hex(randomblob(4))));
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    record BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+"""
+# Índice de busca textual (FTS5) mantido por triggers a cada escrita
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+    title, description,
+    content='todos', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN
+    INSERT INTO todos_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN
+    INSERT INTO todos_fts (todos_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF title, description ON todos
+WHEN old.title IS NOT new.title OR old.description IS NOT new.description BEGIN
+    INSERT INTO todos_fts (todos_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO todos_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+"""
+FTS_EXISTS = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'todos_fts'"
+FTS_REBUILD = "INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')"
+SELECT_VERSION = "SELECT version FROM todos_meta WHERE id = 1"
+BUMP_VERSION = "UPDATE todos_meta SET version = version + 1 WHERE id = 1"
+SELECT_ALL = "SELECT * FROM todos ORDER BY id"
+SELECT_ONE = "SELECT * FROM todos WHERE id = ?"
+INSERT = (
+    "INSERT INTO todos (title, description, completed, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+# O filtro opcional por versão torna a atualização um compare-and-swap atômico
+UPDATE = (
+    "UPDATE todos SET "
+    "title = COALESCE(?, title), "
+    "description = COALESCE(?, description), "
+    "completed = COALESCE(?, completed), "
+    "updated_at = ?, "
+    "version = version + 1 "
+    "WHERE id = ? AND (? IS NULL OR version = ?)"
+)
+SELECT_ITEM_VERSION = "SELECT version FROM todos WHERE id = ?"
+ADD_VERSION_COLUMN = "ALTER TABLE todos ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+INSERT_WITH_ID = (
+    "INSERT INTO todos (id, title, description, completed, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+# Próximo ID considerando o contador do AUTOINCREMENT e o maior ID existente
+LAST_ID = (
+    "SELECT MAX("
+    "COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'todos'), 0), "
+    "COALESCE((SELECT MAX(id) FROM todos), 0))"
+)
+DELETE = "DELETE FROM todos WHERE id = ?"
+# Registro de alterações (`StorageChangeFeed`), mantido nas últimas N
+INSERT_CHANGE = "INSERT INTO todos_changes (op, todo_id, todo) VALUES (?, ?, ?)"
+PRUNE_CHANGES = "DELETE FROM todos_changes WHERE seq <= ?"
+SELECT_LAST_CHANGE = "SELECT COALESCE(MAX(seq), 0) FROM todos_changes"
+SELECT_CHANGES = "SELECT seq, op, todo_id, todo FROM todos_changes WHERE seq > ? ORDER BY seq LIMIT ?"
+SELECT_CHANGES_EPOCH = "SELECT epoch FROM todos_changes_meta WHERE id = 1"
+DELETE_ALL = "DELETE FROM todos"
+# Chaves de idempotência (`StorageIdempotencyStore`), com expiração pelo relógio
+SELECT_IDEMPOTENCY = "SELECT record FROM idempotency_keys WHERE key = ? AND expires_at > ?"
+UPSERT_IDEMPOTENCY = "INSERT OR REPLACE INTO idempotency_keys (key, expires_at, record) VALUES (?, ?, ?)"
+DELETE_IDEMPOTENCY = "DELETE FROM idempotency_keys WHERE key = ?"
+PRUNE_IDEMPOTENCY = "DELETE FROM idempotency_keys WHERE expires_at <= ?"
+
+_memory_ids = itertools.count(1)
+
+# Limite de parâmetros por consulta `IN (...)` (o SQLite aceita no mínimo 999)
+_IN_CHUNK = 500
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict:
+    """Converte uma linha do SQLite no formato de dicionário do serviço."""
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "description": row["description"],
+        "completed": bool(row["completed"]),
+        "created_at": datetime.fromisoformat(row["created_at"]),
+        "updated_at": datetime.fromisoformat(row["updated_at"]),
+        "version": row["version"],
+    }
+
+
+def _todo_matches(title: Optional[str], description: Optional[str], terms: str) -> bool:
+    return matches_terms(terms.split(), title, description)
+
+
+def _page_query(
+    after_id: Optional[int],
+    limit: int,
+    completed: Optional[bool],
+    search: Optional[str],
+    fts: bool,
+) -> Tuple[str, list]:
+    """Monta a consulta de uma página com os filtros informados."""
+    sql = "SELECT todos.* FROM todos"
+    where = ["todos.id > ?"]
+    params: list = [after_id or 0]
+    terms = tokenize(search)
+    if terms and fts:
+        # Cada termo é buscado como prefixo; todos precisam estar presentes
+        sql += " JOIN todos_fts ON todos_fts.rowid = todos.id"
+        where.append("todos_fts MATCH ?")
+        params.append(" ".join(f'"{term}"*' for term in terms))
+    elif terms:
+        # Sem FTS5: a mesma tokenização e busca por prefixo, em Python
+        where.append("todo_matches(todos.title, todos.description, ?)")
+        params.append(" ".join(terms))
+    if completed is not None:
+        where.append("todos.completed = ?")
+        params.append(int(completed))
+    sql += " WHERE " + " AND ".join(where) + " ORDER BY todos.id LIMIT ?"
+    params.append(limit)
+    return sql, params
+
+
+def _select_many(conn: sqlite3.Connection, todo_ids: Sequence[int]) -> Dict[int, dict]:
+    """Busca várias tarefas pelo ID, em blocos de `_IN_CHUNK` parâmetros."""
+    found: Dict[int, dict] = {}
+    for i in range(0, len(todo_ids), _IN_CHUNK):
+        chunk = todo_ids[i:i + _IN_CHUNK]
+        sql = f"SELECT * FROM todos WHERE id IN ({','.join('?' * len(chunk))})"
+        for row in conn.execute(sql, chunk):
+            found[row["id"]] = _row_to_dict(row)
+    return found
+
+
+def _existing_ids(conn: sqlite3.Connection, todo_ids: Sequence[int]) -> Set[int]:
+    return set(_current_versions(conn, todo_ids))
+
+
+def _current_versions(conn: sqlite3.Connection, todo_ids: Sequence[int]) -> Dict[int, int]:
+    """Versão atual de cada tarefa existente entre `todo_ids`."""
+    versions: Dict[int, int] = {}
+    for i in range(0, len(todo_ids), _IN_CHUNK):
+        chunk = todo_ids[i:i + _IN_CHUNK]
+        sql = f"SELECT id, version FROM todos WHERE id IN ({','.join('?' * len(chunk))})"
+        versions.update((row[0], row[1]) for row in conn.execute(sql, chunk))
+    return versions
+
+
+def _as_int(value: Optional[bool]) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+class ConnectionPool:
+    """
+    Pool limitado de conexões SQLite.
+
+    No máximo `size` conexões ficam abertas; chamadas além desse limite
+    aguardam uma conexão ser devolvida.
+    """
+
+    def __init__(self, factory: Callable[[], sqlite3.Connection], size: int = 5):
+        self._factory = factory
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Empresta uma conexão do pool, criando-a sob demanda."""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._factory()
+                with self._lock:
+                    self._connections.append(conn)
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+    def stats(self) -> Dict[str, float]:
+        """Tamanho do pool, conexões abertas e conexões em uso."""
+        opened = len(self._connections)
+        return {
+            "pool_size": self.size,
+            "pool_open": opened,
+            "pool_in_use": opened - self._idle.qsize(),
+        }
+
+    def close(self) -> None:
+        """Fecha todas as conexões abertas."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._idle = queue.LifoQueue()
+
+
+class SQLiteBackend(StorageBackend):
+    """Armazena as tarefas em um arquivo SQLite compartilhado entre workers."""
+
+    def __init__(self, path: str, pool_size: int = 5, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._uri = False
+        self._anchor: Optional[sqlite3.Connection] = None
+        if path in ("", ":memory:"):
+            # Banco em memória compartilhado entre as conexões do pool. Com
+            # cache compartilhado, os bloqueios de tabela geram SQLITE_LOCKED,
+            # que o busy_timeout não repete: uma única conexão serializa o acesso.
+            self.path = f"file:boilerplate-{next(_memory_ids)}?mode=memory&cache=shared"
+            self._uri = True
+            pool_size = 1
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self.fts = True
+        self.changes_capacity = 0
+        self.pool = ConnectionPool(self._connect, size=pool_size)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,  # transações controladas explicitamente
+            check_same_thread=False,
+            cached_statements=64,
+            uri=self._uri,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.create_function("todo_matches", 3, _todo_matches, deterministic=True)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        with self._schema_lock:
+            if self._uri and self._anchor is None:
+                # Mantém o banco em memória vivo enquanto o backend existir
+                self._anchor = sqlite3.connect(self.path, uri=True, check_same_thread=False)
+            if not self._schema_ready:
+                self._create_schema(conn)
+                self._schema_ready = True
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.executescript(SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(todos)")}
+        if "version" not in columns:
+            # Bancos criados antes do controle de concorrência otimista
+            conn.execute(ADD_VERSION_COLUMN)
+        had_fts = conn.execute(FTS_EXISTS).fetchone() is not None
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite compilado sem FTS5: a busca usa `todo_matches`
+            self.fts = False
+            return
+        if not had_fts:
+            # Bancos criados antes do índice de busca precisam ser indexados
+            conn.execute(FTS_REBUILD)
+
+    def _read(self, fn: Callable[[sqlite3.Connection], object]):
+        with self.pool.connection() as conn:
+            return fn(conn)
+
+    def _write(self, fn: Callable[[sqlite3.Connection], object]):
+        def op(conn):
+            result = fn(conn)
+            # Uma escrita por transação avança a versão da coleção
+            conn.execute(BUMP_VERSION)
+            return result
+
+        return self._transaction(op)
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], object]):
+        with self.pool.connection() as conn:
+            # BEGIN IMMEDIATE reserva a escrita logo no início e evita
+            # deadlocks de upgrade de lock entre processos.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    def _record(self, conn: sqlite3.Connection, entries: Sequence[Entry]) -> None:
+        """Grava as alterações na transação da escrita, se habilitado."""
+        if not self.changes_capacity or not entries:
+            return
+        conn.executemany(
+            INSERT_CHANGE, ((op, todo_id, encode_todo(todo)) for op, todo_id, todo in entries)
+        )
+        last = conn.execute(SELECT_LAST_CHANGE).fetchone()[0]
+        conn.execute(PRUNE_CHANGES, (last - self.changes_capacity,))
+
+    async def version(self) -> int:
+        def op(conn):
+            return conn.execute(SELECT_VERSION).fetchone()[0]
+
+        return await asyncio.to_thread(self._read, op)
+
+    def enable_changes(self, capacity: int) -> None:
+        self.changes_capacity = capacity
+
+    async def changes_epoch(self) -> str:
+        return await asyncio.to_thread(
+            self._read, lambda conn: conn.execute(SELECT_CHANGES_EPOCH).fetchone()[0]
+        )
+
+    async def last_change(self) -> int:
+        return await asyncio.to_thread(
+            self._read, lambda conn: conn.execute(SELECT_LAST_CHANGE).fetchone()[0]
+        )
+
+    async def changes_since(
+        self, seq: int, limit: int
+    ) -> List[Tuple[int, str, int, Optional[bytes]]]:
+        def op(conn):
+            return [tuple(row) for row in conn.execute(SELECT_CHANGES, (seq, limit))]
+
+        return await asyncio.to_thread(self._read, op)
+
+    async def idempotency_reserve(
+        self, key: str, record: bytes, expires_at: float, now: float
+    ) -> Optional[bytes]:
+        def op(conn):
+            row = conn.execute(SELECT_IDEMPOTENCY, (key, now)).fetchone()
+            if row is not None:
+                return row[0]
+            conn.execute(UPSERT_IDEMPOTENCY, (key, expires_at, record))
+            return None
+
+        return await asyncio.to_thread(self._transaction, op)
+
+    async def idempotency_store(self, key: str, record: bytes, expires_at: float, now: float) -> None:
+        def op(conn):
+            conn.execute(UPSERT_IDEMPOTENCY, (key, expires_at, record))
+            conn.execute(PRUNE_IDEMPOTENCY, (now,))
+
+        await asyncio.to_thread(self._transaction, op)
+
+    async def idempotency_release(self, key: str) -> None:
+        await asyncio.to_thread(
+            self._transaction, lambda conn: conn.execute(DELETE_IDEMPOTENCY, (key,))
+        )
+
+    async def list(self) -> List[dict]:
+        def op(conn):
+            return [_row_to_dict(row) for row in conn.execute(SELECT_ALL)]
+
+        return await asyncio.to_thread(self._read, op)
+
+    async def list_page(
+        self,
+        after_id: Optional[int],
+        limit: int,
+        completed: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> List[dict]:
+        def op(conn):
+            sql, params = _page_query(after_id, limit, completed, search, self.fts)
+            return [_row_to_dict(row) for row in conn.execute(sql, params)]
+
+        return await asyncio.to_thread(self._read, op)
+
+    async def get(self, todo_id: int) -> Optional[dict]:
+        def op(conn):
+            row = conn.execute(SELECT_ONE, (todo_id,)).fetchone()
+            return _row_to_dict(row) if row else None
+
+        return await asyncio.to_thread(self._read, op)
+
+    async def create(self, data: dict, now: datetime) -> dict:
+        stamp = now.isoformat()
+
+        def op(conn):
+            cursor = conn.execute(
+                INSERT,
+                (
+                    data["title"],
+                    data.get("description"),
+                    int(data.get("completed", False)),
+                    stamp,
+                    stamp,
+                ),
+            )
+            todo = {
+                "id": cursor.lastrowid,
+                "title": data["title"],
+                "description": data.get("description"),
+                "completed": bool(data.get("completed", False)),
+                "created_at": now,
+                "updated_at": now,
+                "version": 1,
+            }
+            self._record(conn, [(CREATED, todo["id"], todo)])
+            return todo
+
+        return await asyncio.to_thread(self._write, op)
+
+    async def update(
+        self,
+        todo_id: int,
+        data: dict,
+        now: datetime,
+        expected_version: Optional[int] = None,
+    ) -> Optional[dict]:
+        params = (
+            data.get("title"),
+            data.get("description"),
+            _as_int(data.get("completed")),
+            now.isoformat(),
+            todo_id,
+            expected_version,
+            expected_version,
+        )
+
+        def op(conn):
+            if conn.execute(UPDATE, params).rowcount == 0:
+                row = conn.execute(SELECT_ITEM_VERSION, (todo_id,)).fetchone()
+                if row is None:
+                    return None
+                raise VersionConflictError(todo_id, expected_version, row[0])
+            todo = _row_to_dict(conn.execute(SELECT_ONE, (todo_id,)).fetchone())
+            self._record(conn, [(UPDATED, todo_id, todo)])
+            return todo
+
+        return await asyncio.to_thread(self._write, op)
+
+    async def delete(self, todo_id: int) -> bool:
+        def op(conn):
+            deleted = conn.execute(DELETE, (todo_id,)).rowcount > 0
+            if deleted:
+                self._record(conn, [(DELETED, todo_id, None)])
+            return deleted
+
+        return await asyncio.to_thread(self._write, op)
+
+    async def create_many(self, items: Sequence[dict], now: datetime) -> List[dict]:
+        stamp = now.isoformat()
+
+        def op(conn):
+            # Dentro do BEGIN IMMEDIATE nenhum outro processo escreve, então
+            # o bloco de IDs a partir do último ID é exclusivo desta transação.
+            first_id = conn.execute(LAST_ID).fetchone()[0] + 1
+            conn.executemany(
+                INSERT_WITH_ID,
+                (
+                    (
+                        first_id + i,
+                        data["title"],
+                        data.get("description"),
+                        int(data.get("completed", False)),
+                        stamp,
+                        stamp,
+                    )
+                    for i, data in enumerate(items)
+                ),
+            )
+            todos = [
+                {
+                    "id": first_id + i,
+                    "title": data["title"],
+                    "description": data.get("description"),
+                    "completed": bool(data.get("completed", False)),
+                    "created_at": now,
+                    "updated_at": now,
+                    "version": 1,
+                }
+                for i, data in enumerate(items)
+            ]
+            self._record(conn, [(CREATED, todo["id"], todo) for todo in todos])
+            return todos
+
+        if not items:
+            return []
+        return await asyncio.to_thread(self._write, op)
+
+    async def update_many(
+        self, updates: Sequence[Tuple[int, dict, Optional[int]]], now: datetime
+    ) -> List[UpdateResult]:
+        stamp = now.isoformat()
+
+        def op(conn):
+            # A transação (BEGIN IMMEDIATE) impede escritas concorrentes, então
+            # as versões lidas aqui continuam válidas até o COMMIT.
+            versions = _current_versions(conn, [todo_id for todo_id, _, _ in updates])
+            outcomes: List[UpdateResult] = []
+            for todo_id, data, expected_version in updates:
+                current = versions.get(todo_id)
+                if current is None:
+                    outcomes.append(None)
+                    continue
+                if expected_version is not None and expected_version != current:
+                    outcomes.append(VersionConflictError(todo_id, expected_version, current))
+                    continue
+                conn.execute(
+                    UPDATE,
+                    (
+                        data.get("title"),
+                        data.get("description"),
+                        _as_int(data.get("completed")),
+                        stamp,
+                        todo_id,
+                        None,
+                        None,
+                    ),
+                )
+                versions[todo_id] = current + 1
+                outcomes.append(todo_id)
+            updated = [o for o in outcomes if isinstance(o, int)]
+            found = _select_many(conn, updated)
+            self._record(conn, [(UPDATED, todo_id, found[todo_id]) for todo_id in updated])
+            return outcomes, found
+
+        if not updates:
+            return []
+        outcomes, found = await asyncio.to_thread(self._write, op)
+        return [found[o] if isinstance(o, int) else o for o in outcomes]
+
+    async def delete_many(self, todo_ids: Sequence[int]) -> List[bool]:
+        def op(conn):
+            existing = _existing_ids(conn, todo_ids)
+            conn.executemany(DELETE, ((todo_id,) for todo_id in existing))
+            # Uma remoção por tarefa, na ordem pedida
+            removed = [todo_id for todo_id in dict.fromkeys(todo_ids) if todo_id in existing]
+            self._record(conn, [(DELETED, todo_id, None) for todo_id in removed])
+            return existing
+
+        if not todo_ids:
+            return []
+        existing = await asyncio.to_thread(self._write, op)
+        # IDs repetidos só contam como removidos na primeira ocorrência
+        results = []
+        for todo_id in todo_ids:
+            results.append(todo_id in existing)
+            existing.discard(todo_id)
+        return results
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._write, lambda conn: conn.execute(DELETE_ALL))
+
+    def stats(self) -> Dict[str, float]:
+        return {**self.pool.stats(), "fts": int(self.fts)}
+
+    def close(self) -> None:
+        self.pool.close()
+        self._schema_ready = False
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
@@ -6,19 +6,79 @@ além de incluir todos os roteadores e middlewares necessários.
 """
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi import HTTPException
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict
 
 from .config import settings
 from .api.v1.api import api_router as api_v1_router
+from .api.v1.endpoints.todos import first_page_bootstrap
+from .core import metrics
+from .services.todo import get_cache, get_changes, get_storage
+from .utils.asgi import LazyApp
+
+if TYPE_CHECKING:
+    from .core.compression import CompressedVariants
 
-# Configuração dos templates
 BASE_DIR = Path(__file__).parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+
+
+# Templates e arquivos estáticos são criados no primeiro uso: o Jinja2 (a
+# maior importação da interface web) não pesa na inicialização dos workers.
+@lru_cache()
+def get_templates():
+    """
+    Templates Jinja2 da interface web.
+
+    O código compilado dos templates fica em disco (`TEMPLATE_CACHE_DIR`),
+    então um worker novo não recompila nada; fora do modo DEBUG, os arquivos
+    não são verificados a cada renderização.
+    """
+    from fastapi.templating import Jinja2Templates
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+    env = Environment(
+        loader=FileSystemLoader(str(BASE_DIR / "templates")),
+        autoescape=select_autoescape(),
+        bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR or None),
+        auto_reload=settings.DEBUG,
+    )
+    templates = Jinja2Templates(env=env)
+    # asset("js/todos.js") -> nome versionado do build (ver core/assets.py)
+    templates.env.globals["asset"] = get_assets().url_path
+    return templates
+
+
+def preload_templates() -> None:
+    """Compila todos os templates (no mestre de `boilerplate serve`, antes do fork)."""
+    templates = get_templates()
+    for name in templates.env.list_templates():
+        templates.get_template(name)
+
+
+@lru_cache()
+def get_assets():
+    """Manifesto dos arquivos estáticos versionados (vazio sem build)."""
+    from .core.assets import AssetManifest
+
+    return AssetManifest(settings.STATIC_BUILD_DIR or None)
+
+
+def _compression_levels():
+    return {
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+    }
+
+
+def _static_files():
+    from .core.assets import StaticAssets
+
+    return StaticAssets(directory=str(BASE_DIR / "static"), manifest=get_assets())
 
 # Cria a aplicação FastAPI
 app = FastAPI(
@@ -53,6 +113,53 @@ app = FastAPI(
     ],
 )
 
+# Idempotency-Key (o mais interno: grava a resposta sem compressão, e cada
+# repetição é comprimida conforme o próprio Accept-Encoding)
+if settings.IDEMPOTENCY_ENABLED:
+    from .core.idempotency import IdempotencyMiddleware, create_idempotency_store
+
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=create_idempotency_store(
+            settings.IDEMPOTENCY_URL,
+            settings.IDEMPOTENCY_TTL,
+            settings.IDEMPOTENCY_LOCK_TTL,
+            settings.IDEMPOTENCY_MAX_ENTRIES,
+            storage=get_storage(),
+        ),
+        routes=settings.IDEMPOTENCY_ROUTES,
+        wait=settings.IDEMPOTENCY_WAIT,
+    )
+
+# Compressão das respostas (interna às métricas e ao profiling, que contam
+# os bytes enviados e o custo da compressão)
+if settings.COMPRESSION_ENABLED:
+    from .core.compression import CompressionMiddleware
+
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        encodings=settings.COMPRESSION_ENCODINGS,
+        levels=_compression_levels(),
+    )
+
+# Limite de taxa e de concorrência da API (dentro do CORS, para o navegador
+# ler os 429/503, e das métricas, que contam as rejeições)
+if settings.RATE_LIMIT_ENABLED or settings.API_MAX_IN_FLIGHT > 0:
+    from .core.ratelimit import RateLimitMiddleware, create_rate_limiter
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=create_rate_limiter(settings.RATE_LIMIT_URL) if settings.RATE_LIMIT_ENABLED else None,
+        limits=settings.RATE_LIMITS,
+        default=settings.RATE_LIMIT_DEFAULT,
+        prefix="/api/",
+        max_in_flight=settings.API_MAX_IN_FLIGHT,
+        exempt=settings.API_IN_FLIGHT_EXEMPT,
+        key_header=settings.RATE_LIMIT_KEY_HEADER,
+        retry_after=settings.API_RETRY_AFTER,
+    )
+
 # Configuração de CORS
 app.add_middleware(
     CORSMiddleware,
@@ -60,10 +167,102 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Link", "X-Next-Cursor", "ETag", "Last-Modified", "Retry-After", "Idempotent-Replayed"],
 )
 
+# Métricas por rota (latência, tamanho das respostas e requisições em andamento)
+if settings.METRICS_ENABLED:
+    metrics.configure(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+    app.add_middleware(metrics.MetricsMiddleware)
+
+
+def _storage_stats():
+    storage = get_storage()
+    backend = type(storage).__name__
+    return [((backend, key), value) for key, value in storage.stats().items()]
+
+
+def _cache_stats():
+    info = get_cache().info()
+    return [
+        ((info["backend"], key), value)
+        for key, value in info.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+
+
+metrics.storage_stats.collector = _storage_stats
+metrics.cache_stats.collector = _cache_stats
+
+# Profiling de requisições lentas ou sorteadas (sem custo quando desativado)
+if settings.PROFILING_ENABLED:
+    import asyncio
+
+    from .core.profiling import Profiler, ProfilingMiddleware
+
+    profiler = Profiler(
+        settings.PROFILING_DIR,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        slow_ms=settings.PROFILING_SLOW_MS,
+        interval_ms=settings.PROFILING_INTERVAL_MS,
+        max_profiles=settings.PROFILING_MAX_PROFILES,
+    )
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @app.get("/debug/profiles", tags=["debug"], summary="Perfis recentes")
+    async def list_profiles():
+        """Lista os perfis recentes deste worker, do mais novo ao mais antigo."""
+        return list(reversed(profiler.recent))
+
+    @app.get(
+        "/debug/profiles/{profile_id}",
+        tags=["debug"],
+        response_class=PlainTextResponse,
+        summary="Baixar perfil",
+    )
+    async def get_profile(profile_id: str):
+        """Retorna o perfil no formato collapsed stack (importável no speedscope)."""
+        profile = profiler.get(profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Perfil não encontrado")
+        return PlainTextResponse(
+            await asyncio.to_thread(profiler.read, profile),
+            headers={"Content-Disposition": f'attachment; filename="{profile["file"]}"'},
+        )
+
+# Esquema OpenAPI: serializado e comprimido uma vez por codificação (e por
+# root_path), no lugar da rota padrão, que serializa a cada requisição
+_openapi_cache: Dict[str, "CompressedVariants"] = {}
+
+
+async def openapi_schema(request: Request):
+    from .core.compression import CompressedVariants
+    from .core.serialization import dumps
+
+    root_path = request.scope.get("root_path", "").rstrip("/")
+    variants = _openapi_cache.get(root_path)
+    if variants is None:
+        schema = app.openapi()
+        if root_path:
+            schema = {**schema, "servers": [{"url": root_path}, *schema.get("servers", [])]}
+        variants = _openapi_cache[root_path] = CompressedVariants(
+            dumps(schema),
+            "application/json",
+            encodings=settings.COMPRESSION_ENCODINGS if settings.COMPRESSION_ENABLED else (),
+            levels=_compression_levels(),
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+        )
+    return variants.response(request.headers.get("accept-encoding"))
+
+
+if app.openapi_url:
+    app.router.routes[:] = [
+        route for route in app.router.routes if getattr(route, "path", None) != app.openapi_url
+    ]
+    app.add_route(app.openapi_url, openapi_schema, include_in_schema=False)
+
 # Configuração de arquivos estáticos
-app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+app.mount("/static", LazyApp(_static_files), name="static")
 
 # Inclui os roteadores da API
 app.include_router(api_v1_router, prefix="/api/v1")
@@ -71,8 +270,25 @@ app.include_router(api_v1_router, prefix="/api/v1")
 # Rota para a página inicial
 @app.get("/todos", response_class=HTMLResponse)
 async def todos_page(request: Request):
-    """Rota para a página de gerenciamento de tarefas."""
-    return templates.TemplateResponse("todos.html", {"request": request})
+    """
+    Rota para a página de gerenciamento de tarefas.
+
+    A primeira página da listagem vai embutida no HTML, junto com a posição
+    atual do registro de alterações: o navegador exibe as tarefas sem outra
+    requisição e acompanha as alterações a partir desse ponto.
+    """
+    from markupsafe import Markup
+
+    # Lida antes dos dados: alterações repetidas são ignoradas pelo cliente
+    feed = get_changes()
+    last_event_id = feed.event_id(await feed.last_seq())
+    bootstrap = await first_page_bootstrap(settings.DEFAULT_PAGE_SIZE)
+    return get_templates().TemplateResponse(
+        request,
+        "todos.html",
+        {"bootstrap": Markup(bootstrap.decode()), "last_event_id": last_event_id},
+        headers={"Cache-Control": "no-cache"},
+    )
 
 # Tratamento global de erros de validação
 @app.exception_handler(RequestValidationError)
@@ -120,6 +336,41 @@ async def health_check():
         "environment": settings.ENVIRONMENT,
     }
 
+# Estatísticas do cache de respostas
+@app.get(
+    "/health/cache",
+    tags=["health"],
+    summary="Estatísticas do cache",
+    description="Contadores de acertos, falhas e ocupação do cache de respostas.",
+    response_description="Estatísticas do cache"
+)
+async def cache_stats():
+    """
+    Retorna os contadores do cache de respostas deste worker.
+    
+    Útil para dimensionar `CACHE_MAX_ENTRIES` e `CACHE_TTL`.
+    """
+    return get_cache().info()
+
+# Métricas no formato Prometheus
+@app.get(
+    "/metrics",
+    tags=["health"],
+    response_class=PlainTextResponse,
+    summary="Métricas da aplicação",
+    description="Métricas no formato de exposição do Prometheus.",
+    response_description="Métricas em texto"
+)
+async def metrics_endpoint():
+    """
+    Retorna contadores e histogramas das requisições por rota, as durações
+    das operações do `TodoService` e as estatísticas do armazenamento e do
+    cache. Com `METRICS_DIR`, agrega todos os workers.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desativadas")
+    return PlainTextResponse(await metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # Rota raiz
 @app.get(
     "/",
@@ -3,9 +3,8 @@ Modelos Pydantic para a API de Tarefas (To-Do).
 """
 from datetime import datetime
 from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Optional
-import pytz
-from ..config import settings
+from typing import Any, Dict, List, Optional
+from ..core.clock import get_clock
 
 class TodoBase(BaseModel):
     """Modelo base para Tarefa."""
@@ -26,8 +25,9 @@ class TodoUpdate(BaseModel):
 class TodoInDB(TodoBase):
     """Modelo para Tarefa no banco de dados."""
     id: int
-    created_at: datetime = Field(default_factory=lambda: datetime.now(pytz.timezone(settings.TIMEZONE)))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(pytz.timezone(settings.TIMEZONE)))
+    version: int = 1  # incrementada a cada atualização (concorrência otimista)
+    created_at: datetime = Field(default_factory=lambda: get_clock().now())
+    updated_at: datetime = Field(default_factory=lambda: get_clock().now())
 
     # Configuração Pydantic v2
     model_config = ConfigDict(from_attributes=True)
@@ -35,9 +35,41 @@ class TodoInDB(TodoBase):
     @field_validator('created_at', 'updated_at')
     def ensure_timezone(cls, v):
         """Garante que as datas tenham o timezone correto."""
-        if v.tzinfo is None:
-            return v.replace(tzinfo=pytz.timezone(settings.TIMEZONE))
-        return v.astimezone(pytz.timezone(settings.TIMEZONE))
+        return get_clock().localize(v)
 
     # A serialização de datetime já é ISO 8601 por padrão no FastAPI/Pydantic v2,
     # então não é necessário definir json_encoders personalizados.
+
+
+class TodoBulkUpdate(TodoUpdate):
+    """Item de uma atualização em lote: ID da tarefa e campos alterados."""
+    id: int
+    expected_version: Optional[int] = None
+
+
+class TodoBulkDelete(BaseModel):
+    """Corpo de uma exclusão em lote."""
+    ids: List[int]
+
+
+class TodoBulkResult(BaseModel):
+    """Resultado de um item em uma operação em lote."""
+    id: int
+    status: int
+    todo: Optional[TodoInDB] = None
+    error: Optional[str] = None
+
+
+class TodoImportError(BaseModel):
+    """Linha rejeitada em uma importação."""
+    line: int
+    errors: List[Dict[str, Any]]
+
+
+class TodoImportResult(BaseModel):
+    """Resumo de uma importação NDJSON."""
+    lines: int = 0  # linhas não vazias lidas
+    imported: int = 0
+    failed: int = 0
+    batches: int = 0  # transações gravadas
+    errors: List[TodoImportError] = []  # limitado a IMPORT_MAX_ERRORS
@@ -1,65 +1,294 @@
 """
 Serviço para gerenciamento de Tarefas (To-Do).
 """
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
 from datetime import datetime
-import pytz
 from ..config import settings
+from ..core.cache import ResponseCache, create_cache
+from ..core.changes import CREATED, UPDATED, ChangeFeed, create_change_feed
+from ..core.clock import get_clock
+from ..core.metrics import timed
+from ..core.storage import (
+    MemoryBackend,
+    StorageBackend,
+    UpdateResult,
+    create_backend,
+)
+
+# Backend de armazenamento selecionado a partir de DATABASE_URL
+storage: StorageBackend = create_backend(
+    settings.DATABASE_URL,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    timeout=settings.DATABASE_TIMEOUT,
+)
+if settings.WAL_DIR:
+    # Restaura as tarefas do disco e passa a registrar cada mutação
+    from ..core.storage.durable import DurableBackend
+
+    storage = DurableBackend(
+        storage,
+        settings.WAL_DIR,
+        sync=settings.WAL_SYNC,
+        interval=settings.WAL_SYNC_INTERVAL,
+        snapshot_bytes=settings.WAL_SNAPSHOT_BYTES,
+    )
+
+# Dicionário do backend em memória (mantido para compatibilidade com código
+# e testes que inspecionam os dados diretamente)
+_backend = getattr(storage, "backend", storage)
+fake_db = _backend.data if isinstance(_backend, MemoryBackend) else {}
+
+
+def get_storage() -> StorageBackend:
+    """Retorna o backend de armazenamento em uso."""
+    return storage
+
+
+def set_storage(backend: StorageBackend) -> StorageBackend:
+    """Substitui o backend de armazenamento e retorna o anterior."""
+    global storage
+    previous, storage = storage, backend
+    return previous
+
+
+# Cache das respostas de leitura. As chaves incluem a versão da coleção
+# (`storage.version()`, compartilhada por todos os workers que usam o mesmo
+# armazenamento): uma escrita em qualquer worker torna as entradas antigas
+# inalcançáveis, mesmo com o cache em memória de cada processo.
+response_cache: ResponseCache = create_cache(
+    settings.CACHE_URL,
+    ttl=settings.CACHE_TTL,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+)
+
+
+def get_cache() -> ResponseCache:
+    """Retorna o cache de respostas em uso."""
+    return response_cache
+
+
+def set_cache(cache: ResponseCache) -> ResponseCache:
+    """Substitui o cache de respostas e retorna o anterior."""
+    global response_cache
+    previous, response_cache = response_cache, cache
+    return previous
+
+
+# Registro das alterações, entregue aos clientes por `/todos/changes`
+# (gravado pelo SQLite e compartilhado entre os workers)
+change_feed: ChangeFeed = create_change_feed(
+    storage, settings.CHANGES_BUFFER_SIZE, settings.CHANGES_POLL_INTERVAL
+)
+
+
+def get_changes() -> ChangeFeed:
+    """Retorna o registro de alterações em uso."""
+    return change_feed
+
+
+def set_changes(feed: ChangeFeed) -> ChangeFeed:
+    """Substitui o registro de alterações e retorna o anterior."""
+    global change_feed
+    previous, change_feed = change_feed, feed
+    return previous
+
+
+def item_cache_key(todo_id: int, version: str) -> str:
+    """Chave de cache da resposta de uma tarefa na versão `version` da coleção."""
+    return f"todos:item:{version}:{todo_id}"
+
+
+def _now() -> datetime:
+    """Data/hora atual no timezone configurado (resolvido uma única vez)."""
+    # `datetime.now` é chamado aqui, e não em `clock.now()`, para que os
+    # testes possam fixar o horário substituindo o `datetime` deste módulo.
+    return datetime.now(get_clock().tz)
+
+
+def _localize(todos: List[dict]) -> List[dict]:
+    """
+    Garante que as datas das tarefas estejam no timezone configurado.
+
+    As respostas são serializadas sem revalidação, então a conversão que o
+    `TodoInDB` faria é aplicada aqui, em lote. Tarefas gravadas pelo próprio
+    processo já estão no timezone e não são alteradas.
+    """
+    values = get_clock().localize_many(
+        value for todo in todos for value in (todo["created_at"], todo["updated_at"])
+    )
+    for pos, todo in enumerate(todos):
+        created_at, updated_at = values[2 * pos], values[2 * pos + 1]
+        if created_at is not todo["created_at"] or updated_at is not todo["updated_at"]:
+            todo["created_at"], todo["updated_at"] = created_at, updated_at
+    return todos
+
+
+async def _invalidate() -> None:
+    """
+    Avança a geração do cache após uma escrita deste processo.
+
+    As entradas da versão anterior já não são lidas (a chave mudou); a
+    geração descarta as gravações de leituras iniciadas antes da escrita.
+    """
+    await response_cache.invalidate()
 
-# Banco de dados em memória para exemplo
-fake_db = {}
-id_counter = 1
 
 class TodoService:
     """Serviço para operações relacionadas a Tarefas."""
-    
+
+    @staticmethod
+    @timed("get_version")
+    async def get_version() -> str:
+        """
+        Versão atual da coleção de tarefas (muda a cada escrita).
+
+        Prefixada pela época do armazenamento (`StorageBackend.epoch`), para
+        que não se repita após um reinício dos backends em memória.
+        """
+        version = f"{await storage.version():x}"
+        return f"{storage.epoch}.{version}" if storage.epoch else version
+
     @staticmethod
+    @timed("get_todos")
     async def get_todos() -> List[dict]:
         """Retorna todas as tarefas."""
-        return list(fake_db.values())
+        return await storage.list()
+
+    @staticmethod
+    @timed("get_todos_page")
+    async def get_todos_page(
+        limit: int,
+        after_id: Optional[int] = None,
+        completed: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Retorna uma página de tarefas ordenadas por ID.
+
+        O custo depende do tamanho da página e não do total de tarefas: o
+        backend busca a partir de `after_id` usando seus índices (IDs, status
+        e índice invertido para `search`). Retorna a página e o ID a partir
+        do qual a próxima página começa (None se não houver mais itens).
+        """
+        # Busca um item extra para saber se existe próxima página
+        items = _localize(
+            await storage.list_page(after_id, limit + 1, completed=completed, search=search)
+        )
+        if len(items) > limit:
+            items = items[:limit]
+            return items, items[-1]["id"]
+        return items, None
+
+    @staticmethod
+    async def iter_todos(
+        chunk_size: int,
+        completed: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Percorre todas as tarefas em lotes de até `chunk_size`, em ordem de ID.
+
+        Cada lote é uma consulta paginada por cursor, então a memória usada
+        não depende do total de tarefas. Tarefas criadas durante a leitura
+        podem aparecer nos lotes finais.
+        """
+        after_id = None
+        while True:
+            chunk = _localize(
+                await storage.list_page(after_id, chunk_size, completed=completed, search=search)
+            )
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+            after_id = chunk[-1]["id"]
 
     @staticmethod
+    @timed("get_todo")
     async def get_todo(todo_id: int) -> Optional[dict]:
         """Obtém uma tarefa pelo ID."""
-        return fake_db.get(todo_id)
+        todo = await storage.get(todo_id)
+        return _localize([todo])[0] if todo is not None else None
 
     @staticmethod
+    @timed("create_todo")
     async def create_todo(todo_data: dict) -> dict:
         """Cria uma nova tarefa."""
-        global id_counter
-        todo_id = id_counter
-        timezone = pytz.timezone(settings.TIMEZONE)
-        now = datetime.now(timezone)
-        todo = {
-            "id": todo_id,
-            **todo_data,
-            "created_at": now,
-            "updated_at": now
-        }
-        fake_db[todo_id] = todo
-        id_counter += 1
+        todo = await storage.create(todo_data, _now())
+        await _invalidate()
+        await change_feed.publish(CREATED, todo["id"], todo)
         return todo
 
     @staticmethod
-    async def update_todo(todo_id: int, todo_data: dict) -> Optional[dict]:
-        """Atualiza uma tarefa existente."""
-        if todo_id not in fake_db:
-            return None
-        
+    @timed("update_todo")
+    async def update_todo(
+        todo_id: int, todo_data: dict, expected_version: Optional[int] = None
+    ) -> Optional[dict]:
+        """
+        Atualiza uma tarefa existente.
+
+        Com `expected_version`, a atualização só é aplicada se a tarefa ainda
+        estiver nessa versão; caso contrário lança `VersionConflictError`.
+        """
         # Remove valores None para atualização parcial
         update_data = {k: v for k, v in todo_data.items() if v is not None}
-        
-        timezone = pytz.timezone(settings.TIMEZONE)
-        fake_db[todo_id].update({
-            **update_data,
-            "updated_at": datetime.now(timezone)
-        })
-        return fake_db[todo_id]
+
+        todo = await storage.update(todo_id, update_data, _now(), expected_version)
+        if todo is not None:
+            await _invalidate()
+            await change_feed.publish(UPDATED, todo_id, todo)
+        return todo
 
     @staticmethod
+    @timed("delete_todo")
     async def delete_todo(todo_id: int) -> bool:
         """Remove uma tarefa."""
-        if todo_id in fake_db:
-            del fake_db[todo_id]
-            return True
-        return False
+        deleted = await storage.delete(todo_id)
+        if deleted:
+            await _invalidate()
+            await change_feed.publish_deleted([todo_id])
+        return deleted
+
+    @staticmethod
+    @timed("create_todos")
+    async def create_todos(items: Sequence[dict]) -> List[dict]:
+        """Cria várias tarefas em uma única transação, com o mesmo timestamp."""
+        todos = await storage.create_many(items, _now())
+        await _invalidate()
+        await change_feed.publish_many(CREATED, todos)
+        return todos
+
+    @staticmethod
+    @timed("update_todos")
+    async def update_todos(items: Sequence[dict]) -> List[UpdateResult]:
+        """
+        Atualiza várias tarefas em uma única transação.
+
+        Cada item deve conter o `id` da tarefa e pode trazer `expected_version`.
+        O resultado segue a ordem de entrada: a tarefa atualizada, None para
+        tarefas inexistentes ou `VersionConflictError` em caso de conflito.
+        """
+        reserved = ("id", "expected_version")
+        updates = [
+            (
+                item["id"],
+                {k: v for k, v in item.items() if k not in reserved and v is not None},
+                item.get("expected_version"),
+            )
+            for item in items
+        ]
+        todos = await storage.update_many(updates, _now())
+        updated = [todo for todo in todos if isinstance(todo, dict)]
+        await _invalidate()
+        await change_feed.publish_many(UPDATED, updated)
+        return todos
+
+    @staticmethod
+    @timed("delete_todos")
+    async def delete_todos(todo_ids: Sequence[int]) -> List[bool]:
+        """Remove várias tarefas em uma única transação."""
+        deleted = await storage.delete_many(todo_ids)
+        removed = [todo_id for todo_id, ok in zip(todo_ids, deleted) if ok]
+        await _invalidate()
+        await change_feed.publish_deleted(removed)
+        return deleted
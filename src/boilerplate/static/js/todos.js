@@ -1,12 +1,119 @@
 // Variáveis globais
 let currentTodoId = null;
+let nextCursor = null; // Cursor da próxima página (cabeçalho X-Next-Cursor)
+let listEtag = null; // ETag da primeira página renderizada
+const todoVersions = {}; // Versão conhecida de cada tarefa (para If-Match)
+let loadingTodos = 0; // Listagens em andamento
+const pendingChanges = []; // Alterações recebidas durante uma listagem
+let createKey = null; // Idempotency-Key da criação em edição no modal
 
 // Inicialização
 document.addEventListener('DOMContentLoaded', () => {
-    loadTodos();
+    subscribeChanges(bootstrapTodos());
     setupEventListeners();
 });
 
+// Exibe a primeira página embutida no HTML de /todos, sem outra requisição.
+// Retorna a posição do registro de alterações em que ela foi gerada.
+function bootstrapTodos() {
+    const element = document.getElementById('todos-bootstrap');
+    if (!element) {
+        loadTodos();
+        return null;
+    }
+    const data = JSON.parse(element.textContent);
+    listEtag = data.etag;
+    nextCursor = data.next_cursor;
+    renderTodos(data.items);
+    return element.dataset.lastEventId || null;
+}
+
+// Acompanha as alterações feitas em outras abas e por outros clientes (SSE),
+// a partir de `lastEventId`. Ao reconectar, o navegador envia o
+// Last-Event-ID e recebe o que perdeu.
+function subscribeChanges(lastEventId = null) {
+    if (!window.EventSource) return;
+    let url = '/api/v1/todos/changes';
+    if (lastEventId) {
+        url += `?last_event_id=${encodeURIComponent(lastEventId)}`;
+    }
+    const source = new EventSource(url);
+    // Primeira conexão ou alterações perdidas: recarrega a listagem
+    source.addEventListener('reset', () => {
+        listEtag = null;
+        loadTodos();
+    });
+    ['created', 'updated', 'deleted'].forEach(op => {
+        source.addEventListener(op, event => queueChange(JSON.parse(event.data)));
+    });
+}
+
+// Aplica uma alteração, ou a guarda até o fim da listagem em andamento
+function queueChange(change) {
+    if (loadingTodos > 0) {
+        pendingChanges.push(change);
+    } else {
+        applyChange(change);
+    }
+}
+
+// Atualiza apenas o item alterado, sem renderizar a lista inteira
+function applyChange(change) {
+    const container = document.getElementById('todos-container');
+    if (!container) return;
+    // O conteúdo exibido não corresponde mais ao ETag da listagem
+    listEtag = null;
+    const element = document.getElementById(`todo-${change.id}`);
+
+    if (change.op === 'deleted' || !matchesFilters(change.todo)) {
+        if (!element) return;
+        element.remove();
+        delete todoVersions[change.id];
+        if (!container.querySelector('[id^="todo-"]')) loadTodos();
+        return;
+    }
+
+    const todo = change.todo;
+    if (element) {
+        // Eventos repetidos ou já aplicados localmente são ignorados
+        if (todoVersions[todo.id] >= todo.version) return;
+        element.outerHTML = renderTodoItem(todo);
+        return;
+    }
+
+    // Insere na posição do ID; além da última página carregada, a tarefa
+    // aparecerá ao carregar mais
+    const items = [...container.querySelectorAll('[id^="todo-"]')];
+    const next = items.find(item => Number(item.id.slice(5)) > todo.id);
+    if (next) {
+        next.insertAdjacentHTML('beforebegin', renderTodoItem(todo));
+    } else if (!nextCursor) {
+        if (!items.length) container.innerHTML = '';
+        container.insertAdjacentHTML('beforeend', renderTodoItem(todo));
+    }
+}
+
+// Verifica se a tarefa atende aos filtros atuais (mesma busca do servidor:
+// todos os termos, por prefixo, sem diferenciar acentos e maiúsculas)
+function matchesFilters(todo) {
+    const filter = document.getElementById('filter')?.value || 'all';
+    if (filter !== 'all' && todo.completed !== (filter === 'completed')) return false;
+    const terms = tokenize(document.getElementById('search')?.value);
+    if (!terms.length) return true;
+    const words = tokenize(`${todo.title} ${todo.description || ''}`);
+    return terms.every(term => words.some(word => word.startsWith(term)));
+}
+
+// Quebra o texto em termos normalizados (letras e dígitos, como no servidor)
+function tokenize(text) {
+    if (!text) return [];
+    return text
+        .normalize('NFKD')
+        .toLowerCase()
+        .replace(/\p{M}/gu, '')
+        .match(/[\p{L}\p{N}]+/gu) || [];
+}
+
 // Configura os event listeners
 function setupEventListeners() {
     // Filtro de busca
@@ -22,27 +129,66 @@ function setupEventListeners() {
     }
 }
 
-// Carrega as tarefas da API
-async function loadTodos() {
+// Monta a URL da listagem com os filtros atuais
+function buildTodosUrl(cursor = null) {
     const search = document.getElementById('search')?.value || '';
     const filter = document.getElementById('filter')?.value || 'all';
-    
+    let url = `/api/v1/todos?search=${encodeURIComponent(search)}&filter=${filter}`;
+    if (cursor) {
+        url += `&cursor=${encodeURIComponent(cursor)}`;
+    }
+    return url;
+}
+
+// Carrega as tarefas da API (primeira página)
+async function loadTodos() {
+    loadingTodos++;
     try {
-        const response = await fetch(`/api/v1/todos?search=${encodeURIComponent(search)}&filter=${filter}`);
+        // 'no-cache' faz o navegador revalidar com If-None-Match; se nada mudou,
+        // o servidor responde 304 e o corpo vem do cache HTTP do navegador.
+        const response = await fetch(buildTodosUrl(), { cache: 'no-cache' });
+        const etag = response.headers.get('ETag');
+        if (etag && etag === listEtag) {
+            return; // Mesma representação já renderizada
+        }
         const todos = await response.json();
+        listEtag = etag;
+        nextCursor = response.headers.get('X-Next-Cursor');
         renderTodos(todos);
     } catch (error) {
         console.error('Erro ao carregar tarefas:', error);
         showToast('Erro ao carregar tarefas', 'error');
+    } finally {
+        // Alterações recebidas durante a listagem podem não estar nela
+        if (--loadingTodos === 0) {
+            pendingChanges.splice(0).forEach(applyChange);
+        }
     }
 }
 
-// Renderiza a lista de tarefas
-function renderTodos(todos) {
+// Carrega a próxima página e adiciona ao final da lista
+async function loadMoreTodos() {
+    if (!nextCursor) return;
+
+    try {
+        const response = await fetch(buildTodosUrl(nextCursor));
+        const todos = await response.json();
+        nextCursor = response.headers.get('X-Next-Cursor');
+        renderTodos(todos, true);
+    } catch (error) {
+        console.error('Erro ao carregar mais tarefas:', error);
+        showToast('Erro ao carregar tarefas', 'error');
+    }
+}
+
+// Renderiza a lista de tarefas (append=true adiciona uma nova página)
+function renderTodos(todos, append = false) {
     const container = document.getElementById('todos-container');
     if (!container) return;
 
-    if (!todos || todos.length === 0) {
+    document.getElementById('load-more')?.remove();
+
+    if (!append && (!todos || todos.length === 0)) {
         container.innerHTML = `
             <div class="p-8 text-center bg-white rounded-lg shadow">
                 <svg class="mx-auto h-12 w-12 text-gray-400" fill="none" viewBox="0 0 24 24" stroke="currentColor">
@@ -63,7 +209,28 @@ function renderTodos(todos) {
         return;
     }
 
-    container.innerHTML = todos.map(todo => `
+    const html = todos.map(renderTodoItem).join('');
+    if (append) {
+        container.insertAdjacentHTML('beforeend', html);
+    } else {
+        container.innerHTML = html;
+    }
+
+    if (nextCursor) {
+        container.insertAdjacentHTML('beforeend', `
+            <div id="load-more" class="text-center">
+                <button type="button" onclick="loadMoreTodos()" class="btn btn-secondary">
+                    Carregar mais
+                </button>
+            </div>
+        `);
+    }
+}
+
+// Renderiza uma única tarefa
+function renderTodoItem(todo) {
+    todoVersions[todo.id] = todo.version;
+    return `
         <div class="bg-white rounded-lg shadow p-4" id="todo-${todo.id}">
             <div class="flex items-start justify-between">
                 <div class="flex-1">
@@ -97,7 +264,7 @@ function renderTodos(todos) {
                 </div>
             </div>
         </div>
-    `).join('');
+    `;
 }
 
 // Abre o modal para criar/editar uma tarefa
@@ -116,6 +283,7 @@ function openCreateModal(todo = null) {
         title.textContent = 'Nova Tarefa';
         form.reset();
         document.getElementById('todo-id').value = '';
+        createKey = idempotencyKey();
     }
     
     // Adiciona a classe active para ativar a animação e mostrar o modal
@@ -140,6 +308,23 @@ function closeModal() {
     modal.setAttribute('aria-hidden', 'true');
 }
 
+// Cabeçalhos de uma atualização: If-Match evita sobrescrever edições concorrentes
+function updateHeaders(id) {
+    const headers = { 'Content-Type': 'application/json' };
+    if (todoVersions[id]) {
+        headers['If-Match'] = `"${id}.${todoVersions[id]}"`;
+    }
+    return headers;
+}
+
+// Trata o conflito de versão (412): outra pessoa alterou a tarefa
+function handleConflict(response) {
+    if (response.status !== 412) return false;
+    showToast('A tarefa foi alterada em outro lugar. A lista foi recarregada.', 'error');
+    loadTodos();
+    return true;
+}
+
 // Salva uma tarefa (cria ou atualiza)
 async function saveTodo() {
     const id = document.getElementById('todo-id').value;
@@ -164,16 +349,25 @@ async function saveTodo() {
         
         const response = await fetch(url, {
             method,
-            headers: {
-                'Content-Type': 'application/json',
-            },
+            // A chave torna seguro repetir a criação (ex.: duplo clique)
+            headers: id
+                ? updateHeaders(id)
+                : { 'Content-Type': 'application/json', 'Idempotency-Key': createKey },
             body: JSON.stringify(todoData)
         });
+        // Respondida, a próxima criação usa outra chave; após uma falha de
+        // rede, o novo envio repete a mesma (e não duplica a tarefa)
+        if (!id) createKey = idempotencyKey();
         
+        if (handleConflict(response)) {
+            closeModal();
+            return;
+        }
         if (!response.ok) throw new Error('Erro ao salvar a tarefa');
         
+        const todo = await response.json();
         closeModal();
-        loadTodos();
+        queueChange({ op: id ? 'updated' : 'created', id: todo.id, todo });
         showToast(`Tarefa ${id ? 'atualizada' : 'criada'} com sucesso!`, 'success');
     } catch (error) {
         console.error('Erro ao salvar tarefa:', error);
@@ -181,20 +375,26 @@ async function saveTodo() {
     }
 }
 
+// Chave única por criação (crypto.randomUUID só existe em contextos seguros)
+function idempotencyKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
 // Alterna o status de conclusão de uma tarefa
 async function toggleTodoStatus(id, completed) {
     try {
         const response = await fetch(`/api/v1/todos/${id}`, {
             method: 'PUT',
-            headers: {
-                'Content-Type': 'application/json',
-            },
+            headers: updateHeaders(id),
             body: JSON.stringify({ completed })
         });
         
+        if (handleConflict(response)) return;
         if (!response.ok) throw new Error('Erro ao atualizar o status da tarefa');
         
-        loadTodos();
+        const todo = await response.json();
+        queueChange({ op: 'updated', id: todo.id, todo });
         showToast('Status da tarefa atualizado', 'success');
     } catch (error) {
         console.error('Erro ao atualizar status:', error);
@@ -240,8 +440,8 @@ async function deleteTodo() {
         
         if (!response.ok) throw new Error('Erro ao excluir a tarefa');
         
+        queueChange({ op: 'deleted', id: currentTodoId, todo: null });
         closeConfirmModal();
-        loadTodos();
         showToast('Tarefa excluída com sucesso!', 'success');
     } catch (error) {
         console.error('Erro ao excluir tarefa:', error);
@@ -318,3 +518,4 @@ window.confirmDelete = confirmDelete;
 window.closeConfirmModal = closeConfirmModal;
 window.deleteTodo = deleteTodo;
 window.editTodo = editTodo;
+window.loadMoreTodos = loadMoreTodos;
@@ -0,0 +1,28 @@
+"""
+Utilitários ASGI.
+"""
+from typing import Callable, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class LazyApp:
+    """
+    Aplicação ASGI construída só na primeira requisição.
+
+    Útil para montagens (`app.mount`) cujo custo de importação ou de
+    construção não deve pesar na inicialização, como os arquivos estáticos.
+    """
+
+    def __init__(self, factory: Callable[[], ASGIApp]):
+        self.factory = factory
+        self._app: Optional[ASGIApp] = None
+
+    @property
+    def app(self) -> ASGIApp:
+        if self._app is None:
+            self._app = self.factory()
+        return self._app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
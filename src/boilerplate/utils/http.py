@@ -0,0 +1,127 @@
+"""
+Utilitários HTTP: requisições condicionais (ETag / Last-Modified),
+negociação de `Content-Encoding` e rotas configuradas por template.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Pattern, Sequence, Tuple
+
+from starlette.routing import compile_path
+
+# Codificações que o middleware de compressão aplica; o ETag forte da
+# representação codificada leva o nome como sufixo (`"abc-gzip"`)
+CONTENT_CODINGS = ("gzip", "br", "zstd")
+
+
+def coded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag de uma representação codificada com `encoding`.
+
+    A RFC 9110 exige ETags fortes distintos para codificações distintas; os
+    fracos podem ser compartilhados e seguem iguais.
+    """
+    if etag.startswith("W/") or len(etag) < 2 or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def identity_etag(etag: str) -> str:
+    """Remove de um ETag o sufixo da codificação, se houver."""
+    for encoding in CONTENT_CODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Verifica se o cabeçalho `If-None-Match` corresponde ao ETag atual.
+
+    Segue a comparação fraca exigida para `If-None-Match` (RFC 9110): o
+    prefixo `W/` é ignorado e `*` corresponde a qualquer representação. Os
+    ETags das versões comprimidas correspondem ao da representação original.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if identity_etag(candidate) == target:
+            return True
+    return False
+
+
+def http_date(value: datetime) -> str:
+    """Formata uma data no padrão HTTP (IMF-fixdate, sempre em GMT)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: datetime) -> bool:
+    """
+    Verifica se o recurso não mudou desde a data de `If-Modified-Since`.
+
+    Datas HTTP têm resolução de segundos, então a comparação descarta os
+    microssegundos de `last_modified`. Datas inválidas são ignoradas.
+    """
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Sequence[str]) -> Optional[str]:
+    """
+    Escolhe, entre `available`, a codificação preferida pelo cliente.
+
+    Segue os pesos (`q`) do cabeçalho `Accept-Encoding`: `*` cobre as
+    codificações não listadas e `q=0` as recusa. Em caso de empate vence a
+    primeira de `available`, então ela deve vir na ordem de preferência do
+    servidor. Retorna None se nenhuma for aceita (resposta sem codificação).
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compile_route(route: str) -> Tuple[str, Pattern]:
+    """
+    Converte uma rota configurada (`"POST /api/v1/todos/{todo_id}"`) em
+    `(método, regex do caminho)`.
+
+    O caminho é comparado exatamente como declarado, inclusive a barra final.
+    """
+    method, _, path = route.strip().partition(" ")
+    if not method or not path.startswith("/"):
+        raise ValueError(f"Rota inválida: {route!r} (use 'MÉTODO /caminho')")
+    return method.upper(), compile_path(path)[0]
@@ -0,0 +1,400 @@
+"""
+Gerador de carga para a API de tarefas (`boilerplate loadtest`).
+
+O cliente HTTP/1.1 é mínimo e usa apenas `asyncio`: conexões keep-alive
+ficam em um pool e são reaproveitadas entre as requisições, sem o custo de
+um cliente completo no processo que gera a carga.
+
+Dois modos de geração:
+
+- laço fechado (`concurrency`): N trabalhadores enviam uma requisição assim
+  que recebem a resposta da anterior. Mede a vazão máxima com N clientes.
+- laço aberto (`rate`): as requisições chegam em uma taxa fixa, independente
+  das respostas. A latência é contada a partir do horário *agendado* de cada
+  chegada, então a fila formada quando o servidor não acompanha a taxa entra
+  na medição (evita a "omissão coordenada" do laço fechado).
+"""
+import asyncio
+import json
+import math
+import random
+import ssl
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+API_PREFIX = "/api/v1/todos"
+OPERATIONS = ("list", "get", "create", "update", "delete")
+DEFAULT_MIX = "list=40,get=40,create=10,update=10"
+PERCENTILES = (50.0, 95.0, 99.0, 99.9)
+
+
+class HTTPError(Exception):
+    """Falha de conexão ou resposta HTTP malformada."""
+
+
+class Connection:
+    """Conexão HTTP/1.1 persistente."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    async def request(
+        self, method: str, path: str, host: str, body: Optional[bytes] = None
+    ) -> Tuple[int, bytes]:
+        head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write(head.encode("latin-1") + b"\r\n" + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HTTPError("conexão encerrada pelo servidor")
+        try:
+            status = int(status_line.split(b" ", 2)[1])
+        except (IndexError, ValueError):
+            raise HTTPError(f"linha de status inválida: {status_line!r}") from None
+
+        length: Optional[int] = None
+        chunked = False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = b"chunked" in value
+            elif name == b"connection" and value == b"close":
+                self.reusable = False
+
+        if chunked:
+            payload = await self._read_chunked()
+        elif length is not None:
+            payload = await self.reader.readexactly(length)
+        elif status in (204, 304) or method == "HEAD":
+            payload = b""
+        else:
+            # Sem tamanho: o corpo vai até o fim da conexão
+            payload = await self.reader.read()
+            self.reusable = False
+        return status, payload
+
+    async def _read_chunked(self) -> bytes:
+        parts: List[bytes] = []
+        while True:
+            size = int((await self.reader.readline()).split(b";", 1)[0], 16)
+            if size == 0:
+                # Trailers opcionais até a linha vazia
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(parts)
+            parts.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class ConnectionPool:
+    """Pool de conexões keep-alive para um único servidor."""
+
+    def __init__(self, url: str, size: int, timeout: float = 10.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"URL não suportada: {url}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.host_header = parts.netloc
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.timeout = timeout
+        self.size = size
+        self._idle: List[Connection] = []
+        self._slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _connect(self) -> Connection:
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        self.opened += 1
+        return Connection(reader, writer)
+
+    async def request(
+        self, method: str, path: str, body: Optional[Any] = None
+    ) -> Tuple[int, bytes]:
+        """Envia a requisição por uma conexão livre (ou nova) do pool."""
+        data = json.dumps(body).encode() if body is not None else None
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await self._connect()
+            try:
+                result = await asyncio.wait_for(
+                    conn.request(method, path, self.host_header, data), self.timeout
+                )
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, HTTPError):
+                conn.close()
+                raise
+            if conn.reusable:
+                self._idle.append(conn)
+            else:
+                conn.close()
+            return result
+
+    def close(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Converte `list=40,get=40,create=20` em pesos por operação."""
+    mix: Dict[str, float] = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, weight = item.partition("=")
+        name = name.strip()
+        if not sep or name not in OPERATIONS:
+            raise ValueError(f"operação inválida em --mix: {item!r} (use {', '.join(OPERATIONS)})")
+        mix[name] = float(weight)
+        if mix[name] < 0:
+            raise ValueError(f"peso negativo em --mix: {item!r}")
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("--mix precisa de ao menos uma operação com peso positivo")
+    return mix
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not sorted_values:
+        return 0.0
+    # Arredonda antes do teto: 99.9% de 1000 dá 999.0000000000001 em ponto flutuante
+    rank = max(1, math.ceil(round(pct / 100 * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class Stats:
+    """Latências (em segundos) e resultados de um tipo de operação."""
+
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+    def record(self, latency: float, status: Optional[int]) -> None:
+        self.latencies.append(latency)
+        key = str(status) if status is not None else "erro"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+    def merge(self, other: "Stats") -> None:
+        self.latencies.extend(other.latencies)
+        self.errors += other.errors
+        for key, count in other.statuses.items():
+            self.statuses[key] = self.statuses.get(key, 0) + count
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        values = sorted(self.latencies)
+        count = len(values)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "statuses": dict(sorted(self.statuses.items())),
+            "throughput": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_ms": {
+                "mean": round(sum(values) / count * 1000, 3) if count else 0.0,
+                **{
+                    f"p{pct:g}".replace(".", ""): round(percentile(values, pct) * 1000, 3)
+                    for pct in PERCENTILES
+                },
+                "max": round(values[-1] * 1000, 3) if count else 0.0,
+            },
+        }
+
+
+@dataclass
+class LoadTestConfig:
+    url: str
+    duration: float = 10.0
+    warmup: float = 0.0
+    concurrency: int = 16
+    rate: Optional[float] = None  # req/s; define o laço aberto
+    connections: Optional[int] = None  # padrão: concurrency
+    mix: Dict[str, float] = field(default_factory=lambda: parse_mix(DEFAULT_MIX))
+    seed_todos: int = 100
+    page_size: int = 50
+    timeout: float = 10.0
+    random_seed: Optional[int] = None
+
+
+class Workload:
+    """Escolhe as operações conforme o mix e mantém os IDs conhecidos."""
+
+    def __init__(self, config: LoadTestConfig, pool: ConnectionPool):
+        self.config = config
+        self.pool = pool
+        self.random = random.Random(config.random_seed)
+        self.names = list(config.mix)
+        self.weights = [config.mix[name] for name in self.names]
+        self.ids: List[int] = []
+        self._created = 0
+
+    async def seed(self) -> None:
+        """Cria as tarefas iniciais (em lotes) para as leituras e escritas."""
+        remaining = self.config.seed_todos
+        while remaining > 0:
+            batch = min(remaining, 500)
+            items = [self._new_todo() for _ in range(batch)]
+            status, body = await self.pool.request("POST", f"{API_PREFIX}/bulk", items)
+            if status != 201:
+                raise HTTPError(f"falha ao criar as tarefas iniciais: HTTP {status}")
+            self.ids.extend(todo["id"] for todo in json.loads(body))
+            remaining -= batch
+
+    def _new_todo(self) -> Dict[str, Any]:
+        self._created += 1
+        return {"title": f"Carga {self._created}", "description": "gerada pelo loadtest"}
+
+    def choose(self) -> str:
+        return self.random.choices(self.names, self.weights)[0]
+
+    async def execute(self, operation: str) -> int:
+        pool, rng = self.pool, self.random
+        if operation in ("get", "update", "delete") and not self.ids:
+            # Sem tarefas conhecidas, a operação vira uma criação
+            operation = "create"
+        if operation == "list":
+            status, _ = await pool.request("GET", f"{API_PREFIX}/?limit={self.config.page_size}")
+        elif operation == "get":
+            status, _ = await pool.request("GET", f"{API_PREFIX}/{rng.choice(self.ids)}")
+        elif operation == "create":
+            status, body = await pool.request("POST", f"{API_PREFIX}/", self._new_todo())
+            if status == 201:
+                self.ids.append(json.loads(body)["id"])
+        elif operation == "update":
+            todo_id = rng.choice(self.ids)
+            status, _ = await pool.request(
+                "PUT", f"{API_PREFIX}/{todo_id}", {"completed": rng.random() < 0.5}
+            )
+        else:
+            # Troca o ID sorteado pelo último e remove, em O(1)
+            index = rng.randrange(len(self.ids))
+            self.ids[index], self.ids[-1] = self.ids[-1], self.ids[index]
+            status, _ = await pool.request("DELETE", f"{API_PREFIX}/{self.ids.pop()}")
+        return status
+
+
+async def run_loadtest(config: LoadTestConfig) -> Dict[str, Any]:
+    """Executa o teste de carga e retorna o relatório."""
+    connections = config.connections or config.concurrency
+    pool = ConnectionPool(config.url, connections, timeout=config.timeout)
+    workload = Workload(config, pool)
+    stats: Dict[str, Stats] = {name: Stats() for name in OPERATIONS}
+    try:
+        await workload.seed()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        measure_from = start + config.warmup
+        deadline = measure_from + config.duration
+
+        async def issue(operation: str, scheduled: float) -> None:
+            try:
+                status: Optional[int] = await workload.execute(operation)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, HTTPError):
+                status = None
+            if scheduled >= measure_from:
+                stats[operation].record(loop.time() - scheduled, status)
+
+        if config.rate:
+            await _open_loop(config, workload, issue, start, deadline)
+        else:
+            await _closed_loop(config, workload, issue, deadline)
+        elapsed = loop.time() - measure_from
+    finally:
+        pool.close()
+    return _report(config, stats, elapsed, connections, pool.opened)
+
+
+async def _closed_loop(config, workload, issue, deadline) -> None:
+    loop = asyncio.get_running_loop()
+
+    async def worker() -> None:
+        while (now := loop.time()) < deadline:
+            await issue(workload.choose(), now)
+
+    await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+
+
+async def _open_loop(config, workload, issue, start, deadline) -> None:
+    loop = asyncio.get_running_loop()
+    interval = 1 / config.rate
+    tasks = set()
+    arrival = start
+    while arrival < deadline:
+        delay = arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # Chegadas atrasadas (loop ocupado) mantêm o horário agendado
+        task = asyncio.create_task(issue(workload.choose(), arrival))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        arrival += interval
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def _report(
+    config: LoadTestConfig,
+    stats: Dict[str, Stats],
+    elapsed: float,
+    connections: int,
+    opened: int,
+) -> Dict[str, Any]:
+    total = Stats()
+    for item in stats.values():
+        total.merge(item)
+    return {
+        "url": config.url,
+        "mode": "open" if config.rate else "closed",
+        "rate": config.rate,
+        "concurrency": None if config.rate else config.concurrency,
+        "connections": connections,
+        "connections_opened": opened,
+        "duration": round(elapsed, 3),
+        "mix": config.mix,
+        "total": total.summary(elapsed),
+        "operations": {
+            name: item.summary(elapsed) for name, item in stats.items() if item.latencies
+        },
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Relatório em texto para o terminal."""
+    mode = (
+        f"laço aberto, {report['rate']:g} req/s"
+        if report["mode"] == "open"
+        else f"laço fechado, {report['concurrency']} clientes"
+    )
+    lines = [
+        f"{report['url']} — {mode}, {report['connections']} conexões "
+        f"({report['connections_opened']} abertas), {report['duration']:.1f} s",
+        "",
+        f"{'operação':<10}{'req':>9}{'erros':>7}{'req/s':>10}"
+        f"{'p50':>9}{'p95':>9}{'p99':>9}{'p99.9':>9}{'máx':>9}  (ms)",
+    ]
+    rows = list(report["operations"].items()) + [("total", report["total"])]
+    for name, item in rows:
+        latency = item["latency_ms"]
+        lines.append(
+            f"{name:<10}{item['requests']:>9}{item['errors']:>7}{item['throughput']:>10.1f}"
+            f"{latency['p50']:>9.2f}{latency['p95']:>9.2f}{latency['p99']:>9.2f}"
+            f"{latency['p999']:>9.2f}{latency['max']:>9.2f}"
+        )
+    statuses = ", ".join(f"{key}: {count}" for key, count in report["total"]["statuses"].items())
+    lines.extend(["", f"status: {statuses or '-'}"])
+    return "\n".join(lines)
@@ -0,0 +1,35 @@
+"""
+Utilitários para paginação por cursor (keyset).
+
+O cursor é opaco para o cliente: codifica o último ID da página anterior em
+base64 url-safe, de modo que o formato interno possa mudar sem quebrar a API.
+"""
+import base64
+import binascii
+from typing import Optional
+
+_PREFIX = "id:"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Gera o cursor que aponta para os itens posteriores a `last_id`."""
+    raw = f"{_PREFIX}{last_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Decodifica um cursor gerado por `encode_cursor`.
+
+    Retorna None para cursor vazio e lança ValueError para cursores inválidos.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Cursor inválido") from exc
+    if not raw.startswith(_PREFIX) or not raw[len(_PREFIX):].isdigit():
+        raise ValueError("Cursor inválido")
+    return int(raw[len(_PREFIX):])
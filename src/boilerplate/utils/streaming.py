@@ -0,0 +1,113 @@
+"""
+Utilitários para corpos HTTP transmitidos em partes (streaming).
+"""
+import zlib
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple
+
+# wbits=31: formato gzip (cabeçalho e CRC), compatível com `gunzip`
+_GZIP_WBITS = 31
+
+
+async def gzip_stream(chunks: AsyncIterable[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """
+    Comprime um fluxo de bytes em gzip, parte a parte.
+
+    Apenas o estado do compressor fica em memória; partes que ainda não
+    produziram saída comprimida não geram envio.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Detecta automaticamente os cabeçalhos gzip e zlib
+_AUTO_WBITS = zlib.MAX_WBITS | 32
+
+
+async def gunzip_stream(
+    chunks: AsyncIterable[bytes], max_chunk: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """
+    Descomprime um fluxo gzip parte a parte.
+
+    Cada parte produzida tem no máximo `max_chunk` bytes, de modo que um
+    corpo muito comprimido não é expandido de uma vez na memória. Aceita
+    membros gzip concatenados e lança `ValueError` se o fluxo for inválido
+    ou terminar antes do fim do último membro.
+    """
+    decompressor = zlib.decompressobj(_AUTO_WBITS)
+    # Indica se o membro atual já recebeu dados (um membro vazio no fim do
+    # fluxo não é truncamento)
+    in_member = False
+    try:
+        async for chunk in chunks:
+            while chunk:
+                in_member = True
+                data = decompressor.decompress(chunk, max_chunk)
+                if data:
+                    yield data
+                if decompressor.eof:
+                    # Próximo membro de um gzip concatenado
+                    chunk = decompressor.unused_data
+                    decompressor = zlib.decompressobj(_AUTO_WBITS)
+                    in_member = False
+                else:
+                    chunk = decompressor.unconsumed_tail
+        # Saída que ficou retida pelo limite de `max_chunk` (no máximo uma janela)
+        data = decompressor.flush()
+        if data:
+            yield data
+    except zlib.error as exc:
+        raise ValueError(f"Conteúdo gzip inválido: {exc}") from exc
+    if in_member and not decompressor.eof:
+        raise ValueError("Conteúdo gzip truncado")
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Separa um fluxo de bytes em linhas, sem acumular o fluxo inteiro.
+
+    Produz `(número da linha, conteúdo)` com numeração a partir de 1 e sem o
+    terminador (`\\n` ou `\\r\\n`). Linhas maiores que `max_line_bytes` são
+    descartadas e produzidas com conteúdo None.
+    """
+    pending = bytearray()
+    overflow = False
+    line_no = 0
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not overflow:
+                    pending += chunk[start:]
+                    if len(pending) > max_line_bytes:
+                        overflow = True
+                        pending.clear()
+                break
+            line_no += 1
+            if overflow:
+                yield line_no, None
+                overflow = False
+            elif pending:
+                pending += chunk[start:end]
+                line = bytes(pending)
+                pending.clear()
+                yield line_no, _strip_cr(line) if len(line) <= max_line_bytes else None
+            else:
+                line = chunk[start:end]
+                yield line_no, _strip_cr(line) if len(line) <= max_line_bytes else None
+            start = end + 1
+    if overflow:
+        yield line_no + 1, None
+    elif pending:
+        yield line_no + 1, _strip_cr(bytes(pending))
+
+
+def _strip_cr(line: bytes) -> bytes:
+    return line[:-1] if line.endswith(b"\r") else line
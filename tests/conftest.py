@@ -1,6 +1,12 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
+# Os testes usam o backend em memória por padrão; os testes de integração
+# também são executados contra o SQLite (ver tests/integration/conftest.py).
+os.environ.setdefault("DATABASE_URL", "memory://")
+
 from boilerplate.main import app
 
 
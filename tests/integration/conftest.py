@@ -0,0 +1,26 @@
+import pytest
+
+from boilerplate.core.cache import MemoryCache
+from boilerplate.core.changes import create_change_feed
+from boilerplate.core.storage import CompactMemoryBackend, MemoryBackend, SQLiteBackend
+from boilerplate.services import todo as todo_service
+
+
+@pytest.fixture(autouse=True, params=["memory", "compact", "sqlite"])
+def storage_backend(request, tmp_path):
+    """Executa cada teste de integração contra todos os backends."""
+    if request.param == "sqlite":
+        backend = SQLiteBackend(str(tmp_path / "todos.db"))
+    elif request.param == "compact":
+        backend = CompactMemoryBackend()
+    else:
+        backend = MemoryBackend()
+    previous = todo_service.set_storage(backend)
+    previous_cache = todo_service.set_cache(MemoryCache(ttl=300))
+    # Com o SQLite, o registro de alterações fica no banco
+    previous_changes = todo_service.set_changes(create_change_feed(backend))
+    yield backend
+    todo_service.set_storage(previous)
+    todo_service.set_cache(previous_cache)
+    todo_service.set_changes(previous_changes)
+    backend.close()
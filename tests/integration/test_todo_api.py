@@ -2,7 +2,12 @@
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch
+import asyncio
+import csv
+import gzip
+import io
 import json
+import uuid
 
 # Importa o aplicativo FastAPI do pacote instalado
 from boilerplate.main import app
@@ -40,6 +45,30 @@ class TestTodoAPI:
         assert "created_at" in data
         assert "updated_at" in data
     
+    def test_create_todo_with_idempotency_key(self):
+        """Testa que repetir a criação com a mesma Idempotency-Key não duplica a tarefa."""
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        first = self.client.post(f"{self.base_url}/", json=self.sample_todo, headers=headers)
+        retry = self.client.post(f"{self.base_url}/", json=self.sample_todo, headers=headers)
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert len(self.client.get(f"{self.base_url}/").json()) == 1
+
+        # A mesma chave com outro conteúdo é rejeitada
+        other = self.client.post(f"{self.base_url}/", json={"title": "Outra"}, headers=headers)
+        assert other.status_code == 422
+
+    def test_idempotency_key_is_reusable_after_an_error(self):
+        """Testa que uma requisição rejeitada não prende a Idempotency-Key."""
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        invalid = self.client.post(f"{self.base_url}/", json={"description": "Sem título"}, headers=headers)
+        assert invalid.status_code == 422
+
+        fixed = self.client.post(f"{self.base_url}/", json=self.sample_todo, headers=headers)
+        assert fixed.status_code == 201
+        assert "Idempotent-Replayed" not in fixed.headers
+
     def test_get_todo_by_id(self):
         """Testa a busca de uma tarefa por ID via API."""
         # Primeiro cria uma tarefa
@@ -114,3 +143,456 @@ class TestTodoAPI:
         pending_count = sum(1 for t in todos if t.get("completed") is False)
         assert completed_count >= 2
         assert pending_count >= 1
+
+    def test_list_todos_paginated(self):
+        """Testa a paginação por cursor da listagem."""
+        created_ids = [self._create_todo()["id"] for _ in range(5)]
+
+        seen = []
+        response = self.client.get(f"{self.base_url}?limit=2")
+        while True:
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 2
+            seen.extend(t["id"] for t in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                assert "Link" not in response.headers
+                break
+            assert 'rel="next"' in response.headers["Link"]
+            response = self.client.get(f"{self.base_url}?limit=2&cursor={cursor}")
+
+        assert seen == sorted(seen)
+        assert set(created_ids) <= set(seen)
+
+    def test_list_todos_invalid_cursor(self):
+        """Testa que cursores inválidos e limites fora da faixa são rejeitados."""
+        response = self.client.get(f"{self.base_url}?cursor=nao-e-um-cursor")
+        assert response.status_code == 400
+
+        response = self.client.get(f"{self.base_url}?limit=0")
+        assert response.status_code == 422
+
+    def test_list_todos_search_and_filter(self):
+        """Testa a busca textual e o filtro por status na listagem."""
+        self.client.post(self.base_url, json={"title": "Comprar pão", "description": "Padaria da esquina", "completed": False})
+        self.client.post(self.base_url, json={"title": "Estudar Python", "description": "Capítulo de ação assíncrona", "completed": True})
+        self.client.post(self.base_url, json={"title": "Comprar café", "description": None, "completed": True})
+
+        titles = lambda resp: sorted(t["title"] for t in resp.json())
+
+        response = self.client.get(f"{self.base_url}?search=compr")
+        assert titles(response) == ["Comprar café", "Comprar pão"]
+
+        response = self.client.get(f"{self.base_url}?search=compr&filter=completed")
+        assert titles(response) == ["Comprar café"]
+
+        response = self.client.get(f"{self.base_url}?filter=pending")
+        assert all(t["completed"] is False for t in response.json())
+
+        # A busca ignora acentos e maiúsculas
+        response = self.client.get(f"{self.base_url}?search=ACAO")
+        assert titles(response) == ["Estudar Python"]
+
+        response = self.client.get(f"{self.base_url}?filter=invalido")
+        assert response.status_code == 422
+
+    def test_bulk_create_update_delete(self):
+        """Testa os endpoints de criação, atualização e exclusão em lote."""
+        payload = [{"title": f"Lote {i}", "completed": False} for i in range(5)]
+        response = self.client.post(f"{self.base_url}/bulk", json=payload)
+        assert response.status_code == 201
+        results = response.json()
+        ids = [r["id"] for r in results]
+        assert ids == list(range(ids[0], ids[0] + 5))  # IDs contíguos
+        assert all(r["status"] == 201 for r in results)
+        assert [r["todo"]["title"] for r in results] == [p["title"] for p in payload]
+
+        updates = [{"id": ids[0], "completed": True}, {"id": 999999, "title": "X"}]
+        response = self.client.patch(f"{self.base_url}/bulk", json=updates)
+        assert response.status_code == 200
+        first, missing = response.json()
+        assert first["status"] == 200
+        assert first["todo"]["completed"] is True
+        assert first["todo"]["title"] == "Lote 0"
+        assert missing["status"] == 404
+
+        response = self.client.request(
+            "DELETE", f"{self.base_url}/bulk", json={"ids": [ids[1], ids[1], 999999]}
+        )
+        assert response.status_code == 200
+        assert [r["status"] for r in response.json()] == [204, 404, 404]
+        assert self.client.get(f"{self.base_url}/{ids[1]}").status_code == 404
+
+    def test_bulk_create_is_all_or_nothing(self):
+        """Testa que um item inválido rejeita o lote inteiro."""
+        before = self.client.get(self.base_url).json()
+        response = self.client.post(
+            f"{self.base_url}/bulk", json=[{"title": "Válida"}, {"description": "sem título"}]
+        )
+        assert response.status_code == 422
+        assert self.client.get(self.base_url).json() == before
+
+    def test_bulk_size_limit(self, monkeypatch):
+        """Testa que lotes acima de MAX_BULK_ITEMS são rejeitados."""
+        from boilerplate.config import settings
+
+        monkeypatch.setattr(settings, "MAX_BULK_ITEMS", 2)
+        response = self.client.post(f"{self.base_url}/bulk", json=[{"title": "A"}] * 3)
+        assert response.status_code == 413
+
+    def test_read_cache_hits_and_invalidation(self):
+        """Testa que leituras repetidas usam o cache e mutações o invalidam."""
+        created = self._create_todo()
+        stats = lambda: self.client.get("/health/cache").json()
+
+        self.client.get(f"{self.base_url}/{created['id']}")
+        hits = stats()["hits"]
+        response = self.client.get(f"{self.base_url}/{created['id']}")
+        assert response.json() == created
+        assert stats()["hits"] == hits + 1
+
+        listing = self.client.get(self.base_url).json()
+        self.client.put(f"{self.base_url}/{created['id']}", json={"title": "Novo título"})
+        assert self.client.get(f"{self.base_url}/{created['id']}").json()["title"] == "Novo título"
+        updated_listing = self.client.get(self.base_url).json()
+        assert updated_listing != listing
+        assert any(t["title"] == "Novo título" for t in updated_listing)
+
+    def test_cache_follows_writes_from_other_workers(self, storage_backend):
+        """Testa que escritas que não passam por este cache (outro worker) não deixam respostas antigas."""
+        from boilerplate.core.clock import get_clock
+
+        created = self._create_todo()
+        url = f"{self.base_url}/{created['id']}"
+        listing = self.client.get(self.base_url)
+        item = self.client.get(url)
+        assert self.client.get(url).status_code == 200  # resposta já no cache
+
+        # Escritas direto no armazenamento, sem invalidar o cache deste processo
+        now = get_clock().now()
+        asyncio.run(storage_backend.create({"title": "De outro worker", "completed": False}, now))
+        asyncio.run(storage_backend.update(created["id"], {"title": "Alterada"}, now))
+
+        response = self.client.get(self.base_url, headers={"If-None-Match": listing.headers["ETag"]})
+        assert response.status_code == 200
+        assert [t["title"] for t in response.json()] == ["Alterada", "De outro worker"]
+        response = self.client.get(url, headers={"If-None-Match": item.headers["ETag"]})
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        assert response.headers["ETag"] != item.headers["ETag"]
+
+    def test_list_etag_changes_after_restart(self, storage_backend):
+        """Testa que um ETag de antes de um reinício do backend em memória não vale depois."""
+        from boilerplate.services import todo as todo_service
+
+        if not storage_backend.epoch:
+            pytest.skip("armazenamento persistente")
+        self._create_todo()
+        etag = self.client.get(self.base_url).headers["ETag"]
+
+        # Outro processo: mesma contagem de versões, outros dados
+        restarted = type(storage_backend)()
+        previous = todo_service.set_storage(restarted)
+        try:
+            self.client.post(self.base_url, json={"title": "Depois do reinício"})
+            response = self.client.get(self.base_url, headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert [t["title"] for t in response.json()] == ["Depois do reinício"]
+        finally:
+            todo_service.set_storage(previous)
+            restarted.close()
+
+    def test_item_etags_change_after_restart(self, storage_backend):
+        """Testa que ETags de tarefas de antes de um reinício não valem depois."""
+        from boilerplate.services import todo as todo_service
+
+        if not storage_backend.epoch:
+            pytest.skip("armazenamento persistente")
+        created = self._create_todo()
+        url = f"{self.base_url}/{created['id']}"
+        etag = self.client.get(url).headers["ETag"]
+
+        # Outro processo: a nova tarefa recebe o mesmo ID e a mesma versão
+        restarted = type(storage_backend)()
+        previous = todo_service.set_storage(restarted)
+        try:
+            assert self._create_todo()["id"] == created["id"]
+            response = self.client.get(url, headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+
+            response = self.client.put(url, json={"title": "Sobrescrita"}, headers={"If-Match": etag})
+            assert response.status_code == 412
+        finally:
+            todo_service.set_storage(previous)
+            restarted.close()
+
+    def test_list_etag_not_modified(self):
+        """Testa o ETag da listagem e a resposta 304."""
+        self._create_todo()
+        response = self.client.get(self.base_url)
+        etag = response.headers["ETag"]
+
+        response = self.client.get(self.base_url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        # Outra consulta tem outro ETag
+        other = self.client.get(f"{self.base_url}?filter=completed").headers["ETag"]
+        assert other != etag
+
+        # Qualquer escrita muda a versão da coleção
+        self._create_todo()
+        response = self.client.get(self.base_url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_item_etag_and_last_modified(self):
+        """Testa ETag, Last-Modified e requisições condicionais de uma tarefa."""
+        created = self._create_todo()
+        url = f"{self.base_url}/{created['id']}"
+        response = self.client.get(url)
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+
+        for _ in range(2):  # sem e com a resposta no cache
+            response = self.client.get(url, headers={"If-None-Match": etag})
+            assert response.status_code == 304
+        response = self.client.get(url, headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+
+        self.client.put(url, json={"title": "Alterada"})
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_update_with_if_match(self):
+        """Testa a concorrência otimista com If-Match e expected_version."""
+        created = self._create_todo()
+        url = f"{self.base_url}/{created['id']}"
+        assert created["version"] == 1
+        etag = self.client.get(url).headers["ETag"]
+
+        response = self.client.put(url, json={"title": "Primeiro"}, headers={"If-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        assert response.headers["ETag"] != etag
+
+        # Um segundo editor com o ETag antigo não sobrescreve a alteração
+        response = self.client.put(url, json={"title": "Segundo"}, headers={"If-Match": etag})
+        assert response.status_code == 412
+        assert self.client.get(url).json()["title"] == "Primeiro"
+
+        response = self.client.put(f"{url}?expected_version=2", json={"title": "Segundo"})
+        assert response.status_code == 200
+        response = self.client.put(f"{url}?expected_version=2", json={"title": "Terceiro"})
+        assert response.status_code == 412
+
+        response = self.client.put(url, json={"completed": True}, headers={"If-Match": "*"})
+        assert response.status_code == 200
+
+    def test_bulk_update_version_conflict(self):
+        """Testa o status 412 por item na atualização em lote."""
+        created = self._create_todo()
+        updates = [
+            {"id": created["id"], "title": "A", "expected_version": 1},
+            {"id": created["id"], "title": "B", "expected_version": 1},
+        ]
+        response = self.client.patch(f"{self.base_url}/bulk", json=updates)
+        assert [r["status"] for r in response.json()] == [200, 412]
+        assert self.client.get(f"{self.base_url}/{created['id']}").json()["title"] == "A"
+
+    def test_export_ndjson_and_csv(self, monkeypatch):
+        """Testa a exportação em streaming, com lotes menores que a coleção."""
+        from boilerplate.config import settings
+        monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 2)
+        todos = [{"title": f"Exportar {i}", "completed": i % 2 == 0} for i in range(5)]
+        created = self.client.post(f"{self.base_url}/bulk", json=todos).json()
+
+        response = self.client.get(f"{self.base_url}/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.content.splitlines()
+        assert [json.loads(line) for line in lines] == [r["todo"] for r in created]
+        # Cada linha é idêntica à representação do item na API
+        assert lines[0] == self.client.get(f"{self.base_url}/{created[0]['id']}").content
+
+        response = self.client.get(f"{self.base_url}/export?format=csv&filter=completed")
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["title"] for row in rows] == ["Exportar 0", "Exportar 2", "Exportar 4"]
+        assert rows[0]["completed"] == "true"
+        assert rows[0]["description"] == ""
+
+    def test_export_gzip(self):
+        """Testa a exportação comprimida."""
+        self._create_todo()
+        response = self.client.get(f"{self.base_url}/export?gzip=true")
+        assert response.headers["content-type"] == "application/gzip"
+        assert 'filename="todos.ndjson.gz"' in response.headers["content-disposition"]
+        rows = [json.loads(line) for line in gzip.decompress(response.content).splitlines()]
+        assert [row["title"] for row in rows] == [self.sample_todo["title"]]
+
+        response = self.client.get(f"{self.base_url}/export?format=csv&gzip=true&search=nada")
+        assert gzip.decompress(response.content).decode().splitlines() == [
+            "id,title,description,completed,version,created_at,updated_at"
+        ]
+
+    def test_import_ndjson(self, monkeypatch):
+        """Testa a importação em lotes com erros por linha."""
+        from boilerplate.config import settings
+        monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+        lines = [
+            json.dumps({"title": "Importada 1"}),
+            "",
+            json.dumps({"title": "Importada 2", "completed": True}),
+            "{inválido",
+            json.dumps({"description": "sem título"}),
+            json.dumps({"title": "Importada 3"}),
+        ]
+        response = self.client.post(
+            f"{self.base_url}/import",
+            content="\r\n".join(lines).encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["lines"] == 5
+        assert result["imported"] == 3
+        assert result["failed"] == 2
+        assert result["batches"] == 2
+        assert [error["line"] for error in result["errors"]] == [4, 5]
+        assert result["errors"][1]["errors"][0]["loc"] == ["title"]
+
+        titles = [todo["title"] for todo in self.client.get(f"{self.base_url}/").json()]
+        assert titles == ["Importada 1", "Importada 2", "Importada 3"]
+
+    def test_import_gzip_round_trip(self):
+        """Testa que um export comprimido pode ser reimportado."""
+        self.client.post(f"{self.base_url}/bulk", json=[{"title": f"T{i}"} for i in range(3)])
+        exported = self.client.get(f"{self.base_url}/export?gzip=true").content
+
+        response = self.client.post(
+            f"{self.base_url}/import",
+            content=exported,
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert response.json()["imported"] == 3
+        assert len(self.client.get(f"{self.base_url}/").json()) == 6
+
+        response = self.client.post(
+            f"{self.base_url}/import", content=exported[:-8], headers={"Content-Encoding": "gzip"}
+        )
+        assert response.status_code == 400
+        assert "3 tarefas importadas" in response.json()["error"]["message"]
+
+        response = self.client.post(
+            f"{self.base_url}/import", content=b"", headers={"Content-Encoding": "br"}
+        )
+        assert response.status_code == 415
+
+    def test_metrics_endpoint(self):
+        """Testa as métricas por template de rota em /metrics."""
+        created = self._create_todo()
+        self.client.get(f"{self.base_url}/{created['id']}")
+
+        response = self.client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert 'http_requests_total{method="GET",route="/api/v1/todos/{todo_id}",status="200"}' in text
+        assert 'http_request_duration_seconds_bucket{method="POST",route="/api/v1/todos/",le="+Inf"}' in text
+        assert 'todo_service_duration_seconds_count{operation="create_todo"}' in text
+        assert 'storage_backend_stats{backend=' in text
+
+    def _changes(self, monkeypatch, **headers):
+        """Eventos SSE de uma conexão curta a /changes: lista de (id, evento, dados)."""
+        from boilerplate.config import settings
+
+        monkeypatch.setattr(settings, "CHANGES_STREAM_TIMEOUT", 0.05)
+        response = self.client.get(f"{self.base_url}/changes", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = []
+        for block in response.text.split("\n\n"):
+            fields = dict(
+                line.split(": ", 1) for line in block.splitlines() if not line.startswith(":")
+            )
+            if "event" in fields:
+                events.append((fields["id"], fields["event"], json.loads(fields["data"])))
+        return events
+
+    def test_changes_stream(self, monkeypatch):
+        """Testa o SSE de alterações, a retomada por Last-Event-ID e o reset."""
+        from boilerplate.core.changes import create_change_feed
+        from boilerplate.services import todo as todo_service
+
+        previous = todo_service.set_changes(create_change_feed(todo_service.get_storage(), capacity=4))
+        try:
+            # Primeira conexão: o cliente deve carregar a listagem
+            [(start, event, _)] = self._changes(monkeypatch)
+            assert event == "reset"
+
+            created = self._create_todo()
+            self.client.put(f"{self.base_url}/{created['id']}", json={"completed": True})
+            self.client.delete(f"{self.base_url}/{created['id']}")
+
+            events = self._changes(monkeypatch, **{"Last-Event-ID": start})
+            assert [(event, data["id"]) for _, event, data in events] == [
+                ("created", created["id"]),
+                ("updated", created["id"]),
+                ("deleted", created["id"]),
+            ]
+            assert events[1][2]["todo"]["completed"] is True
+            assert events[2][2]["todo"] is None
+            # Já em dia: nenhum evento
+            assert self._changes(monkeypatch, **{"Last-Event-ID": events[-1][0]}) == []
+
+            # Mais alterações que o buffer comporta: o cliente recebe um reset
+            self.client.post(f"{self.base_url}/bulk", json=[{"title": f"T{i}"} for i in range(5)])
+            [(_, event, _)] = self._changes(monkeypatch, **{"Last-Event-ID": events[-1][0]})
+            assert event == "reset"
+        finally:
+            todo_service.set_changes(previous)
+
+
+    def _bootstrap(self):
+        """JSON embutido na página /todos e a posição do registro de alterações."""
+        import re
+
+        response = self.client.get("/todos")
+        assert response.status_code == 200
+        match = re.search(
+            r'<script type="application/json" id="todos-bootstrap" data-last-event-id="([^"]+)">(.*?)</script>',
+            response.text,
+            re.S,
+        )
+        return match.group(1), json.loads(match.group(2))
+
+    def test_todos_page_embeds_first_page(self, monkeypatch):
+        """Testa a primeira página embutida no HTML, seu ETag e o cache por versão."""
+        from boilerplate.services.todo import get_cache
+
+        self.client.post(f"{self.base_url}/", json={"title": "</script><b>x</b> & cia"})
+        todo = self._create_todo()
+        last_event_id, data = self._bootstrap()
+        assert [item["id"] for item in data["items"]] == [todo["id"] - 1, todo["id"]]
+        assert data["items"][0]["title"] == "</script><b>x</b> & cia"
+        assert data["next_cursor"] is None
+
+        # Mesmo ETag da listagem que o script revalidaria
+        listing = self.client.get(
+            f"{self.base_url}?search=&filter=all", headers={"If-None-Match": data["etag"]}
+        )
+        assert listing.status_code == 304
+
+        # A alteração seguinte é entregue a partir da posição embutida
+        hits = get_cache().stats.hits
+        assert self._bootstrap()[1] == data
+        assert get_cache().stats.hits == hits + 1
+        self.client.delete(f"{self.base_url}/{todo['id']}")
+        events = self._changes(monkeypatch, **{"Last-Event-ID": last_event_id})
+        assert [(event, change["id"]) for _, event, change in events] == [("deleted", todo["id"])]
+        assert [item["id"] for item in self._bootstrap()[1]["items"]] == [todo["id"] - 1]
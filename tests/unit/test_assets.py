@@ -0,0 +1,97 @@
+"""Testes unitários para os arquivos estáticos versionados e pré-comprimidos."""
+import gzip
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from boilerplate.core.assets import IMMUTABLE, AssetManifest, StaticAssets, build_assets
+
+SCRIPT = b"console.log('tarefas');\n" * 50
+
+
+@pytest.fixture
+def static(tmp_path):
+    source = tmp_path / "static"
+    (source / "js").mkdir(parents=True)
+    (source / "js" / "todos.js").write_bytes(SCRIPT)
+    (source / "images").mkdir()
+    (source / "images" / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+    return source
+
+
+def _client(source, build):
+    manifest = AssetManifest(build)
+    app = Starlette(routes=[
+        Mount("/static", StaticAssets(directory=str(source), manifest=manifest), name="static"),
+    ])
+    return TestClient(app), manifest
+
+
+def test_build_writes_fingerprinted_files_and_manifest(static, tmp_path):
+    build = tmp_path / "build"
+    manifest = build_assets(static, build)
+
+    script = manifest["assets"]["js/todos.js"]
+    assert script["path"].startswith("js/todos.") and script["path"].endswith(".js")
+    assert (build / script["path"]).read_bytes() == SCRIPT
+    assert gzip.decompress((build / f"{script['path']}.gz").read_bytes()) == SCRIPT
+    assert script["encodings"]["gzip"] < len(SCRIPT)
+    # Formatos já comprimidos não ganham variantes
+    assert manifest["assets"]["images/logo.png"]["encodings"] == {}
+    assert json.loads((build / "manifest.json").read_text()) == manifest
+
+    # Mesmo conteúdo, mesmo nome; conteúdo novo, nome novo
+    assert build_assets(static, build)["assets"]["js/todos.js"]["path"] == script["path"]
+    (static / "js" / "todos.js").write_bytes(SCRIPT + b"//")
+    assert build_assets(static, build)["assets"]["js/todos.js"]["path"] != script["path"]
+    assert len(list((build / "js").glob("todos.*.js"))) == 1
+
+
+def test_build_rejects_output_containing_sources(static):
+    with pytest.raises(ValueError):
+        build_assets(static, static.parent)
+
+
+def test_serves_precompressed_variant_with_immutable_cache(static, tmp_path):
+    build_assets(static, tmp_path / "build")
+    client, manifest = _client(static, tmp_path / "build")
+    path = manifest.url_path("/js/todos.js")
+    assert path != "js/todos.js"
+
+    response = client.get(f"/static/{path}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "javascript" in response.headers["content-type"]
+    assert response.content == SCRIPT
+
+    plain = client.get(f"/static/{path}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert int(plain.headers["content-length"]) == len(SCRIPT)
+
+    etag = response.headers["etag"]
+    revalidated = client.get(
+        f"/static/{path}", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_original_names_keep_default_behavior(static, tmp_path):
+    build_assets(static, tmp_path / "build")
+    client, _ = _client(static, tmp_path / "build")
+    response = client.get("/static/js/todos.js", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert "immutable" not in response.headers.get("cache-control", "")
+    assert client.get("/static/js/todos.000000000000.js").status_code == 404
+
+
+def test_without_build_paths_are_unchanged(static, tmp_path):
+    client, manifest = _client(static, tmp_path / "sem-build")
+    assert not manifest
+    assert manifest.url_path("js/todos.js") == "js/todos.js"
+    assert client.get("/static/js/todos.js").content == SCRIPT
@@ -0,0 +1,107 @@
+"""Testes unitários para o cache de respostas."""
+import pytest
+
+from boilerplate.core.cache import (
+    MemoryCache,
+    SharedCache,
+    create_cache,
+    pack_response,
+    unpack_response,
+)
+
+
+class FakeRedis:
+    """Substituto local de `redis.asyncio.Redis` com os métodos usados pelo cache."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+@pytest.fixture(params=["memory", "shared"])
+def cache(request):
+    if request.param == "memory":
+        return MemoryCache(ttl=60, max_entries=2)
+    return SharedCache(FakeRedis(), ttl=60)
+
+
+class TestResponseCache:
+    """Comportamento comum aos backends de cache."""
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss_counters(self, cache):
+        assert await cache.get("a") is None
+        await cache.set("a", b"1")
+        assert await cache.get("a") == b"1"
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+        assert cache.info()["sets"] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_removes_keys(self, cache):
+        await cache.set("a", b"1")
+        await cache.set("b", b"2")
+        await cache.invalidate(["a"])
+        assert await cache.get("a") is None
+        assert await cache.get("b") == b"2"
+
+    @pytest.mark.asyncio
+    async def test_stale_generation_is_not_stored(self, cache):
+        generation = await cache.generation()
+        await cache.invalidate()
+        await cache.set("a", b"antigo", generation)
+        assert await cache.get("a") is None
+
+
+class TestMemoryCache:
+    """Testes específicos do cache em memória."""
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = MemoryCache(ttl=60, max_entries=2)
+        await cache.set("a", b"1")
+        await cache.set("b", b"2")
+        await cache.get("a")  # "a" passa a ser o mais recente
+        await cache.set("c", b"3")
+        assert await cache.get("b") is None
+        assert await cache.get("a") == b"1"
+        assert cache.stats.evictions == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiration(self, monkeypatch):
+        cache = MemoryCache(ttl=10)
+        now = [100.0]
+        monkeypatch.setattr("boilerplate.core.cache.time.monotonic", lambda: now[0])
+        await cache.set("a", b"1")
+        assert await cache.get("a") == b"1"
+        now[0] = 111.0
+        assert await cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_disabled_with_zero_ttl(self):
+        cache = MemoryCache(ttl=0)
+        await cache.set("a", b"1")
+        assert await cache.get("a") is None
+
+
+def test_pack_unpack_roundtrip():
+    packed = pack_response(b'[{"id":1}]', {"X-Next-Cursor": "abc"})
+    assert unpack_response(packed) == (b'[{"id":1}]', {"X-Next-Cursor": "abc"})
+
+
+def test_create_cache_unsupported_url():
+    with pytest.raises(ValueError):
+        create_cache("memcached://localhost", ttl=60)
@@ -0,0 +1,210 @@
+"""Testes unitários para o registro de alterações (change feed)."""
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from boilerplate.core.changes import (
+    CREATED,
+    DELETED,
+    UPDATED,
+    MemoryChangeFeed,
+    StorageChangeFeed,
+    create_change_feed,
+)
+from boilerplate.core.storage import MemoryBackend, SQLiteBackend
+
+
+def _todo(todo_id, version=1):
+    return {
+        "id": todo_id,
+        "title": f"T{todo_id}",
+        "description": None,
+        "completed": False,
+        "version": version,
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-01-01T00:00:00Z",
+    }
+
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class TestMemoryChangeFeed:
+    """Testes para `MemoryChangeFeed`."""
+
+    @pytest.mark.asyncio
+    async def test_publish_assigns_sequence_and_serializes_snapshot(self):
+        feed = MemoryChangeFeed()
+        todo = _todo(1)
+        await feed.publish(CREATED, 1, todo)
+        todo["title"] = "alterado depois"
+
+        [change] = await feed.since(0)
+        assert (change.seq, change.op, change.todo_id) == (1, CREATED, 1)
+        data = json.loads(change.data)
+        assert data["seq"] == 1 and data["op"] == "created"
+        assert data["todo"]["title"] == "T1"
+
+        await feed.publish_deleted([1])
+        [change] = await feed.since(1)
+        assert json.loads(change.data) == {"seq": 2, "op": "deleted", "id": 1, "todo": None}
+
+    @pytest.mark.asyncio
+    async def test_since_returns_missed_events_in_order(self):
+        feed = MemoryChangeFeed()
+        await feed.publish_many(CREATED, [_todo(1), _todo(2)])
+        await feed.publish(UPDATED, 1, _todo(1, version=2))
+
+        assert [c.seq for c in await feed.since(0)] == [1, 2, 3]
+        assert [(c.op, c.todo_id) for c in await feed.since(1)] == [(CREATED, 2), (UPDATED, 1)]
+        assert await feed.since(3) == []
+
+    @pytest.mark.asyncio
+    async def test_since_detects_overrun_buffer(self):
+        feed = MemoryChangeFeed(capacity=3)
+        await feed.publish_deleted(range(1, 6))
+
+        assert await feed.last_seq() == 5
+        assert [c.seq for c in await feed.since(2)] == [3, 4, 5]
+        assert await feed.since(1) is None
+
+    @pytest.mark.asyncio
+    async def test_event_ids_are_bound_to_the_epoch(self):
+        feed = MemoryChangeFeed()
+        await feed.publish(CREATED, 1, _todo(1))
+
+        assert await feed.parse_event_id(feed.event_id(1)) == 1
+        assert await feed.parse_event_id(feed.event_id(0)) == 0
+        assert await feed.parse_event_id(MemoryChangeFeed().event_id(1)) is None
+        assert await feed.parse_event_id(feed.event_id(2)) is None
+        for value in (None, "", "lixo", f"{feed.epoch}-x"):
+            assert await feed.parse_event_id(value) is None
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            MemoryChangeFeed(capacity=0)
+
+    @pytest.mark.asyncio
+    async def test_wait_wakes_on_publish(self):
+        feed = MemoryChangeFeed()
+        waiting = asyncio.create_task(feed.wait(0, timeout=5))
+        await asyncio.sleep(0)
+        await feed.publish(DELETED, 1)
+
+        assert await asyncio.wait_for(waiting, 1) is True
+        assert await feed.wait(0, timeout=5) is True
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_without_events(self):
+        feed = MemoryChangeFeed()
+        assert await feed.wait(0, timeout=0.01) is False
+        assert feed._waiters == set()
+
+    @pytest.mark.asyncio
+    async def test_close_ends_waits(self):
+        feed = MemoryChangeFeed()
+        waiting = asyncio.create_task(feed.wait(0, timeout=5))
+        await asyncio.sleep(0)
+        feed.close()
+
+        assert await asyncio.wait_for(waiting, 1) is False
+        assert await feed.wait(0, timeout=5) is False
+
+
+class TestStorageChangeFeed:
+    """Testes para `StorageChangeFeed` sobre o SQLite."""
+
+    @pytest.fixture()
+    def path(self, tmp_path):
+        return str(tmp_path / "todos.db")
+
+    def test_created_only_for_backends_with_a_change_log(self):
+        backend = SQLiteBackend(":memory:")
+        try:
+            assert isinstance(create_change_feed(backend), StorageChangeFeed)
+            assert backend.changes_capacity == 1024
+        finally:
+            backend.close()
+        assert isinstance(create_change_feed(MemoryBackend()), MemoryChangeFeed)
+
+    @pytest.mark.asyncio
+    async def test_events_match_the_memory_feed(self):
+        backend = SQLiteBackend(":memory:")
+        feed, memory = StorageChangeFeed(backend), MemoryChangeFeed()
+        try:
+            first = await backend.create({"title": "A"}, NOW)
+            await memory.publish(CREATED, first["id"], first)
+            created = await backend.create_many([{"title": "B"}, {"title": "C"}], NOW)
+            await memory.publish_many(CREATED, created)
+            updated = await backend.update(first["id"], {"completed": True}, NOW)
+            await memory.publish(UPDATED, first["id"], updated)
+            results = await backend.update_many([(created[0]["id"], {"title": "B2"}, None)], NOW)
+            await memory.publish_many(UPDATED, results)
+            await backend.delete(first["id"])
+            await memory.publish_deleted([first["id"]])
+            await backend.delete_many([created[1]["id"], created[1]["id"], 999])
+            await memory.publish_deleted([created[1]["id"]])
+
+            assert await feed.last_seq() == 7
+            changes = await feed.since(0)
+            assert [c.data for c in changes] == [c.data for c in await memory.since(0)]
+            assert [(c.op, c.todo_id) for c in changes[-2:]] == [
+                (DELETED, first["id"]), (DELETED, created[1]["id"])
+            ]
+            assert await feed.since(7) == []
+        finally:
+            backend.close()
+
+    @pytest.mark.asyncio
+    async def test_log_is_shared_between_processes(self, path):
+        # Dois backends sobre o mesmo arquivo fazem o papel de dois workers
+        one, other = SQLiteBackend(path), SQLiteBackend(path)
+        feed, other_feed = StorageChangeFeed(one, capacity=3), StorageChangeFeed(other, capacity=3)
+        try:
+            position = await feed.parse_event_id(f"{await other.changes_epoch()}-0")
+            assert position == 0
+            for i in range(5):
+                await other.create({"title": f"T{i}"}, NOW)
+
+            assert await feed.last_seq() == 5
+            # Um ID emitido por um worker vale no outro
+            assert await other_feed.parse_event_id(feed.event_id(5)) == 5
+            assert [c.seq for c in await feed.since(2)] == [3, 4, 5]
+            # Eventos já descartados: o cliente recarrega a listagem
+            assert await feed.since(1) is None
+        finally:
+            one.close()
+            other.close()
+
+    @pytest.mark.asyncio
+    async def test_wait_sees_writes_from_other_processes(self, path):
+        one, other = SQLiteBackend(path), SQLiteBackend(path)
+        feed = StorageChangeFeed(one, poll_interval=0.01)
+        StorageChangeFeed(other)
+        try:
+            waiting = asyncio.create_task(feed.wait(0, timeout=5))
+            await asyncio.sleep(0.05)
+            await other.create({"title": "De outro worker"}, NOW)
+
+            assert await asyncio.wait_for(waiting, 2) is True
+        finally:
+            one.close()
+            other.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_ends_when_feed_closes():
+    from boilerplate.api.v1.endpoints.todos import _change_stream
+
+    feed = MemoryChangeFeed()
+    stream = _change_stream(feed, None, heartbeat=5, lifetime=300)
+    assert await stream.__anext__() == b"retry: 1000\n\n"
+    assert b"event: reset" in await stream.__anext__()
+    pending = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0.01)
+    feed.close()
+
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(pending, 1)
@@ -0,0 +1,43 @@
+"""Testes unitários para o relógio e timezone da aplicação."""
+from datetime import datetime, timedelta, timezone
+
+from boilerplate.config import settings
+from boilerplate.core import clock
+from boilerplate.core.clock import Clock, get_zone, is_valid_zone
+
+
+def test_zone_is_resolved_once():
+    assert get_zone("America/Sao_Paulo") is get_zone("America/Sao_Paulo")
+    assert is_valid_zone("UTC")
+    assert not is_valid_zone("Nao/Existe")
+    assert not is_valid_zone("../etc/passwd")
+
+
+def test_default_clock_follows_settings():
+    assert clock.get_clock().name == settings.TIMEZONE
+    assert clock.now().tzinfo is get_zone(settings.TIMEZONE)
+
+
+def test_localize():
+    sp = Clock("America/Sao_Paulo")
+    utc = datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc)
+    assert sp.localize(utc).isoformat() == "2024-01-02T12:00:00-03:00"
+    naive = datetime(2024, 1, 2, 12, 0)
+    assert sp.localize(naive).isoformat() == "2024-01-02T12:00:00-03:00"
+    local = sp.now()
+    assert sp.localize(local) is local
+
+
+def test_localize_many():
+    sp = Clock("America/Sao_Paulo")
+    shared = datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc)
+    local = sp.now()
+    other = datetime(2024, 1, 2, 15, 0, tzinfo=timezone(timedelta(hours=1)))
+    result = sp.localize_many([shared, local, shared, other])
+    assert result[0] is result[2]
+    assert result[1] is local
+    assert [value.utcoffset() for value in result] == [timedelta(hours=-3)] * 4
+    assert result[3] == other
+    # Objetos temporários (gerador) não podem ser confundidos entre si
+    fresh = sp.localize_many(shared + timedelta(hours=h) for h in range(3))
+    assert [value.hour for value in fresh] == [12, 13, 14]
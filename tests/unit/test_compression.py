@@ -0,0 +1,189 @@
+"""Testes unitários para a compressão das respostas."""
+import gzip
+import zlib
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from boilerplate.core.compression import (
+    CompressedVariants,
+    CompressionMiddleware,
+    available_encodings,
+    compress,
+)
+from boilerplate.utils.http import etag_matches
+
+BODY = b'{"title": "Tarefa"}' * 100
+
+
+async def _json(request):
+    return Response(BODY, media_type="application/json")
+
+
+async def _small(request):
+    return Response(b'{"ok": true}', media_type="application/json")
+
+
+async def _stream(request):
+    async def chunks():
+        for _ in range(3):
+            yield BODY
+
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+async def _events(request):
+    return StreamingResponse(iter([b"data: 1\n\n" * 100]), media_type="text/event-stream")
+
+
+async def _encoded(request):
+    return Response(gzip.compress(BODY), media_type="application/json",
+                    headers={"Content-Encoding": "gzip"})
+
+
+async def _tagged(request):
+    if etag_matches(request.headers.get("if-none-match"), '"v1"'):
+        return Response(status_code=304, headers={"ETag": '"v1"'})
+    return Response(BODY, media_type="application/json", headers={"ETag": '"v1"'})
+
+
+async def _image(request):
+    return Response(BODY, media_type="image/png")
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[
+        Route("/json", _json),
+        Route("/small", _small),
+        Route("/stream", _stream),
+        Route("/events", _events),
+        Route("/encoded", _encoded),
+        Route("/image", _image),
+        Route("/tagged", _tagged),
+        Route("/text", lambda request: PlainTextResponse("x" * 1000)),
+    ])
+    app.add_middleware(CompressionMiddleware, minimum_size=500, encodings=("gzip",))
+    return TestClient(app)
+
+
+def _raw(client, path, accept="gzip"):
+    """Corpo como enviado (sem a descompressão automática do httpx)."""
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_compresses_complete_bodies(client):
+    response, raw = _raw(client, "/json")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw) < len(BODY)
+    assert gzip.decompress(raw) == BODY
+    assert "content-encoding" in _raw(client, "/text")[0].headers
+
+
+def test_streams_are_compressed_chunk_by_chunk(client):
+    response, raw = _raw(client, "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw) == BODY * 3
+
+
+def test_compressed_responses_have_their_own_etag(client):
+    response, _ = _raw(client, "/tagged")
+    assert response.headers["etag"] == '"v1-gzip"'
+    assert client.get("/tagged", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"v1"'
+
+    # A revalidação da versão comprimida mantém o ETag dela no 304
+    revalidated = client.get("/tagged", headers={"Accept-Encoding": "gzip", "If-None-Match": '"v1-gzip"'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == '"v1-gzip"'
+    revalidated = client.get("/tagged", headers={"Accept-Encoding": "gzip", "If-None-Match": '"v1"'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_each_chunk_is_flushed():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for _ in range(3):
+            await send({"type": "http.response.body", "body": BODY, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", b"gzip")]}
+    await CompressionMiddleware(app, encodings=("gzip",))(scope, None, send)
+    bodies = [m["body"] for m in messages[1:]]
+    assert len(bodies) == 4
+    # Cada bloco sai completo, decodificável sem esperar o fim da resposta
+    decoder = zlib.decompressobj(31)
+    assert [decoder.decompress(body) for body in bodies[:3]] == [BODY] * 3
+    assert messages[-1]["more_body"] is False
+
+
+@pytest.mark.parametrize("path", ["/small", "/events", "/encoded", "/image"])
+def test_skips_small_encoded_and_unsuitable_responses(client, path):
+    response, raw = _raw(client, path)
+    assert response.headers.get("content-encoding") in (None, "gzip" if path == "/encoded" else None)
+    if path == "/encoded":
+        assert gzip.decompress(raw) == BODY
+
+
+def test_requires_accepted_encoding(client):
+    response, raw = _raw(client, "/json", accept="identity")
+    assert "content-encoding" not in response.headers
+    assert raw == BODY
+    assert client.head("/json", headers={"Accept-Encoding": "gzip"}).headers.get(
+        "content-encoding") is None
+
+
+def test_available_encodings_keep_preference_order():
+    encodings = available_encodings(("zstd", "br", "gzip"))
+    assert encodings[-1] == "gzip"
+    assert set(encodings) <= {"zstd", "br", "gzip"}
+    assert available_encodings(("deflate",)) == ()
+
+
+@pytest.mark.parametrize("encoding", ["br", "zstd"])
+def test_optional_encodings(encoding):
+    module = pytest.importorskip({"br": "brotli", "zstd": "zstandard"}[encoding])
+    data = compress(encoding, BODY)
+    if encoding == "br":
+        assert module.decompress(data) == BODY
+    else:
+        assert module.ZstdDecompressor().decompressobj().decompress(data) == BODY
+
+
+def test_compressed_variants_are_computed_once():
+    variants = CompressedVariants(BODY, "application/json", encodings=("gzip",))
+    response = variants.response("gzip, br")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == BODY
+    assert variants.get("gzip") is variants.get("gzip")
+    assert variants.response(None).body == BODY
+    # Corpos pequenos não são comprimidos
+    small = CompressedVariants(b"{}", "application/json", encodings=("gzip",))
+    assert "content-encoding" not in small.response("gzip").headers
+
+
+def test_application_compresses_openapi_and_lists():
+    from boilerplate.main import app
+
+    api = TestClient(app)
+    response, raw = _raw(api, "/openapi.json")
+    assert response.headers["content-encoding"] in available_encodings(("zstd", "br", "gzip"))
+    plain = api.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json()["openapi"]
+    if response.headers["content-encoding"] == "gzip":
+        assert gzip.decompress(raw) == plain.content
+    assert api.get("/docs").status_code == 200
@@ -0,0 +1,63 @@
+"""Testes unitários para os utilitários de requisições condicionais."""
+from datetime import datetime, timezone
+
+import pytest
+
+from boilerplate.utils.http import (
+    coded_etag,
+    compile_route,
+    etag_matches,
+    http_date,
+    identity_etag,
+    negotiate_encoding,
+    not_modified_since,
+)
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+    # O ETag de uma versão comprimida revalida a representação original
+    assert etag_matches('"abc-gzip"', '"abc"')
+    assert not etag_matches('"abc-gzip"', '"abd"')
+
+
+def test_coded_etag():
+    assert coded_etag('"abc"', "br") == '"abc-br"'
+    assert coded_etag('W/"abc"', "gzip") == 'W/"abc"'
+    assert identity_etag('"abc-zstd"') == '"abc"'
+    assert identity_etag('"abc-deflate"') == '"abc-deflate"'
+
+
+def test_http_date():
+    value = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert http_date(value) == "Tue, 02 Jan 2024 03:04:05 GMT"
+
+
+def test_not_modified_since():
+    value = datetime(2024, 1, 2, 3, 4, 5, 999, tzinfo=timezone.utc)
+    assert not_modified_since("Tue, 02 Jan 2024 03:04:05 GMT", value)
+    assert not not_modified_since("Tue, 02 Jan 2024 03:04:04 GMT", value)
+    assert not not_modified_since("data inválida", value)
+    assert not not_modified_since(None, value)
+
+
+def test_negotiate_encoding():
+    available = ("br", "gzip")
+    assert negotiate_encoding("gzip, deflate, br", available) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", available) == "gzip"
+    assert negotiate_encoding("br;q=0, *", available) == "gzip"
+    assert negotiate_encoding("identity", available) is None
+    assert negotiate_encoding(None, available) is None
+
+
+def test_compile_route():
+    method, regex = compile_route("post /api/v1/todos/{todo_id}")
+    assert method == "POST"
+    assert regex.match("/api/v1/todos/7")
+    assert not regex.match("/api/v1/todos/7/")
+    with pytest.raises(ValueError, match="Rota inválida"):
+        compile_route("/api/v1/todos/")
@@ -0,0 +1,253 @@
+"""Testes unitários para o suporte a Idempotency-Key."""
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from boilerplate.core.idempotency import (
+    IdempotencyMiddleware,
+    IdempotencyRecord,
+    MemoryIdempotencyStore,
+    SharedIdempotencyStore,
+    StorageIdempotencyStore,
+    create_idempotency_store,
+    fingerprint,
+)
+from boilerplate.core.storage import MemoryBackend, SQLiteBackend
+
+
+class FakeRedis:
+    """Substituto local de `redis.asyncio.Redis` com os métodos usados pelo registro."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture(params=["memory", "shared", "sqlite"])
+def store(request):
+    if request.param == "memory":
+        yield MemoryIdempotencyStore(ttl=60, max_entries=2)
+    elif request.param == "shared":
+        yield SharedIdempotencyStore(FakeRedis(), ttl=60)
+    else:
+        backend = SQLiteBackend(":memory:")
+        yield StorageIdempotencyStore(backend, ttl=60)
+        backend.close()
+
+
+@pytest.mark.asyncio
+async def test_store_reserve_complete_and_release(store):
+    assert await store.reserve("a", "f1") is None
+    pending = await store.reserve("a", "f2")
+    assert pending.fingerprint == "f1" and not pending.completed
+
+    await store.complete("a", IdempotencyRecord("f1", 201, [("etag", '"1.1"')], b'{"id": 1}'))
+    record = await store.reserve("a", "f1")
+    assert (record.status, record.headers, record.body) == (201, [("etag", '"1.1"')], b'{"id": 1}')
+
+    await store.release("a")
+    assert await store.reserve("a", "f1") is None
+
+
+def test_create_idempotency_store():
+    assert isinstance(create_idempotency_store("memory://", 60), MemoryIdempotencyStore)
+    # URL vazia: no armazenamento das tarefas, se ele gravar as chaves
+    assert isinstance(create_idempotency_store("", 60, storage=MemoryBackend()), MemoryIdempotencyStore)
+    backend = SQLiteBackend(":memory:")
+    try:
+        assert isinstance(create_idempotency_store("", 60, storage=backend), StorageIdempotencyStore)
+        assert isinstance(create_idempotency_store("memory://", 60, storage=backend), MemoryIdempotencyStore)
+    finally:
+        backend.close()
+    with pytest.raises(ValueError, match="IDEMPOTENCY_URL"):
+        create_idempotency_store("ftp://x", 60)
+
+
+@pytest.mark.asyncio
+async def test_memory_store_keeps_reservations_in_flight():
+    store = MemoryIdempotencyStore(ttl=60, max_entries=2)
+    assert await store.reserve("running", "f") is None
+    for key in ("a", "b", "c"):
+        assert await store.reserve(key, "f") is None
+        await store.complete(key, IdempotencyRecord("f", 201))
+
+    # As concluídas mais antigas saem; a reserva em andamento fica
+    assert list(store._entries) == ["running", "c"]
+    assert not (await store.reserve("running", "f")).completed
+
+
+@pytest.mark.asyncio
+async def test_sqlite_keys_are_shared_and_expire(tmp_path):
+    # Dois backends sobre o mesmo arquivo fazem o papel de dois workers
+    path = str(tmp_path / "todos.db")
+    one, other = SQLiteBackend(path), SQLiteBackend(path)
+    try:
+        store, other_store = StorageIdempotencyStore(one, ttl=60), StorageIdempotencyStore(other, ttl=60)
+        assert await store.reserve("a", "f1") is None
+        assert (await other_store.reserve("a", "f1")).fingerprint == "f1"
+        await store.complete("a", IdempotencyRecord("f1", 201, [], b"{}"))
+        assert (await other_store.reserve("a", "f1")).status == 201
+
+        # Reserva expirada (processo que caiu): a chave pode ser reservada de novo
+        expired = StorageIdempotencyStore(one, ttl=60, lock_ttl=-1)
+        assert await expired.reserve("b", "f1") is None
+        assert await other_store.reserve("b", "f2") is None
+    finally:
+        one.close()
+        other.close()
+
+
+def _app(store, wait=1.0, max_response_bytes=1024 * 1024):
+    state = {"calls": 0, "status": 201}
+    release = asyncio.Event()
+    release.set()
+
+    async def create(request):
+        state["calls"] += 1
+        payload = await request.json()
+        await release.wait()
+        if state["status"] >= 400:
+            return JSONResponse({"detail": "falha"}, status_code=state["status"])
+        return JSONResponse({"id": state["calls"], **payload}, status_code=state["status"],
+                            headers={"ETag": f'"{state["calls"]}.1"'})
+
+    app = Starlette(routes=[Route("/api/items/", create, methods=["POST"]),
+                            Route("/api/other", create, methods=["POST"])])
+    middleware = IdempotencyMiddleware(app, store, routes=["POST /api/items/"], wait=wait,
+                                       poll_interval=0.01, max_response_bytes=max_response_bytes)
+    return middleware, state, release
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_retries_replay_the_stored_response(store):
+    app, state, _ = _app(store)
+    async with _client(app) as client:
+        headers = {"Idempotency-Key": "k1"}
+        first = await client.post("/api/items/", json={"title": "A"}, headers=headers)
+        retry = await client.post("/api/items/", json={"title": "A"}, headers=headers)
+        assert state["calls"] == 1
+        assert (retry.status_code, retry.json(), retry.headers["etag"]) == (201, {"id": 1, "title": "A"}, '"1.1"')
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert "idempotent-replayed" not in first.headers
+
+        # A mesma chave com outro corpo é um erro do cliente
+        other = await client.post("/api/items/", json={"title": "B"}, headers=headers)
+        assert other.status_code == 422
+        # Sem a chave, ou fora das rotas configuradas, nada muda
+        await client.post("/api/items/", json={"title": "A"})
+        await client.post("/api/other", json={"title": "A"}, headers=headers)
+        assert state["calls"] == 3
+        assert (await client.post("/api/items/", json={}, headers={"Idempotency-Key": ""})).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_run_once(store):
+    app, state, release = _app(store)
+    release.clear()
+    async with _client(app) as client:
+        requests = [
+            asyncio.ensure_future(client.post("/api/items/", json={"title": "A"}, headers={"Idempotency-Key": "k"}))
+            for _ in range(3)
+        ]
+        while state["calls"] == 0:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.02)
+        release.set()
+        responses = await asyncio.gather(*requests)
+    assert state["calls"] == 1
+    assert {r.json()["id"] for r in responses} == {1}
+    assert sorted(r.headers.get("idempotent-replayed", "") for r in responses) == ["", "true", "true"]
+
+
+@pytest.mark.asyncio
+async def test_duplicate_in_another_worker_times_out(store):
+    # Reserva feita por "outro worker": a repetição espera e recebe 409
+    app, state, _ = _app(store, wait=0.05)
+    async with _client(app) as client:
+        await store.reserve("k", "outro")
+        response = await client.post("/api/items/", json={}, headers={"Idempotency-Key": "k"})
+        assert response.status_code == 422
+        await store.release("k")
+
+        body = b"{}"
+        await store.reserve("k", fingerprint("POST", "/api/items/", b"", body))
+        response = await client.post("/api/items/", content=body, headers={"Idempotency-Key": "k"})
+        assert (response.status_code, response.headers["retry-after"]) == (409, "1")
+    assert state["calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_not_replayed_nor_run_again(store):
+    # Como a resposta de um lote grande: maior que o limite gravado
+    app, state, _ = _app(store, max_response_bytes=256)
+    items = [{"title": f"Tarefa {i}"} for i in range(50)]
+    async with _client(app) as client:
+        headers = {"Idempotency-Key": "lote"}
+        first = await client.post("/api/items/", json={"items": items}, headers=headers)
+        assert first.status_code == 201 and len(first.content) > 256
+
+        retry = await client.post("/api/items/", json={"items": items}, headers=headers)
+        assert retry.status_code == 409
+        assert "retry-after" not in retry.headers
+    assert state["calls"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [412, 422, 503])
+async def test_error_responses_are_not_stored(store, status):
+    app, state, _ = _app(store)
+    state["status"] = status
+    async with _client(app) as client:
+        headers = {"Idempotency-Key": "k"}
+        assert (await client.post("/api/items/", json={}, headers=headers)).status_code == status
+        state["status"] = 201
+        assert (await client.post("/api/items/", json={}, headers=headers)).status_code == 201
+    assert state["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_disconnect_before_the_body_does_not_reserve(store):
+    app, state, _ = _app(store)
+    messages = [
+        {"type": "http.request", "body": b'{"tit', "more_body": True},
+        {"type": "http.disconnect"},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/items/",
+        "query_string": b"",
+        "headers": [(b"idempotency-key", b"k")],
+    }
+    await app(scope, receive, send)
+
+    assert sent == [] and state["calls"] == 0
+    assert await store.reserve("k", "f") is None
@@ -0,0 +1,168 @@
+"""Testes unitários para o gerador de carga (`boilerplate loadtest`)."""
+import asyncio
+import json
+
+import pytest
+import uvicorn
+
+from boilerplate.cli import main
+from boilerplate.core.cache import MemoryCache
+from boilerplate.core.storage import MemoryBackend
+from boilerplate.main import app
+from boilerplate.services import todo as todo_service
+from boilerplate.utils.loadtest import (
+    ConnectionPool,
+    LoadTestConfig,
+    Stats,
+    parse_mix,
+    percentile,
+    run_loadtest,
+)
+
+
+def test_parse_mix():
+    assert parse_mix("list=3, get=1,") == {"list": 3.0, "get": 1.0}
+    for value in ("lista=1", "list", "list=-1", "list=0"):
+        with pytest.raises(ValueError):
+            parse_mix(value)
+
+
+def test_percentile_and_summary():
+    values = [i / 1000 for i in range(1, 1001)]
+    assert percentile(values, 50) == 0.5
+    assert percentile(values, 99.9) == 0.999
+    assert percentile([], 99) == 0.0
+
+    stats = Stats()
+    for value in values:
+        stats.record(value, 200 if value < 0.9 else 503)
+    stats.record(0.001, None)
+    summary = stats.summary(elapsed=2.0)
+    assert summary["requests"] == 1001
+    assert summary["errors"] == 102
+    assert summary["statuses"] == {"200": 899, "503": 101, "erro": 1}
+    assert summary["latency_ms"]["p999"] == 999.0
+    assert summary["latency_ms"]["max"] == 1000.0
+
+
+async def _raw_server(responses):
+    """Servidor que responde cada requisição com o próximo item de `responses`."""
+    async def handle(reader, writer):
+        for response in responses:
+            # Lê o cabeçalho e o corpo da requisição
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            writer.write(response)
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def test_connection_reuse_and_chunked_body():
+    responses = [
+        b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}",
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n2;x=1\r\nde\r\n0\r\n\r\n",
+        b"HTTP/1.1 204 No Content\r\n\r\n",
+    ]
+
+    async def scenario():
+        server = await _raw_server(responses)
+        port = server.sockets[0].getsockname()[1]
+        pool = ConnectionPool(f"http://127.0.0.1:{port}", size=1)
+        try:
+            results = [
+                await pool.request("GET", "/a"),
+                await pool.request("POST", "/b", {"title": "x"}),
+                await pool.request("DELETE", "/c"),
+            ]
+        finally:
+            pool.close()
+            server.close()
+            await server.wait_closed()
+        return results, pool.opened
+
+    results, opened = asyncio.run(scenario())
+    assert results == [(200, b"{}"), (200, b"abcde"), (204, b"")]
+    # As três requisições usaram a mesma conexão keep-alive
+    assert opened == 1
+
+
+def test_rejects_unsupported_url():
+    with pytest.raises(ValueError):
+        ConnectionPool("ftp://localhost", size=1)
+
+
+@pytest.fixture()
+def live_server():
+    """Sobe a aplicação em uma porta livre, com armazenamento isolado."""
+    previous = todo_service.set_storage(MemoryBackend())
+    previous_cache = todo_service.set_cache(MemoryCache(ttl=300))
+    yield
+    todo_service.set_storage(previous)
+    todo_service.set_cache(previous_cache)
+
+
+async def _with_server(coro_factory):
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="off")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        return await coro_factory(f"http://127.0.0.1:{port}")
+    finally:
+        server.should_exit = True
+        await task
+
+
+@pytest.mark.parametrize("rate", [None, 200.0])
+def test_loadtest_against_app(live_server, rate):
+    async def scenario(url):
+        config = LoadTestConfig(
+            url=url,
+            duration=0.4,
+            concurrency=4,
+            rate=rate,
+            mix=parse_mix("list=1,get=1,create=1,update=1,delete=1"),
+            seed_todos=20,
+            random_seed=1,
+        )
+        return await run_loadtest(config)
+
+    report = asyncio.run(_with_server(scenario))
+    assert report["mode"] == ("open" if rate else "closed")
+    assert report["total"]["requests"] > 0
+    assert report["total"]["errors"] == 0
+    assert set(report["operations"]) <= {"list", "get", "create", "update", "delete"}
+    assert report["connections_opened"] <= 4
+    latency = report["total"]["latency_ms"]
+    assert latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["p999"] <= latency["max"]
+    if rate:
+        # Laço aberto: a quantidade de requisições segue a taxa, não as respostas
+        assert report["total"]["requests"] == pytest.approx(rate * 0.4, abs=2)
+
+
+def test_cli_reports_connection_errors(capsys):
+    # Porta 9 (discard) não deve ter servidor HTTP escutando
+    assert main(["loadtest", "http://127.0.0.1:9", "-d", "0.1", "--warmup", "0"]) == 1
+    assert "erro" in capsys.readouterr().err
+
+
+def test_cli_json_report(live_server, capsys):
+    async def scenario(url):
+        return await asyncio.to_thread(
+            main,
+            ["loadtest", url, "-d", "0.2", "--warmup", "0", "-c", "2", "--json",
+             "--mix", "list=1,create=1"],
+        )
+
+    assert asyncio.run(_with_server(scenario)) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["mode"] == "closed"
+    assert report["concurrency"] == 2
@@ -0,0 +1,115 @@
+"""Testes unitários para as métricas no formato Prometheus."""
+import asyncio
+import json
+import os
+
+from boilerplate.core.metrics import (
+    MultiProcessStore,
+    Registry,
+    service_duration,
+    timed,
+)
+
+
+def _registry():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requisições.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latência.", ("route",), buckets=(0.1, 1.0))
+    in_progress = registry.gauge("in_progress", "Em andamento.")
+    stats = registry.gauge("stats", "Estatísticas.", ("stat",), mode="pid")
+    return registry, requests, latency, in_progress, stats
+
+
+def test_render_exposition_format():
+    registry, requests, latency, in_progress, _ = _registry()
+    requests.inc(('/a/{id}',))
+    requests.inc(('/a/{id}',))
+    requests.inc(('com "aspas"',))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(("/a",), value)
+    in_progress.inc()
+    in_progress.dec()
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a/{id}"} 2' in text
+    assert 'requests_total{route="com \\"aspas\\""} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_seconds_sum{route="/a"} 3.65' in text
+    assert 'latency_seconds_count{route="/a"} 4' in text
+    assert "in_progress 0" in text
+
+
+def test_multiprocess_aggregation(tmp_path):
+    registry, requests, latency, in_progress, stats = _registry()
+    store = MultiProcessStore(str(tmp_path))
+    requests.inc(("/a",), 3)
+    latency.observe(("/a",), 0.5)
+    in_progress.inc(amount=2)
+    stats.collector = lambda: [(("todos",), 10)]
+    store.flush(registry)
+
+    # Instantâneo de um worker que já terminou: contadores e histogramas
+    # continuam somados, gauges são descartados
+    dead = registry.snapshot()
+    dead["pid"] = 2 ** 22 + 12345
+    with open(os.path.join(str(tmp_path), f"metrics-{dead['pid']}.json"), "w") as file:
+        json.dump(dead, file)
+
+    text = registry.render(store.collect())
+    assert 'requests_total{route="/a"} 6' in text
+    assert 'latency_seconds_count{route="/a"} 2' in text
+    assert "in_progress 2" in text
+    assert f'stats{{stat="todos",pid="{os.getpid()}"}} 10' in text
+    assert f'pid="{dead["pid"]}"' not in text
+
+    # O arquivo do worker encerrado é consolidado e removido, sem perder os totais
+    assert not os.path.exists(os.path.join(str(tmp_path), f"metrics-{dead['pid']}.json"))
+    assert os.path.exists(os.path.join(str(tmp_path), MultiProcessStore.RETIRED))
+    again = registry.render(store.collect())
+    assert 'requests_total{route="/a"} 6' in again
+    assert "in_progress 2" in again
+
+
+def test_dead_workers_accumulate_in_one_file(tmp_path):
+    registry, requests, *_ = _registry()
+    store = MultiProcessStore(str(tmp_path))
+    requests.inc(("/a",))
+    for offset in range(3):
+        dead = registry.snapshot()
+        dead["pid"] = 2 ** 22 + 12345 + offset
+        with open(os.path.join(str(tmp_path), f"metrics-{dead['pid']}.json"), "w") as file:
+            json.dump(dead, file)
+        store.collect()
+
+    assert sorted(os.listdir(str(tmp_path))) == [MultiProcessStore.RETIRED, "metrics.lock"]
+    store.flush(registry)
+    assert 'requests_total{route="/a"} 4' in registry.render(store.collect())
+
+
+def test_maybe_flush_writes_in_a_thread(tmp_path):
+    registry, requests, *_ = _registry()
+    store = MultiProcessStore(str(tmp_path), interval=0)
+    requests.inc(("/a",))
+
+    async def scenario():
+        store.maybe_flush(registry)
+        # A gravação é agendada: a próxima chamada não agenda outra enquanto esta roda
+        assert store._flushing
+        store.maybe_flush(registry)
+        while store._flushing:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert 'requests_total{route="/a"} 1' in registry.render(store.collect())
+
+
+def test_timed_records_service_duration():
+    @timed("operacao_de_teste")
+    async def operation():
+        return 42
+
+    assert asyncio.run(operation()) == 42
+    assert service_duration.values[("operacao_de_teste",)][-1] == 1
@@ -0,0 +1,19 @@
+"""Testes unitários para os utilitários de paginação."""
+import pytest
+
+from boilerplate.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+
+def test_empty_cursor():
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "aWQ6YWJj", "Zm9vOjE"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
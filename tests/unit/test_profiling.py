@@ -0,0 +1,91 @@
+"""Testes unitários para o profiling estatístico de requisições."""
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from boilerplate.core.profiling import (
+    Profiler,
+    ProfilingMiddleware,
+    StackSampler,
+    collapsed,
+)
+
+
+def _busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _app(profiler: Profiler) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @app.get("/lenta")
+    def slow_route():
+        _busy(0.15)
+        return {"ok": True}
+
+    @app.get("/rapida")
+    async def fast_route():
+        return {"ok": True}
+
+    return app
+
+
+def test_collapsed_format():
+    counts = {("main", "a", "b"): 3, ("main", "c"): 1}
+    assert collapsed(counts) == "main;a;b 3\nmain;c 1\n"
+
+
+def test_sampler_without_target_stops():
+    sampler = StackSampler(0.001)
+    sampler._run()
+    assert list(sampler.samples) == []
+
+
+def test_slow_requests_are_profiled(tmp_path):
+    profiler = Profiler(str(tmp_path), slow_ms=50, interval_ms=1)
+    try:
+        # Como contexto, o TestClient mantém o mesmo event loop (e a mesma
+        # thread) entre as requisições, como um servidor de verdade
+        with TestClient(_app(profiler)) as client:
+            client.get("/rapida")
+            assert list(profiler.recent) == []
+
+            client.get("/lenta")
+            # A rota síncrona roda no threadpool; o perfil é da thread do event loop
+            profile = profiler.recent[-1]
+            assert profile["path"] == "/lenta"
+            assert profile["reason"] == "slow"
+            assert profile["status"] == 200
+            assert profile["samples"] > 0
+            assert profiler.get(profile["id"]) is profile
+            lines = profiler.read(profile).splitlines()
+            assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    finally:
+        profiler.sampler.stop()
+
+
+def test_sampled_requests_and_rotation(tmp_path):
+    profiler = Profiler(str(tmp_path), sample_rate=1.0, slow_ms=10_000, interval_ms=1, max_profiles=2)
+    app = _app(profiler)
+
+    @app.get("/trabalho")
+    async def busy_route():
+        _busy(0.03)
+        return {"ok": True}
+
+    try:
+        with TestClient(app) as client:
+            for _ in range(3):
+                client.get("/trabalho")
+            assert len(profiler.recent) == 2
+            assert all(profile["reason"] == "sampled" for profile in profiler.recent)
+            assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+                profile["file"] for profile in profiler.recent
+            )
+            assert "busy_route" in profiler.read(profiler.recent[-1])
+    finally:
+        profiler.sampler.stop()
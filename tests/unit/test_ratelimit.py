@@ -0,0 +1,163 @@
+"""Testes unitários para o limite de taxa e de concorrência da API."""
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from boilerplate.core.ratelimit import (
+    GCRA_SCRIPT,
+    MemoryRateLimiter,
+    Rate,
+    RateLimitMiddleware,
+    SharedRateLimiter,
+    create_rate_limiter,
+    gcra,
+    parse_rate,
+)
+
+
+class FakeRedis:
+    """Substituto local de `redis.asyncio.Redis`: executa o `GCRA_SCRIPT` em Python."""
+
+    def __init__(self):
+        self.data = {}
+        self.now = 0
+
+    async def eval(self, script, numkeys, key, interval, burst):
+        assert script == GCRA_SCRIPT and numkeys == 1
+        tat, wait = gcra(self.data.get(key), self.now, int(interval), int(burst))
+        if tat is not None:
+            self.data[key] = tat
+        return wait
+
+
+def test_parse_rate():
+    assert parse_rate("10/s") == Rate(10, 10)
+    assert parse_rate("600/m:50") == Rate(10, 50)
+    assert parse_rate("1/h").interval == 3600 * 1_000_000
+    for value in ("10", "10/d", "0/s", "10/s:0", "x/s"):
+        with pytest.raises(ValueError, match="Limite inválido"):
+            parse_rate(value)
+
+
+def test_gcra_allows_burst_then_refills():
+    interval, burst, tat = 100, 3, None
+    for _ in range(burst):
+        tat, wait = gcra(tat, 0, interval, burst)
+        assert wait == 0
+    assert gcra(tat, 0, interval, burst) == (None, 100)
+    # Uma ficha volta a cada intervalo
+    assert gcra(tat, 100, interval, burst)[1] == 0
+    # Um bucket parado há muito tempo não acumula além do burst
+    tat, _ = gcra(tat, 10_000, interval, burst)
+    assert tat == 10_100
+
+
+@pytest.mark.asyncio
+async def test_backends_share_the_same_limit(monkeypatch):
+    rate = Rate(per_second=10, burst=2)
+    redis = FakeRedis()
+    shared = SharedRateLimiter(redis)
+    assert [await shared.acquire("a", rate) for _ in range(3)] == [0, 0, 0.1]
+    assert await shared.acquire("b", rate) == 0
+    assert set(redis.data) == {"boilerplate:ratelimit:a", "boilerplate:ratelimit:b"}
+
+    memory = MemoryRateLimiter(max_keys=1)
+    monkeypatch.setattr("time.monotonic_ns", lambda: 5_000_000_000)
+    assert [await memory.acquire("a", rate) for _ in range(3)] == [0, 0, 0.1]
+    await memory.acquire("b", rate)
+    assert len(memory) == 1
+
+
+def test_create_rate_limiter():
+    assert isinstance(create_rate_limiter("memory://"), MemoryRateLimiter)
+    with pytest.raises(ValueError, match="RATE_LIMIT_URL"):
+        create_rate_limiter("ftp://x")
+
+
+def _app(**options):
+    release = asyncio.Event()
+
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[
+        Route("/api/items/", ok, methods=["GET", "POST"]),
+        Route("/api/items/{item_id}", ok),
+        Route("/api/slow", slow),
+        Route("/api/stream", slow),
+        Route("/health", ok),
+    ])
+    middleware = RateLimitMiddleware(app, **options)
+    return middleware, release
+
+
+def _client(app, host="10.0.0.1"):
+    transport = httpx.ASGITransport(app=app, client=(host, 1234))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_route_and_client():
+    app, _ = _app(
+        limiter=MemoryRateLimiter(),
+        limits={"POST /api/items/": "1/m", "GET /api/items/{item_id}": "1/m:2"},
+        default="1/h",
+    )
+    async with _client(app) as client, _client(app, "10.0.0.2") as other:
+        assert (await client.post("/api/items/")).status_code == 200
+        response = await client.post("/api/items/")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "60"
+        assert response.json() == {"detail": "Limite de requisições excedido"}
+        # Outros clientes e outras regras têm buckets próprios
+        assert (await other.post("/api/items/")).status_code == 200
+        assert [(await client.get(f"/api/items/{i}")).status_code for i in range(3)] == [200, 200, 429]
+        # Sem regra própria: limite padrão, compartilhado entre as rotas
+        assert (await client.get("/api/items/")).status_code == 200
+        assert (await client.get("/api/slow")).status_code == 429
+        # Fora do prefixo da API, sem limite
+        assert [(await client.get("/health")).status_code for _ in range(3)] == [200] * 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_key_header_and_backend_failures():
+    class Broken(MemoryRateLimiter):
+        async def acquire(self, key, rate):
+            raise ConnectionError("redis indisponível")
+
+    app, _ = _app(limiter=MemoryRateLimiter(), default="1/m", key_header="X-API-Key")
+    async with _client(app) as client:
+        assert (await client.get("/api/items/", headers={"X-API-Key": "a"})).status_code == 200
+        assert (await client.get("/api/items/", headers={"X-API-Key": "b"})).status_code == 200
+        assert (await client.get("/api/items/", headers={"X-API-Key": "a"})).status_code == 429
+
+    app, _ = _app(limiter=Broken(), default="1/m")
+    async with _client(app) as client:
+        assert [(await client.get("/api/items/")).status_code for _ in range(2)] == [200, 200]
+
+
+@pytest.mark.asyncio
+async def test_in_flight_cap_sheds_load():
+    app, release = _app(max_in_flight=2, exempt=["GET /api/stream"], retry_after=2)
+    async with _client(app) as client:
+        pending = [asyncio.ensure_future(client.get("/api/slow")) for _ in range(2)]
+        streams = [asyncio.ensure_future(client.get("/api/stream")) for _ in range(3)]
+        while app.in_flight < 2:
+            await asyncio.sleep(0)
+        response = await client.get("/api/items/")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "2"
+        assert (await client.get("/health")).status_code == 200
+
+        release.set()
+        assert [r.status_code for r in await asyncio.gather(*pending, *streams)] == [200] * 5
+        assert app.in_flight == 0
+        assert (await client.get("/api/items/")).status_code == 200
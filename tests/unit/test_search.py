@@ -0,0 +1,47 @@
+"""Testes unitários para o índice invertido de busca."""
+from boilerplate.core.search import InvertedIndex, tokenize
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Ação RÁPIDA, já!") == ["acao", "rapida", "ja"]
+    assert tokenize(None) == []
+    # "_" separa termos, como no FTS5 do SQLite
+    assert tokenize("snake_case x_1") == ["snake", "case", "x", "1"]
+
+
+class TestInvertedIndex:
+    """Testes para o índice invertido incremental."""
+
+    def setup_method(self):
+        self.index = InvertedIndex()
+        self.index.add(1, "Comprar pão", "na padaria")
+        self.index.add(2, "Comprar café", None)
+        self.index.add(3, "Estudar", "compras do mês")
+
+    def test_prefix_search(self):
+        assert self.index.search("compr") == {1, 2, 3}
+        assert self.index.search("comprar") == {1, 2}
+
+    def test_all_terms_must_match(self):
+        assert self.index.search("comprar pad") == {1}
+        assert self.index.search("comprar inexistente") == set()
+
+    def test_empty_query_means_no_filter(self):
+        assert self.index.search("  ") is None
+
+    def test_incremental_update_and_remove(self):
+        self.index.add(2, "Vender café", None)
+        assert self.index.search("comprar") == {1}
+        assert self.index.search("vender") == {2}
+
+        self.index.remove(1)
+        assert self.index.search("pao") == set()
+        assert len(self.index) == 2
+
+    def test_broad_prefix_is_checked_per_document(self, monkeypatch):
+        monkeypatch.setattr("boilerplate.core.search.MAX_PREFIX_EXPANSION", 1)
+        candidates, residual = self.index.plan("c pao")
+        assert candidates == {1}
+        assert residual == ["c"]
+        assert self.index.matches(1, residual)
+        assert not self.index.matches(3, ["pao"])
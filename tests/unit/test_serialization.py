@@ -0,0 +1,82 @@
+"""Testes unitários para a serialização rápida das respostas de Tarefas."""
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+import pytz
+from pydantic import TypeAdapter
+
+from boilerplate.config import settings
+from boilerplate.core import serialization
+from boilerplate.models.todo import TodoBulkResult, TodoInDB
+
+local = pytz.timezone(settings.TIMEZONE)
+now = local.localize(datetime(2024, 1, 2, 3, 4, 5, 600000))
+fixed = now.replace(tzinfo=timezone(now.utcoffset()))
+
+TODOS = [
+    {
+        "id": 1,
+        "title": "Título com acentuação",
+        "description": None,
+        "completed": False,
+        "created_at": now,
+        "updated_at": now,
+        "version": 1,
+    },
+    {
+        "id": 2,
+        "title": 'aspas " barra \\ / controle \x00\x1f\n\t',
+        "description": "emoji 😀 e separador  ",
+        "completed": True,
+        "created_at": fixed,
+        "updated_at": fixed + timedelta(microseconds=-600000),
+        "version": 7,
+    },
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    """Executa o teste com orjson (se instalado) e com o fallback da stdlib."""
+    if request.param == "orjson" and serialization.orjson is None:
+        pytest.skip("orjson não instalado")
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def test_payload_follows_model_field_order():
+    assert tuple(serialization.todo_payload(TODOS[0])) == tuple(TodoInDB.model_fields)
+    result = {"id": 1, "status": 200, "todo": TODOS[0]}
+    assert tuple(serialization.bulk_payload(result)) == tuple(TodoBulkResult.model_fields)
+
+
+def test_encode_todos_matches_pydantic(encoder):
+    adapter = TypeAdapter(List[TodoInDB])
+    expected = adapter.dump_json(adapter.validate_python(TODOS))
+    assert serialization.encode_todos(TODOS) == expected
+    assert serialization.encode_todos([]) == b"[]"
+
+
+def test_encode_todo_matches_pydantic(encoder):
+    adapter = TypeAdapter(TodoInDB)
+    for todo in TODOS:
+        assert serialization.encode_todo(todo) == adapter.dump_json(adapter.validate_python(todo))
+
+
+def test_bulk_payload_matches_pydantic(encoder):
+    results = [
+        {"id": 1, "status": 200, "todo": TODOS[0]},
+        {"id": 3, "status": 404, "error": "Tarefa não encontrada"},
+        {"id": 2, "status": 204},
+    ]
+    adapter = TypeAdapter(List[TodoBulkResult])
+    expected = adapter.dump_json(adapter.validate_python(results))
+    assert serialization.dumps([serialization.bulk_payload(r) for r in results]) == expected
+
+
+def test_utc_uses_z_suffix(encoder):
+    value = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert serialization.dumps(value) == TypeAdapter(datetime).dump_json(value)
+    assert serialization.dumps(value) == b'"2024-01-02T03:04:05Z"'
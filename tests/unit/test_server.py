@@ -0,0 +1,139 @@
+"""Testes unitários para o servidor com vários workers (`boilerplate serve`)."""
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from boilerplate.core.server import (
+    ServerOptions,
+    bind_socket,
+    clear_metrics_dir,
+    per_process_backends,
+    serve,
+)
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+
+def _settings(**overrides):
+    values = dict(
+        SERVER_HOST="0.0.0.0",
+        SERVER_PORT=9000,
+        SERVER_WORKERS=0,
+        SERVER_CPU_AFFINITY=False,
+        SERVER_BACKLOG=128,
+        SERVER_KEEPALIVE_TIMEOUT=7,
+        SERVER_LIMIT_CONCURRENCY=0,
+        SERVER_MAX_REQUESTS=1000,
+        SERVER_MAX_REQUESTS_JITTER=50,
+        SERVER_GRACEFUL_TIMEOUT=10,
+        SERVER_PRELOAD=True,
+        SERVER_ACCESS_LOG=False,
+        LOG_LEVEL="WARNING",
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_options_from_settings():
+    options = ServerOptions.from_settings(_settings())
+    assert options.workers == (os.cpu_count() or 1)
+    assert options.limit_concurrency is None
+    assert (options.backlog, options.keepalive, options.log_level) == (128, 7, "warning")
+    assert (options.max_requests, options.max_requests_jitter) == (1000, 50)
+
+
+def test_command_line_overrides_settings():
+    options = ServerOptions.from_settings(
+        _settings(SERVER_LIMIT_CONCURRENCY=100),
+        workers=3, port=None, max_requests=0, preload=False,
+    )
+    assert options.workers == 3
+    assert options.port == 9000
+    assert options.limit_concurrency == 100
+    # 0 desativa o limite também na linha de comando
+    assert options.max_requests is None
+    assert options.preload is False
+
+
+def test_bind_socket_and_clear_metrics_dir(tmp_path):
+    sock = bind_socket("127.0.0.1", 0, 16)
+    try:
+        assert sock.getsockname()[1] > 0
+        assert sock.get_inheritable()
+    finally:
+        sock.close()
+
+    for name in ("metrics-1.json", "metrics-2.json", "outro.json"):
+        (tmp_path / name).write_text("{}")
+    clear_metrics_dir(str(tmp_path))
+    assert [p.name for p in tmp_path.iterdir()] == ["outro.json"]
+
+
+def test_per_process_backends():
+    settings = SimpleNamespace(
+        DATABASE_URL="sqlite:///./sql_app.db",
+        IDEMPOTENCY_URL="", IDEMPOTENCY_ENABLED=True,
+        RATE_LIMIT_URL="memory://", RATE_LIMIT_ENABLED=False,
+    )
+    # Padrão: chaves no SQLite, rate limit desativado
+    assert per_process_backends(settings) == []
+    settings.DATABASE_URL = "memory://"
+    settings.RATE_LIMIT_ENABLED = True
+    assert per_process_backends(settings) == ["IDEMPOTENCY_URL", "RATE_LIMIT_URL"]
+    settings.IDEMPOTENCY_URL = "redis://localhost:6379/0"
+    assert per_process_backends(settings) == ["RATE_LIMIT_URL"]
+
+
+def test_serve_refuses_per_process_idempotency_with_workers(monkeypatch, caplog):
+    from boilerplate.config import settings
+
+    monkeypatch.setattr(settings, "IDEMPOTENCY_ENABLED", True)
+    monkeypatch.setattr(settings, "IDEMPOTENCY_URL", "memory://")
+    monkeypatch.setattr(settings, "IDEMPOTENCY_PER_WORKER", False)
+    monkeypatch.setattr(settings, "WAL_DIR", "")
+    assert serve(ServerOptions(workers=2, log_level="warning")) == 1
+    assert "IDEMPOTENCY_PER_WORKER" in caplog.text
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requer fork")
+def test_workers_restart_after_max_requests(tmp_path):
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(SRC),
+        METRICS_DIR="",
+        LOG_LEVEL="INFO",
+    )
+    # Configuração padrão: tarefas e chaves de idempotência no SQLite (em tmp_path)
+    env.pop("DATABASE_URL", None)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "boilerplate", "serve", "--host", "127.0.0.1", "--port", "0",
+         "--workers", "2", "--max-requests", "3", "--no-access-log"],
+        cwd=tmp_path, env=env, stderr=subprocess.PIPE, text=True,
+    )
+    output = []
+    try:
+        for line in process.stderr:
+            output.append(line)
+            if "Escutando em" in line:
+                url = line.split("Escutando em ", 1)[1].split()[0]
+                break
+        else:
+            pytest.fail("servidor não iniciou:\n" + "".join(output))
+
+        # Conexões novas a cada requisição: nenhuma falha durante os reinícios
+        statuses = [httpx.get(f"{url}/health", timeout=10).status_code for _ in range(15)]
+        assert statuses == [200] * 15
+    finally:
+        process.send_signal(signal.SIGTERM)
+        _, rest = process.communicate(timeout=30)
+        output.append(rest)
+    log = "".join(output)
+    assert process.returncode == 0
+    assert "reiniciando no slot" in log
+    assert "Encerrando 2 worker(s)" in log
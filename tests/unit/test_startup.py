@@ -0,0 +1,78 @@
+"""Testes do custo de inicialização (`import boilerplate.main`)."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+# Orçamento de importação da aplicação, em milissegundos (o FastAPI e o
+# Pydantic respondem pela maior parte). Ajustável em máquinas lentas.
+IMPORT_BUDGET_MS = float(os.environ.get("BOILERPLATE_IMPORT_BUDGET_MS", 1500))
+
+# Módulos que não devem ser carregados só para servir a API
+DEFERRED_MODULES = (
+    "jinja2",
+    "uvicorn",
+    "boilerplate.core.assets",
+    "boilerplate.core.profiling",
+    "boilerplate.core.ratelimit",
+    "boilerplate.core.server",
+    "boilerplate.core.storage.compact",
+    "boilerplate.core.storage.durable",
+    "pytz",
+)
+# O backend é criado na importação: com o padrão (`sqlite:///./sql_app.db`)
+# estes módulos são carregados, e só ficam de fora com outro DATABASE_URL
+SQLITE_MODULES = ("sqlite3", "boilerplate.core.storage.sqlite")
+
+
+def _import_times(cwd: Path, code: str = "import boilerplate.main", **env: str) -> Dict[str, int]:
+    """
+    Tempo cumulativo de importação (µs) de cada módulo, via `-X importtime`.
+
+    Roda em `cwd` com a configuração padrão, exceto as variáveis em `env`.
+    """
+    environ = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    environ.update(env, PYTHONPATH=str(SRC))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=environ, cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_time_budget(tmp_path):
+    # Melhor de três execuções, para reduzir o ruído da máquina
+    best = min(_import_times(tmp_path)["boilerplate.main"] for _ in range(3)) / 1000
+    assert best < IMPORT_BUDGET_MS, f"import boilerplate.main levou {best:.0f} ms"
+
+
+def test_heavy_modules_are_deferred(tmp_path):
+    times = _import_times(tmp_path)
+    loaded = [name for name in DEFERRED_MODULES if name in times]
+    assert loaded == []
+
+
+def test_sqlite_is_loaded_only_when_configured(tmp_path):
+    assert all(name in _import_times(tmp_path) for name in SQLITE_MODULES)
+    times = _import_times(tmp_path, DATABASE_URL="memory://")
+    assert [name for name in SQLITE_MODULES if name in times] == []
+
+
+def test_templates_and_static_files_load_on_first_use(client):
+    from boilerplate.main import get_templates
+
+    assert client.get("/todos").status_code == 200
+    assert get_templates().env.loader is not None
+    response = client.get("/static/css/styles.css")
+    assert response.status_code == 200
+    assert "text/css" in response.headers["content-type"]
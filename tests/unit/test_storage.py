@@ -0,0 +1,306 @@
+"""Testes unitários para os backends de armazenamento."""
+import asyncio
+from datetime import datetime
+
+import pytest
+import pytz
+
+from boilerplate.core.storage import (
+    CompactMemoryBackend,
+    MemoryBackend,
+    SQLiteBackend,
+    VersionConflictError,
+    create_backend,
+)
+
+
+@pytest.fixture(params=["memory", "compact", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        backend = MemoryBackend()
+    elif request.param == "compact":
+        backend = CompactMemoryBackend()
+    else:
+        backend = SQLiteBackend(str(tmp_path / "todos.db"))
+    yield backend
+    backend.close()
+
+
+class TestCompareAndSwap:
+    """Concorrência otimista implementada por todos os backends."""
+
+    @pytest.mark.asyncio
+    async def test_update_increments_version(self, backend):
+        now = datetime.now(pytz.timezone("America/Sao_Paulo"))
+        created = await backend.create({"title": "A", "completed": False}, now)
+        assert created["version"] == 1
+        updated = await backend.update(created["id"], {"title": "B"}, now, expected_version=1)
+        assert updated["version"] == 2
+
+    @pytest.mark.asyncio
+    async def test_conflict_leaves_todo_untouched(self, backend):
+        now = datetime.now(pytz.timezone("America/Sao_Paulo"))
+        created = await backend.create({"title": "A", "completed": False}, now)
+        await backend.update(created["id"], {"title": "B"}, now)
+        with pytest.raises(VersionConflictError) as exc:
+            await backend.update(created["id"], {"title": "C"}, now, expected_version=1)
+        assert exc.value.current == 2
+        assert (await backend.get(created["id"]))["title"] == "B"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writers_only_one_wins(self, backend):
+        now = datetime.now(pytz.timezone("America/Sao_Paulo"))
+        created = await backend.create({"title": "A", "completed": False}, now)
+        results = await asyncio.gather(
+            *(backend.update(created["id"], {"title": f"T{i}"}, now, expected_version=1) for i in range(5)),
+            return_exceptions=True,
+        )
+        assert sum(isinstance(r, dict) for r in results) == 1
+        assert sum(isinstance(r, VersionConflictError) for r in results) == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fts", [True, False])
+async def test_search_is_consistent_across_backends(backend, fts):
+    """Mesma tokenização (sem "_" nos termos, sem acentos) em todos os backends."""
+    if isinstance(backend, SQLiteBackend):
+        backend.fts = fts
+    elif not fts:
+        pytest.skip("só o SQLite tem a busca sem FTS5")
+    now = datetime.now(pytz.timezone("America/Sao_Paulo"))
+    await backend.create_many([
+        {"title": "snake_case", "description": None, "completed": False},
+        {"title": "Ação rápida", "description": "snakes", "completed": False},
+        {"title": "encase", "description": None, "completed": False},
+    ], now)
+    ids = lambda todos: [t["id"] for t in todos]
+    assert ids(await backend.list_page(None, 10, search="snake_case")) == [1]
+    assert ids(await backend.list_page(None, 10, search="case")) == [1]
+    assert ids(await backend.list_page(None, 10, search="snake")) == [1, 2]
+    assert ids(await backend.list_page(None, 10, search="ACAO rap")) == [2]
+    # Busca por prefixo de termo, não por trecho
+    assert ids(await backend.list_page(None, 10, search="ase")) == []
+
+
+class TestCreateBackend:
+    """Testes para a seleção do backend a partir da DATABASE_URL."""
+
+    def test_memory_url(self):
+        assert isinstance(create_backend("memory://"), MemoryBackend)
+
+    def test_compact_url(self):
+        assert isinstance(create_backend("memory+compact://"), CompactMemoryBackend)
+
+    def test_sqlite_url(self, tmp_path):
+        backend = create_backend(f"sqlite:///{tmp_path}/app.db")
+        assert isinstance(backend, SQLiteBackend)
+        assert backend.path == f"{tmp_path}/app.db"
+
+    def test_unsupported_url(self):
+        with pytest.raises(ValueError):
+            create_backend("postgresql://localhost/db")
+
+
+class TestMemoryBackend:
+    """Testes para o backend em memória."""
+
+    @pytest.mark.asyncio
+    async def test_list_page_uses_ordered_index(self):
+        backend = MemoryBackend()
+        now = datetime.now(pytz.timezone("America/Sao_Paulo"))
+        for i in range(5):
+            await backend.create({"title": f"T{i}", "completed": False}, now)
+        await backend.delete(2)
+
+        page = await backend.list_page(None, 2)
+        assert [t["id"] for t in page] == [1, 3]
+        page = await backend.list_page(3, 10)
+        assert [t["id"] for t in page] == [4, 5]
+
+    @pytest.mark.asyncio
+    async def test_index_survives_external_clear(self):
+        backend = MemoryBackend()
+        now = datetime.now(pytz.timezone("America/Sao_Paulo"))
+        await backend.create({"title": "A", "completed": False}, now)
+        backend.data.clear()
+        assert await backend.list_page(None, 10) == []
+
+
+class TestCompactMemoryBackend:
+    """Testes para o backend em memória compacto."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.backend = CompactMemoryBackend()
+        self.now = datetime.now(pytz.timezone("America/Sao_Paulo"))
+
+    async def _create(self, count, **data):
+        items = [{"title": f"Tarefa {i}", "completed": i % 2 == 0, **data} for i in range(count)]
+        return await self.backend.create_many(items, self.now)
+
+    @pytest.mark.asyncio
+    async def test_roundtrip_preserves_fields(self):
+        todo = await self.backend.create(
+            {"title": "Ação urgente ✓", "description": None, "completed": True}, self.now
+        )
+        assert todo == {
+            "id": 1,
+            "title": "Ação urgente ✓",
+            "description": None,
+            "completed": True,
+            "created_at": self.now,
+            "updated_at": self.now,
+            "version": 1,
+        }
+        updated = await self.backend.update(1, {"description": "Detalhes"}, self.now)
+        assert (updated["title"], updated["description"], updated["version"]) == (
+            "Ação urgente ✓", "Detalhes", 2
+        )
+        assert await self.backend.get(1) == updated
+        # Datas sem timezone são consideradas no horário local
+        naive = datetime(2024, 1, 2, 3, 4, 5, 678901)
+        todo = await self.backend.create({"title": "Local"}, naive)
+        assert todo["created_at"].replace(tzinfo=None) == naive
+
+    @pytest.mark.asyncio
+    async def test_list_page_filters_by_status_and_search(self):
+        await self._create(20)
+        await self.backend.update(3, {"title": "Comprar pão"}, self.now)
+        await self.backend.delete(5)
+
+        page = await self.backend.list_page(None, 3, completed=True)
+        assert [t["id"] for t in page] == [1, 3, 7]
+        page = await self.backend.list_page(10, 3, completed=False)
+        assert [t["id"] for t in page] == [12, 14, 16]
+        assert [t["id"] for t in await self.backend.list_page(None, 10, search="PAO")] == [3]
+        assert await self.backend.list_page(None, 10, search="tarefa 4") == []
+        page = await self.backend.list_page(None, 4, search="tarefa 1")
+        assert [t["id"] for t in page] == [2, 11, 12, 13]
+        page = await self.backend.list_page(12, 4, completed=True, search="tarefa 1")
+        assert [t["id"] for t in page] == [13, 15, 17, 19]
+
+    @pytest.mark.asyncio
+    async def test_broad_search_terms_are_checked_per_todo(self, monkeypatch):
+        from boilerplate.core.storage import compact
+
+        monkeypatch.setattr(compact, "MAX_SEARCH_CANDIDATES", 2)
+        await self._create(10)
+        page = await self.backend.list_page(4, 3, search="taref")
+        assert [t["id"] for t in page] == [5, 6, 7]
+        page = await self.backend.list_page(None, 10, completed=False, search="taref 7")
+        assert [t["id"] for t in page] == [8]
+        assert await self.backend.list_page(None, 10, completed=True, search="taref 7") == []
+
+    @pytest.mark.asyncio
+    async def test_compaction_reclaims_deleted_todos(self, monkeypatch):
+        from boilerplate.core.storage import compact
+
+        monkeypatch.setattr(compact, "COMPACT_MIN_SLOTS", 4)
+        monkeypatch.setattr(compact, "COMPACT_MIN_BYTES", 64)
+        await self._create(12, description="texto")
+        await self.backend.delete_many(list(range(1, 9)))
+        stats = self.backend.stats()
+        assert (stats["todos"], stats["slots"]) == (4, 4)
+        assert stats["dead_bytes"] == 0
+
+        for _ in range(5):
+            await self.backend.update(12, {"title": "Título bem mais longo " * 4}, self.now)
+        assert self.backend.stats()["dead_bytes"] < 200
+        todos = await self.backend.list()
+        assert [t["id"] for t in todos] == [9, 10, 11, 12]
+        assert todos[0]["completed"] is True and todos[1]["completed"] is False
+        assert [t["id"] for t in await self.backend.list_page(None, 10, search="longo")] == [12]
+        assert (await self.backend.create({"title": "Nova"}, self.now))["id"] == 13
+
+    @pytest.mark.asyncio
+    async def test_uses_less_memory_than_dicts(self):
+        import tracemalloc
+
+        items = [
+            {"title": f"Tarefa {i}", "description": f"Descrição {i}", "completed": i % 3 == 0}
+            for i in range(5000)
+        ]
+        usage = {}
+        for backend_class in (MemoryBackend, CompactMemoryBackend):
+            tracemalloc.start()
+            backend = backend_class()
+            await backend.create_many(items, self.now)
+            usage[backend_class] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+        assert usage[CompactMemoryBackend] * 4 < usage[MemoryBackend]
+
+
+class TestSQLiteBackend:
+    """Testes para o backend SQLite."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.path = str(tmp_path / "todos.db")
+        self.backend = SQLiteBackend(self.path, pool_size=2)
+        self.now = datetime.now(pytz.timezone("America/Sao_Paulo"))
+        yield
+        self.backend.close()
+
+    @pytest.mark.asyncio
+    async def test_crud_roundtrip(self):
+        created = await self.backend.create({"title": "A", "description": None, "completed": False}, self.now)
+        assert created["id"] == 1
+        assert await self.backend.get(1) == created
+
+        updated = await self.backend.update(1, {"completed": True}, self.now)
+        assert updated["completed"] is True
+        assert updated["title"] == "A"
+
+        assert await self.backend.delete(1) is True
+        assert await self.backend.get(1) is None
+        assert await self.backend.delete(1) is False
+        assert await self.backend.update(1, {"title": "B"}, self.now) is None
+
+    @pytest.mark.asyncio
+    async def test_list_page(self):
+        for i in range(3):
+            await self.backend.create({"title": f"T{i}", "completed": False}, self.now)
+        assert [t["id"] for t in await self.backend.list_page(None, 2)] == [1, 2]
+        assert [t["id"] for t in await self.backend.list_page(2, 2)] == [3]
+
+    @pytest.mark.asyncio
+    async def test_data_is_shared_between_instances(self):
+        """Dois backends no mesmo arquivo (ex.: dois workers) veem os mesmos dados."""
+        await self.backend.create({"title": "A", "completed": False}, self.now)
+        other = SQLiteBackend(self.path)
+        try:
+            todos = await other.list()
+            assert [t["title"] for t in todos] == ["A"]
+        finally:
+            other.close()
+
+    @pytest.mark.asyncio
+    async def test_wal_mode(self):
+        with self.backend.pool.connection() as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    @pytest.mark.asyncio
+    async def test_in_memory_database(self):
+        backend = create_backend("sqlite:///:memory:")
+        try:
+            await backend.create({"title": "A", "completed": False}, self.now)
+            await backend.clear()
+            assert await backend.list() == []
+        finally:
+            backend.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("in_memory", [True, False])
+    async def test_concurrent_writes(self, in_memory):
+        """Escritas concorrentes não falham com `database table is locked`."""
+        backend = create_backend("sqlite:///:memory:") if in_memory else self.backend
+        try:
+            await backend.create_many([{"title": f"T{i}", "completed": False} for i in range(10)], self.now)
+            await asyncio.gather(*(
+                backend.update(i % 10 + 1, {"title": f"U{i}"}, self.now) for i in range(200)
+            ))
+            assert len(await backend.list()) == 10
+        finally:
+            if in_memory:
+                backend.close()
@@ -0,0 +1,47 @@
+"""Testes unitários para os utilitários de streaming."""
+import asyncio
+import gzip
+import os
+
+import pytest
+
+from boilerplate.utils.streaming import gunzip_stream, gzip_stream, iter_lines
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _collect(stream) -> list:
+    return [item async for item in stream]
+
+
+def test_gzip_round_trip():
+    data = os.urandom(50000) + b"a" * 500000
+    compressed = b"".join(asyncio.run(_collect(gzip_stream(_chunks(data, 4096)))))
+    assert gzip.decompress(compressed) == data
+
+
+@pytest.mark.parametrize("size", [7, 1000, 10**7])
+def test_gunzip_bounds_output_and_accepts_members(size):
+    data = b"a" * 1000000
+    compressed = gzip.compress(data) + gzip.compress(b"fim")
+    parts = asyncio.run(_collect(gunzip_stream(_chunks(compressed, size), max_chunk=4096)))
+    assert b"".join(parts) == data + b"fim"
+    assert max(len(part) for part in parts) <= 4096
+
+
+def test_gunzip_rejects_invalid_and_truncated():
+    with pytest.raises(ValueError, match="inválido"):
+        asyncio.run(_collect(gunzip_stream(_chunks(b"texto puro", 4))))
+    with pytest.raises(ValueError, match="truncado"):
+        asyncio.run(_collect(gunzip_stream(_chunks(gzip.compress(b"x" * 100)[:-4], 4))))
+    assert asyncio.run(_collect(gunzip_stream(_chunks(b"", 4)))) == []
+
+
+@pytest.mark.parametrize("size", [1, 2, 64])
+def test_iter_lines(size):
+    data = b"a\r\nbb\n\nlinha longa\nccc"
+    lines = asyncio.run(_collect(iter_lines(_chunks(data, size), max_line_bytes=4)))
+    assert lines == [(1, b"a"), (2, b"bb"), (3, b""), (4, None), (5, b"ccc")]